@@ -0,0 +1,72 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from . import logger
+from .client import get_session
+from .concurrency import imap_unordered, DEFAULT_WORKERS
+
+lgr = logger.init()
+
+
+def read_pairs(lines):
+    """Parses name==version lines. blank lines and comments are skipped.
+    :param lines: iterable of lines, e.g. an open file. byte lines are
+    decoded as UTF-8
+    :return: generator of (name, version) tuples
+    :raises: UnicodeDecodeError if a line is not valid UTF-8
+    """
+    for line_number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        line = line.split('#', 1)[0].strip()
+        if not line:
+            continue
+        name, _, version = line.partition('==')
+        if not name.strip() or not version.strip():
+            lgr.warn('skipping line {0}: expected name==version, got '
+                     '{1}'.format(line_number, line))
+            continue
+        yield name.strip(), version.strip()
+
+
+def check_pairs(pypi_handler, pairs, registered=False,
+                workers=DEFAULT_WORKERS):
+    """Checks many name/version pairs against pypi_handler's target.
+    At most `workers` checks are in flight at a time and results are
+    yielded as they complete, so huge inputs are never held in memory.
+    :param pypi_handler: PypiHandler pointing at the index to check
+    :param pairs: iterable of (name, version) tuples
+    :param registered: check registration instead of availability
+    :param workers: maximum number of concurrent checks
+    :return: generator of result dicts
+    :raises: the error reading pairs raised, once the pairs read before it
+    are checked
+    """
+    if registered:
+        check = pypi_handler.is_package_of_specific_version_registered_on_pypi
+        key = 'registered'
+    else:
+        check = pypi_handler.is_package_of_specific_version_available_on_pypi
+        key = 'available'
+    get_session(workers)
+    for (name, version), result, error in imap_unordered(
+            lambda pair: check(*pair), pairs, workers):
+        yield {
+            'name': name,
+            'version': version,
+            'target': pypi_handler.target,
+            key: result,
+            'error': str(error) if error else None,
+        }
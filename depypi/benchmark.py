@@ -0,0 +1,469 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import platform
+import tempfile
+import threading
+import subprocess
+from timeit import default_timer
+
+import click
+
+from . import logger
+from .cache import CACHE_DIR_ENV
+
+lgr = logger.init()
+
+DEFAULT_PACKAGES = 5
+DEFAULT_REPEAT = 3
+DEFAULT_WORKERS = 8
+# projects of the synthetic dependency graph seeded on the index
+DEFAULT_GRAPH_SIZE = 200
+# a phase whose median is this much slower than the baseline's regressed
+DEFAULT_TOLERANCE = 0.2
+# seconds the CLI may take to start beyond a bare interpreter
+DEFAULT_STARTUP_BUDGET = 0.15
+# seconds the threads of a previous run get to end before the metadata
+# phase, which only probes setup.py in process while no other thread runs
+THREADS_TIMEOUT = 5
+
+PHASES = ('metadata', 'credentials', 'build', 'upload', 'verify', 'check',
+          'getdeps', 'getsubdeps')
+SCENARIOS = ('single', 'batch')
+CACHE_STATES = ('cold', 'warm')
+
+CREDENTIALS = ('benchmark', 'benchmark')
+
+# command lines whose startup is measured, by name
+STARTUP_COMMANDS = (
+    ('help', ['--help']),
+    ('isonpypi help', ['isonpypi', '--help']),
+)
+_CLI = 'from depypi.depypi import main; main()'
+
+
+class BenchmarkError(Exception):
+    pass
+
+
+_SETUP_PY = '''from setuptools import setup
+
+setup(
+    name={name!r},
+    version={version!r},
+    description='depypi benchmark package',
+    py_modules=[{module!r}],
+    install_requires={install_requires!r},
+)
+'''
+
+
+def graph_project(number):
+    return 'bench-dep-{0}'.format(number)
+
+
+def seed_graph(index, size=DEFAULT_GRAPH_SIZE):
+    """Adds a synthetic dependency graph to a FakeIndex. Project k
+    requires projects 2k+1 and 2k+2, and every project has three releases.
+    Each release gets an sdist, as versions are read from the files the
+    simple API lists
+    :param index: FakeIndex
+    :param size: number of projects
+    :return: None
+    """
+    for number in range(size):
+        name = graph_project(number)
+        requires = ['{0}>=1.0'.format(graph_project(child))
+                    for child in (2 * number + 1, 2 * number + 2)
+                    if child < size]
+        for version in ('1.0', '1.1', '2.0rc1'):
+            index.add_release(
+                name, version,
+                {'{0}-{1}.tar.gz'.format(name, version): b'sdist'},
+                requires_dist=requires)
+
+
+def make_package(root, number):
+    """Writes a synthetic package with a setup.py and a requirements file
+    including another one
+    :param root: directory to create the package in
+    :param number: number of the package, making its name unique
+    :return: path of the package
+    """
+    name = 'bench-pkg-{0}'.format(number)
+    module = name.replace('-', '_')
+    path = os.path.join(root, name)
+    os.makedirs(path)
+    with open(os.path.join(path, 'setup.py'), 'w') as f:
+        f.write(_SETUP_PY.format(
+            name=name, version='1.0.{0}'.format(number), module=module,
+            install_requires=[graph_project(0), graph_project(1) + '>=1.0']))
+    with open(os.path.join(path, module + '.py'), 'w') as f:
+        f.write('VALUE = {0}\n'.format(number))
+    with open(os.path.join(path, 'README'), 'w') as f:
+        f.write('benchmark package {0}\n'.format(number))
+    with open(os.path.join(path, 'requirements.txt'), 'w') as f:
+        f.write('-r base-requirements.txt\n{0}==1.1\n'.format(
+            graph_project(2)))
+    with open(os.path.join(path, 'base-requirements.txt'), 'w') as f:
+        f.write('{0}>=1.0 ; python_version >= "2.7"\n'.format(
+            graph_project(3)))
+    return path
+
+
+def _clear_directory(directory):
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+
+
+def _reset_memos():
+    """Forgets what this process memoized, so a cold run starts from
+    nothing like a new process would
+    """
+    from . import client, index, requirements
+    with client._session_lock:
+        if client._session is not None:
+            client._session.close()
+        client._session = None
+        client._session_pool_size = 0
+    with index._indexes_lock:
+        index._indexes.clear()
+    with index._versions_lock:
+        index._versions.clear()
+    with requirements._parsed_lock:
+        requirements._parsed.clear()
+
+
+def _summary(durations):
+    ordered = sorted(durations)
+    middle = len(ordered) // 2
+    median = ordered[middle] if len(ordered) % 2 else \
+        (ordered[middle - 1] + ordered[middle]) / 2.0
+    return {
+        'runs': durations,
+        'min': ordered[0],
+        'median': median,
+        'mean': sum(ordered) / len(ordered),
+        'max': ordered[-1],
+    }
+
+
+def _time_process(args, env):
+    with open(os.devnull, 'w') as devnull:
+        start = default_timer()
+        subprocess.call(args, stdout=devnull, stderr=devnull, env=env)
+        return default_timer() - start
+
+
+def measure_startup(repeat=DEFAULT_REPEAT):
+    """Times how long the CLI takes to start in new processes, less the
+    time a bare interpreter takes to start
+    :param repeat: number of processes started for each command
+    :return: dict of command name to a list of seconds
+    """
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(
+        __file__)))
+    env['PYTHONPATH'] = os.pathsep.join(
+        [package_root] + [p for p in [env.get('PYTHONPATH')] if p])
+    overheads = {}
+    for _ in range(repeat):
+        bare = _time_process([sys.executable, '-c', 'pass'], env)
+        for name, args in STARTUP_COMMANDS:
+            seconds = _time_process([sys.executable, '-c', _CLI] + args, env)
+            overheads.setdefault(name, []).append(max(0, seconds - bare))
+    return overheads
+
+
+class _Run():
+    def __init__(self, packages, index, workers):
+        """One pass of every phase over a set of packages.
+        Phases run one after the other, each over all packages at once.
+        :param packages: paths of the packages
+        :param index: FakeIndex to upload to and resolve from
+        :param workers: maximum number of packages handled at once
+        :return: None
+        """
+        from .client import get_session
+        from .pypi_handler import PypiHandler
+        # every package makes concurrent requests of its own
+        get_session(workers * workers)
+        self.packages = packages
+        self.index = index
+        self.workers = workers
+        self.handlers = dict(
+            (path, PypiHandler(path, CREDENTIALS, 'sdist',
+                               repository_url=index.url,
+                               upload_workers=workers, verify_timeout=60))
+            for path in packages)
+        self.distributions = {}
+        self.uploaders = {}
+        self.timings = {}
+
+    def _each(self, phase, func):
+        from .concurrency import map_concurrently
+        start = default_timer()
+        results = map_concurrently(func, self.packages, self.workers)
+        self.timings[phase] = default_timer() - start
+        return dict(zip(self.packages, results))
+
+    def run(self):
+        from .version_checker import VersionChecker
+        self.uploaders = self._each(
+            'credentials', lambda path: self.handlers[path]._get_uploader())
+        self.distributions = self._each(
+            'build', lambda path: self.handlers[path].build())
+        uploaded = self._each(
+            'upload', lambda path: self.handlers[path].upload_distributions(
+                self.uploaders[path], self.distributions[path]))
+        if not all(uploaded.values()):
+            raise BenchmarkError('verification of an upload failed')
+        self._each('verify', lambda path: self._check(path, refresh=True))
+        self._each('check', lambda path: self._check(path, refresh=False))
+        self._each('getdeps', lambda path: VersionChecker(
+            path, 'requirements.txt').get_all_dependencies())
+        self._each('getsubdeps', lambda path: VersionChecker(
+            path, 'requirements.txt').get_all_sub_dependencies(
+                index_url=self.index.url, workers=self.workers))
+        return self.timings
+
+    def _check(self, path, refresh):
+        handler = self.handlers[path]
+        return handler.is_package_of_specific_version_available_on_pypi(
+            handler.name, handler.version, refresh=refresh)
+
+
+def _time_metadata(paths):
+    """Reads the metadata of packages one after the other.
+    Runs before the index starts, as setup.py is only probed in process
+    while no other thread runs.
+    :param paths: paths of the packages
+    :return: seconds it took
+    """
+    from .metadata import get_metadata
+    # threads serving the connections of the previous index end once the
+    # session is closed
+    deadline = default_timer() + THREADS_TIMEOUT
+    for thread in threading.enumerate():
+        if thread is not threading.current_thread() and \
+                thread not in logger.background_threads():
+            thread.join(max(0, deadline - default_timer()))
+    start = default_timer()
+    for path in paths:
+        get_metadata(path)
+    return default_timer() - start
+
+
+def run_benchmarks(packages=DEFAULT_PACKAGES, repeat=DEFAULT_REPEAT,
+                   workers=DEFAULT_WORKERS, latency=0, propagation_delay=0,
+                   graph_size=DEFAULT_GRAPH_SIZE, quiet=False):
+    """Runs every phase of PypiHandler and VersionChecker against synthetic
+    packages and a FakeIndex, for one package and for a batch of them, with
+    empty (cold) and populated (warm) caches.
+    Cold runs start with an empty cache directory, no memoized lookups and
+    a new index. The warm run following each one repeats it as is, so it
+    reuses caches and finds the packages uploaded already.
+    The metadata phase reads packages one at a time before the index
+    starts, so that it measures the in-process probe of setup.py.
+    :param packages: number of packages of the batch scenario
+    :param repeat: number of cold and warm runs of each scenario
+    :param workers: maximum number of packages handled at once
+    :param latency: seconds the index delays every request by
+    :param propagation_delay: seconds before uploads are visible
+    :param graph_size: number of projects in the dependency graph
+    :param quiet: only log warnings and errors of the operations
+    :return: dict of the environment, configuration and results. the
+    startup of the CLI is reported as the phases of the cli scenario
+    :raises: BenchmarkError if an upload could not be verified
+    """
+    root = tempfile.mkdtemp(prefix='depypi-benchmark-')
+    cache_dir = os.path.join(root, 'cache')
+    os.makedirs(cache_dir)
+    # caches pick their directory when their module is imported, so
+    # nothing benchmarked may be imported before this point
+    cache_dir_env = os.environ.get(CACHE_DIR_ENV)
+    os.environ[CACHE_DIR_ENV] = cache_dir
+    durations = {}
+    try:
+        from .fakeindex import FakeIndex
+        from . import pypi_handler, version_checker  # NOQA
+        if quiet:
+            lgr.setLevel(logging.WARNING)
+        batch = [make_package(root, n) for n in range(packages)]
+        for scenario in SCENARIOS:
+            paths = batch if scenario == 'batch' else batch[:1]
+            for _ in range(repeat):
+                _clear_directory(cache_dir)
+                _reset_memos()
+                for path in paths:
+                    shutil.rmtree(os.path.join(path, 'dist'),
+                                  ignore_errors=True)
+                metadata = dict((cache_state, _time_metadata(paths))
+                                for cache_state in CACHE_STATES)
+                with FakeIndex(latency=latency, credentials=CREDENTIALS,
+                               propagation_delay=propagation_delay) as index:
+                    seed_graph(index, graph_size)
+                    for cache_state in CACHE_STATES:
+                        lgr.info('running {0} {1} benchmark of {2} '
+                                 'package(s)'.format(cache_state, scenario,
+                                                     len(paths)))
+                        timings = _Run(paths, index, workers).run()
+                        timings['metadata'] = metadata[cache_state]
+                        for phase, seconds in timings.items():
+                            durations.setdefault(
+                                (scenario, cache_state, phase),
+                                []).append(seconds)
+    finally:
+        if cache_dir_env is None:
+            os.environ.pop(CACHE_DIR_ENV, None)
+        else:
+            os.environ[CACHE_DIR_ENV] = cache_dir_env
+        shutil.rmtree(root, ignore_errors=True)
+
+    results = []
+    for name, overheads in sorted(measure_startup(repeat).items()):
+        result = {'scenario': 'cli', 'cache': 'cold',
+                  'phase': 'startup: ' + name}
+        result.update(_summary(overheads))
+        results.append(result)
+    for scenario in SCENARIOS:
+        for cache_state in CACHE_STATES:
+            for phase in PHASES:
+                result = {'scenario': scenario, 'cache': cache_state,
+                          'phase': phase}
+                result.update(_summary(
+                    durations[(scenario, cache_state, phase)]))
+                results.append(result)
+    return {
+        'depypi_version': _depypi_version(),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'config': {
+            'packages': packages,
+            'repeat': repeat,
+            'workers': workers,
+            'latency': latency,
+            'propagation_delay': propagation_delay,
+            'graph_size': graph_size,
+        },
+        'results': results,
+    }
+
+
+def _depypi_version():
+    try:
+        import pkg_resources
+        return pkg_resources.get_distribution('depypi').version
+    except Exception:
+        return None
+
+
+def find_regressions(baseline, report, tolerance=DEFAULT_TOLERANCE):
+    """Compares the medians of two benchmark reports
+    :param baseline: report of a previous run, e.g. of another version
+    :param report: report of this run
+    :param tolerance: fraction a median may grow by
+    :return: list of dicts of the scenario, cache state and phase whose
+    median grew more than tolerance, with both medians
+    """
+    previous = dict(((r['scenario'], r['cache'], r['phase']), r['median'])
+                    for r in baseline['results'])
+    regressions = []
+    for result in report['results']:
+        key = (result['scenario'], result['cache'], result['phase'])
+        if key in previous and \
+                result['median'] > previous[key] * (1 + tolerance):
+            regressions.append({
+                'scenario': key[0], 'cache': key[1], 'phase': key[2],
+                'baseline': previous[key], 'median': result['median']})
+    return regressions
+
+
+@click.command()
+@click.option('-n', '--packages', default=DEFAULT_PACKAGES, type=int,
+              help='number of packages in the batch scenario. '
+                   'default is {0}'.format(DEFAULT_PACKAGES))
+@click.option('-r', '--repeat', default=DEFAULT_REPEAT, type=int,
+              help='cold and warm runs of each scenario. '
+                   'default is {0}'.format(DEFAULT_REPEAT))
+@click.option('-w', '--workers', default=DEFAULT_WORKERS, type=int,
+              help='maximum number of packages handled at once. '
+                   'default is {0}'.format(DEFAULT_WORKERS))
+@click.option('--latency', default=0, type=float,
+              help='seconds the index delays every request by')
+@click.option('--propagation-delay', default=0, type=float,
+              help='seconds before uploads are visible on the index')
+@click.option('--graph-size', default=DEFAULT_GRAPH_SIZE, type=int,
+              help='number of projects in the dependency graph')
+@click.option('-o', '--output', type=click.File('w'), default='-',
+              help='file to write the JSON results to. default is stdout')
+@click.option('-b', '--baseline', type=click.File('r'), required=False,
+              help='results of a previous run. fails if a phase got '
+                   'slower than --tolerance')
+@click.option('--tolerance', default=DEFAULT_TOLERANCE, type=float,
+              help='fraction a phase may get slower than the baseline. '
+                   'default is {0}'.format(DEFAULT_TOLERANCE))
+@click.option('--startup-budget', default=DEFAULT_STARTUP_BUDGET,
+              type=float,
+              help='seconds the CLI may take to start beyond the '
+                   'interpreter. default is {0}'.format(
+                       DEFAULT_STARTUP_BUDGET))
+@click.option('-v', '--verbose', is_flag=True, default=False,
+              help='show the log of the benchmarked operations')
+def main(packages, repeat, workers, latency, propagation_delay, graph_size,
+         output, baseline, tolerance, startup_budget, verbose):
+    """benchmark the phases of depypi against a local index
+    """
+    logger.configure()
+    try:
+        report = run_benchmarks(packages, repeat, workers, latency,
+                                propagation_delay, graph_size,
+                                quiet=not verbose)
+    except BenchmarkError as e:
+        lgr.error(e)
+        sys.exit(1)
+    output.write(json.dumps(report, indent=4, sort_keys=True) + '\n')
+    over_budget = [r for r in report['results'] if r['scenario'] == 'cli'
+                   and r['median'] > startup_budget]
+    for result in over_budget:
+        lgr.error('{0} took {1:.3f}s, over the budget of {2:.3f}s'.format(
+            result['phase'], result['median'], startup_budget))
+    if over_budget:
+        sys.exit(1)
+    if baseline:
+        regressions = find_regressions(json.load(baseline), report,
+                                       tolerance)
+        for regression in regressions:
+            lgr.error('{scenario} {cache} {phase} regressed: median '
+                      '{median:.3f}s, baseline {baseline:.3f}s'.format(
+                          **regression))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,324 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import sys
+import stat as stat_module
+import time
+import shutil
+import hashlib
+import tempfile
+import posixpath
+from fnmatch import fnmatch
+
+try:
+    from os import scandir
+except ImportError:
+    try:
+        from scandir import scandir
+    except ImportError:
+        scandir = None
+
+from . import logger
+from .cache import FileCache, get_cache_dir, hash_key
+
+lgr = logger.init()
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_SIZE = 500 * 1024 * 1024
+
+# never part of a build's input
+IGNORED_DIRS = ('.git', '.hg', '.svn', '.tox', '.nox', '.eggs', '.venv',
+                'venv', 'build', 'dist', '__pycache__', '*.egg-info')
+IGNORED_FILES = ('*.pyc', '*.pyo', '*.swp', '*~', '.DS_Store')
+
+# files modified this recently may change again within the same mtime
+# tick, so their digests are not remembered
+RACY_MTIME_WINDOW = 2
+
+_tree_stats = FileCache('tree-stats', max_size=50 * 1024 * 1024)
+
+
+class _GitIgnore():
+    """The patterns of a top level .gitignore
+    """
+    def __init__(self, path):
+        self.rules = []
+        try:
+            with open(path) as f:
+                lines = f.read().splitlines()
+        except IOError:
+            return
+        for line in lines:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            negated = line.startswith('!')
+            line = line.lstrip('!')
+            dir_only = line.endswith('/')
+            line = line.rstrip('/')
+            anchored = '/' in line
+            line = line.lstrip('/')
+            self.rules.append((line, negated, dir_only, anchored))
+
+    def ignores(self, relative_path, is_dir):
+        ignored = False
+        basename = posixpath.basename(relative_path)
+        for pattern, negated, dir_only, anchored in self.rules:
+            if dir_only and not is_dir:
+                continue
+            target = relative_path if anchored else basename
+            if fnmatch(target, pattern):
+                ignored = not negated
+        return ignored
+
+
+class _Manifest():
+    """The include/exclude directives of a MANIFEST.in, applied in order
+    """
+    def __init__(self, path):
+        self.directives = []
+        try:
+            with open(path) as f:
+                lines = f.read().splitlines()
+        except IOError:
+            return
+        for line in lines:
+            words = line.split('#', 1)[0].split()
+            if len(words) < 2:
+                continue
+            action, args = words[0], words[1:]
+            if action in ('recursive-include', 'recursive-exclude'):
+                self.directives.append(
+                    (action, _manifest_dir(args[0]), args[1:]))
+            elif action in ('graft', 'prune'):
+                self.directives.append((action, _manifest_dir(args[0]), []))
+            else:
+                self.directives.append((action, None, args))
+
+    def prunes(self, relative_dir):
+        """Is a directory pruned, and not grafted again later?
+        """
+        pruned = False
+        for action, directory, _ in self.directives:
+            if action in ('prune', 'graft') and (
+                    relative_dir == directory or
+                    _is_under(relative_dir, directory)):
+                pruned = action == 'prune'
+        return pruned
+
+    def decide(self, relative_path, included):
+        """Applies the directives to a file
+        :param included: whether the file is included before the manifest
+        :return: whether the file is included after the manifest
+        """
+        basename = posixpath.basename(relative_path)
+        for action, directory, patterns in self.directives:
+            in_directory = directory is not None and \
+                _is_under(relative_path, directory)
+            if action == 'include' or action == 'exclude':
+                matches = any(fnmatch(relative_path, p) for p in patterns)
+            elif action in ('global-include', 'global-exclude'):
+                matches = any(fnmatch(basename, p) for p in patterns)
+            elif action in ('recursive-include', 'recursive-exclude'):
+                matches = in_directory and any(
+                    fnmatch(basename, p) for p in patterns)
+            elif action in ('graft', 'prune'):
+                matches = in_directory
+            else:
+                continue
+            if matches:
+                included = action in (
+                    'include', 'global-include', 'recursive-include', 'graft')
+        return included
+
+
+def _manifest_dir(directory):
+    directory = directory.strip('/')
+    return '' if directory == '.' else directory
+
+
+def _is_under(relative_path, directory):
+    return not directory or relative_path.startswith(directory + '/')
+
+
+def _scan(path):
+    """Lists a directory. Symlinks are followed like setup.py follows
+    them, dangling ones are listed with the stat of the link itself.
+    :return: list of (name, is_dir, stat) tuples
+    """
+    entries = []
+    if scandir is not None:
+        for entry in scandir(path):
+            try:
+                stat = entry.stat()
+            except OSError:
+                stat = entry.stat(follow_symlinks=False)
+            entries.append((entry.name, stat_module.S_ISDIR(stat.st_mode),
+                            stat))
+        return entries
+    for name in os.listdir(path):
+        try:
+            stat = os.stat(os.path.join(path, name))
+        except OSError:
+            stat = os.lstat(os.path.join(path, name))
+        entries.append((name, stat_module.S_ISDIR(stat.st_mode), stat))
+    return entries
+
+
+def source_files(path):
+    """Lists the files a build of the package at path can depend on.
+    Version control and build output directories are skipped, as is
+    everything .gitignore ignores unless MANIFEST.in includes it, and
+    everything MANIFEST.in excludes.
+    Symlinked directories are followed unless they link back to one of
+    their parents.
+    :param path: location of setup.py
+    :return: generator of (relative posix path, stat) tuples
+    """
+    gitignore = _GitIgnore(os.path.join(path, '.gitignore'))
+    manifest = _Manifest(os.path.join(path, 'MANIFEST.in'))
+    pending = [('', (os.path.realpath(path),))]
+    while pending:
+        relative_dir, parents = pending.pop()
+        for name, is_dir, stat in _scan(os.path.join(path, relative_dir)):
+            relative_path = posixpath.join(relative_dir, name)
+            if is_dir:
+                real_path = os.path.realpath(
+                    os.path.join(path, relative_path))
+                if not any(fnmatch(name, p) for p in IGNORED_DIRS) and \
+                        not gitignore.ignores(relative_path, True) and \
+                        not manifest.prunes(relative_path) and \
+                        real_path not in parents:
+                    pending.append((relative_path, parents + (real_path,)))
+                continue
+            if any(fnmatch(name, p) for p in IGNORED_FILES):
+                continue
+            included = not gitignore.ignores(relative_path, False)
+            if manifest.decide(relative_path, included):
+                yield relative_path, stat
+
+
+def tree_hash(path):
+    """Hashes the source tree of a package.
+    Digests of files are remembered by mtime and size, so only files
+    that changed since the last call are read again. Dangling symlinks
+    are hashed by their target.
+    :param path: location of setup.py
+    :return: hex digest
+    :raises: IOError or OSError if the tree can not be read
+    """
+    path = os.path.abspath(path)
+    known = _tree_stats.get(path) or {}
+    stats = {}
+    now = time.time()
+    digest = hashlib.sha256()
+    for relative_path, stat in sorted(source_files(path)):
+        full_path = os.path.join(path, relative_path)
+        entry = known.get(relative_path)
+        if stat_module.S_ISLNK(stat.st_mode):
+            file_digest = 'symlink:' + os.readlink(full_path)
+        elif not stat_module.S_ISREG(stat.st_mode):
+            # sockets, fifos and devices are never packaged
+            continue
+        elif entry and entry[0] == stat.st_mtime and \
+                entry[1] == stat.st_size:
+            file_digest = entry[2]
+        else:
+            file_digest = _file_sha256(full_path)
+        if stat.st_mtime < now - RACY_MTIME_WINDOW:
+            stats[relative_path] = [stat.st_mtime, stat.st_size, file_digest]
+        digest.update('{0}\0{1}\n'.format(
+            relative_path, file_digest).encode('utf-8'))
+    if stats != known:
+        _tree_stats.set(path, stats)
+    return digest.hexdigest()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_key(path, dist_types):
+    """Gets the key of a build of the package at path
+    :param dist_types: list of distribution types built
+    :return: hex digest
+    """
+    return hash_key(tree_hash(path), ' '.join(dist_types),
+                    '{0}.{1}'.format(*sys.version_info[:2]))
+
+
+class BuildCache():
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        """Built distribution files stored by build key.
+        Every build is stored in its own directory which is renamed into
+        place once complete. The least recently used builds are evicted
+        once the cache grows beyond max_size.
+        :param max_size: size cap in bytes
+        :return: None
+        """
+        self.directory = os.path.join(get_cache_dir(), 'builds')
+        self.max_size = max_size
+
+    def get(self, key):
+        """Gets the files of a build
+        :return: list of paths in the cache or None on a miss
+        """
+        build_dir = os.path.join(self.directory, key)
+        try:
+            files = sorted(os.listdir(build_dir))
+            os.utime(build_dir, None)
+        except OSError:
+            return None
+        return [os.path.join(build_dir, f) for f in files] or None
+
+    def put(self, key, paths):
+        """Stores the files of a build. Failing to store is never fatal.
+        """
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            tmp_dir = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+            for path in paths:
+                shutil.copy2(path, tmp_dir)
+            try:
+                os.rename(tmp_dir, os.path.join(self.directory, key))
+            except OSError:
+                # stored concurrently by another process
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            self._evict()
+        except (IOError, OSError) as e:
+            lgr.debug('failed to store build {0}: {1}'.format(key, e))
+
+    def _evict(self):
+        builds = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            build_dir = os.path.join(self.directory, name)
+            if name.startswith('.tmp-') or not os.path.isdir(build_dir):
+                continue
+            size = sum(os.path.getsize(os.path.join(build_dir, f))
+                       for f in os.listdir(build_dir))
+            builds.append((os.path.getmtime(build_dir), size, build_dir))
+            total_size += size
+        for _, size, build_dir in sorted(builds):
+            if total_size <= self.max_size:
+                break
+            shutil.rmtree(build_dir, ignore_errors=True)
+            total_size -= size
@@ -0,0 +1,214 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import errno
+import time
+import hashlib
+import tempfile
+import threading
+
+from . import logger
+
+lgr = logger.init()
+
+CACHE_DIR_ENV = 'DEPYPI_CACHE_DIR'
+DISABLE_CACHE_ENV = 'DEPYPI_NO_CACHE'
+DEFAULT_CACHE_DIR = '~/.cache/depypi'
+DEFAULT_MAX_SIZE = 10 * 1024 * 1024
+# negative answers change quickly right after an upload, so they are only
+# cached for a short while. published releases are immutable.
+DEFAULT_NEGATIVE_TTL = 300
+
+ENTRY_SUFFIX = '.json'
+# scanning the cache directory for eviction is done every this many writes
+EVICT_INTERVAL = 32
+
+
+def get_cache_dir():
+    """Gets the root directory of depypi's on-disk caches
+    :return: $DEPYPI_CACHE_DIR or ~/.cache/depypi
+    """
+    return os.path.expanduser(
+        os.environ.get(CACHE_DIR_ENV) or DEFAULT_CACHE_DIR)
+
+
+def cache_enabled():
+    return not os.environ.get(DISABLE_CACHE_ENV)
+
+
+def hash_key(*parts):
+    """Creates a stable cache key out of several strings
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        if not isinstance(part, bytes):
+            part = part.encode('utf-8')
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def _replace(src, dst):
+    """Atomically moves src over dst.
+    """
+    if hasattr(os, 'replace'):
+        os.replace(src, dst)
+        return
+    try:
+        os.rename(src, dst)
+    except OSError:
+        # windows will not rename over an existing file on python 2
+        os.remove(dst)
+        os.rename(src, dst)
+
+
+class FileCache():
+    def __init__(self, name, max_size=DEFAULT_MAX_SIZE):
+        """A JSON document cache on disk shared by all depypi processes.
+        Every entry is a separate file written to a temporary file and
+        renamed into place, so readers never see partial writes.
+        Reading an entry touches its mtime and the least recently used
+        entries are evicted once the cache grows beyond max_size.
+        :param name: name of the cache (its directory under the cache root)
+        :param max_size: size cap in bytes
+        :return: None
+        """
+        self.directory = os.path.join(get_cache_dir(), name)
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self._writes = 0
+        self._stats_lock = threading.Lock()
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, hash_key(key) + ENTRY_SUFFIX)
+
+    def get(self, key):
+        """Gets a value from the cache
+        :param key: key of the entry
+        :return: the cached value or None on a miss or an expired entry
+        """
+        path = self._entry_path(key)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            value = entry['value']
+            expires = entry.get('expires')
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            self._record(hit=False)
+            return None
+        if expires is not None and expires < time.time():
+            self._record(hit=False)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        self._record(hit=True, cost=entry.get('cost', 0))
+        return value
+
+    def set(self, key, value, ttl=None, cost=0):
+        """Stores a JSON serializable value in the cache.
+        Failing to write is never fatal, the value is simply not cached.
+        :param key: key of the entry
+        :param value: value to store
+        :param ttl: seconds until the entry expires. None never expires
+        :param cost: bytes a hit on this entry saves from being transferred
+        :return: None
+        """
+        entry = {
+            'value': value,
+            'expires': None if ttl is None else time.time() + ttl,
+            'cost': cost,
+        }
+        try:
+            self._makedirs()
+            fd, tmp_path = tempfile.mkstemp(
+                dir=self.directory, prefix='.tmp-', suffix=ENTRY_SUFFIX)
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(entry, f)
+                _replace(tmp_path, self._entry_path(key))
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            if self._writes % EVICT_INTERVAL == 0:
+                self._evict()
+            self._writes += 1
+        except (IOError, OSError, TypeError, ValueError) as e:
+            lgr.debug('failed to write to cache {0}: {1}'.format(
+                self.directory, e))
+
+    def _record(self, hit, cost=0):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+                self.bytes_saved += cost
+            else:
+                self.misses += 1
+
+    def stats(self):
+        """Gets the hit statistics of this process
+        :return: dict of hits, misses, hit_rate and bytes_saved
+        """
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'bytes_saved': self.bytes_saved,
+            }
+
+    def delete(self, key):
+        try:
+            os.remove(self._entry_path(key))
+        except OSError:
+            pass
+
+    def _makedirs(self):
+        try:
+            os.makedirs(self.directory)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+    def _evict(self):
+        """Removes least recently used entries until under max_size
+        """
+        entries = []
+        total_size = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(ENTRY_SUFFIX) or name.startswith('.tmp-'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        for _, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                # another process may have evicted it already
+                pass
+            total_size -= size
@@ -0,0 +1,114 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import threading
+from collections import namedtuple
+
+from . import logger
+
+lgr = logger.init()
+
+DEFAULT_CONNECT_TIMEOUT = 5
+DEFAULT_READ_TIMEOUT = 30
+DEFAULT_POOL_SIZE = 10
+
+# status codes servers answer with when they do not support HEAD
+HEAD_NOT_SUPPORTED = (405, 501)
+
+_session = None
+_session_pool_size = 0
+_session_lock = threading.Lock()
+
+
+def get_session(pool_size=DEFAULT_POOL_SIZE):
+    """Gets the process wide requests session.
+    All of depypi's HTTP traffic goes through it so connections to the
+    index are kept alive and reused.
+    :param pool_size: minimal number of connections kept per host. the
+    pool is grown if a caller needs more concurrent connections.
+    :return: requests.Session
+    """
+    global _session, _session_pool_size
+    # requests is a large part of depypi's startup time, so it is only
+    # imported once a command talks to an index
+    import requests
+    from requests.adapters import HTTPAdapter
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+        if pool_size > _session_pool_size:
+            adapter = HTTPAdapter(pool_connections=pool_size,
+                                  pool_maxsize=pool_size)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+            _session_pool_size = pool_size
+    return _session
+
+
+class CheckResult(namedtuple('CheckResult',
+                             ['url', 'method', 'status_code', 'elapsed'])):
+    @property
+    def available(self):
+        return 200 <= self.status_code < 300
+
+
+class VerificationClient():
+    def __init__(self, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT, session=None):
+        """Checks availability of URLs without downloading them.
+        :param connect_timeout: seconds to wait for a connection
+        :param read_timeout: seconds to wait for the response headers
+        :param session: requests session to use. default is the shared one
+        :return: None
+        """
+        self.session = session or get_session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.timings = []
+
+    def check(self, url, auth=None):
+        """Checks a URL with a single HEAD request.
+        Servers that do not support HEAD get a GET for the first byte only
+        which is closed without reading the body.
+        :param url: URL to check
+        :param auth: (user, password) to authenticate with, if any
+        :return: CheckResult
+        """
+        start = time.time()
+        r = self.session.head(url, timeout=self.timeout,
+                              allow_redirects=True, auth=auth)
+        if r.status_code in HEAD_NOT_SUPPORTED:
+            r = self.session.get(url, headers={'Range': 'bytes=0-0'},
+                                 timeout=self.timeout, allow_redirects=True,
+                                 stream=True, auth=auth)
+            r.close()
+        result = CheckResult(url, r.request.method, r.status_code,
+                             time.time() - start)
+        self.timings.append(result)
+        lgr.debug('{0} {1} returned {2} in {3:.3f}s'.format(*result))
+        return result
+
+    def is_available(self, url, auth=None):
+        """Checks availability of a specific file for download
+        :param url: URL to check
+        :param auth: (user, password) to authenticate with, if any
+        :return: True or False based on availability, None on network errors
+        """
+        from requests.exceptions import RequestException
+        try:
+            return self.check(url, auth).available
+        except RequestException as e:
+            lgr.error(e)
+            return None
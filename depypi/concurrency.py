@@ -0,0 +1,105 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+DEFAULT_WORKERS = 8
+
+_DONE = object()
+
+
+class _FeedError():
+    def __init__(self, error):
+        self.error = error
+
+
+def imap_unordered(func, items, workers=DEFAULT_WORKERS):
+    """Applies func to every item on a bounded pool of threads.
+    Items are consumed lazily and results are yielded as soon as they
+    complete. Both queues are bounded, so workers wait for a slow consumer
+    and at most about 5 * workers items are in flight at any time.
+    :param func: callable receiving a single item
+    :param items: iterable of items
+    :param workers: maximum number of concurrent calls
+    :return: generator of (item, result, error) tuples in completion order.
+    error is the exception func raised, or None.
+    :raises: the exception iterating items raised, once the results of the
+    items read before it have been yielded
+    """
+    workers = max(1, workers)
+    tasks = queue.Queue(maxsize=workers * 2)
+    results = queue.Queue(maxsize=workers * 2)
+
+    def feed():
+        try:
+            for item in items:
+                tasks.put(item)
+        except Exception as e:
+            results.put(_FeedError(e))
+        finally:
+            for _ in range(workers):
+                tasks.put(_DONE)
+
+    def work():
+        while True:
+            item = tasks.get()
+            if item is _DONE:
+                results.put(_DONE)
+                return
+            try:
+                results.put((item, func(item), None))
+            except (Exception, SystemExit) as e:
+                results.put((item, None, e))
+
+    for target in [feed] + [work] * workers:
+        thread = threading.Thread(target=target)
+        thread.daemon = True
+        thread.start()
+    running = workers
+    feed_error = None
+    while running:
+        result = results.get()
+        if result is _DONE:
+            running -= 1
+        elif isinstance(result, _FeedError):
+            feed_error = result.error
+        else:
+            yield result
+    if feed_error is not None:
+        raise feed_error
+
+
+def map_concurrently(func, items, workers=DEFAULT_WORKERS):
+    """Like imap_unordered, but waits for all results.
+    :return: list of results in the order of items
+    :raises: the first exception raised by func
+    """
+    items = list(items)
+    indexed = dict(
+        (index, (result, error)) for (index, _), result, error
+        in imap_unordered(lambda pair: func(pair[1]),
+                          enumerate(items), workers))
+    results = []
+    for index in range(len(items)):
+        result, error = indexed[index]
+        if error is not None:
+            raise error
+        results.append(result)
+    return results
@@ -0,0 +1,94 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import re
+from collections import namedtuple
+
+try:
+    import ConfigParser as configparser
+except ImportError:
+    import configparser
+
+PYPIRC_FILE = '~/.pypirc'
+
+Credentials = namedtuple('Credentials',
+                         ['username', 'password', 'repository_url'])
+
+
+class CredentialsError(Exception):
+    pass
+
+
+def _env_suffix(name):
+    return re.sub(r'[^A-Z0-9]', '_', name.upper())
+
+
+class CredentialProvider():
+    def __init__(self, credentials=None, pypirc_file=PYPIRC_FILE):
+        """Resolves index credentials in memory.
+        ~/.pypirc is only ever read, so any number of depypi processes
+        with different accounts can run side by side.
+        Credentials are taken from, in order: the credentials argument, the
+        ~/.pypirc section of the target, the PYPIUSER_<TARGET> and
+        PYPIPWD_<TARGET> environment variables and PYPIUSER and PYPIPWD.
+        :param credentials: (user, password) to use for every target
+        :param pypirc_file: path to the pypirc file to read
+        :return: None
+        """
+        self.credentials = credentials
+        self.pypirc_file = os.path.expanduser(pypirc_file)
+        self._config = None
+
+    @property
+    def config(self):
+        if self._config is None:
+            self._config = configparser.RawConfigParser()
+            self._config.read(self.pypirc_file)
+        return self._config
+
+    def _option(self, target, key):
+        if self.config.has_option(target, key):
+            return self.config.get(target, key)
+        return None
+
+    def repository_url(self, target):
+        """Gets the repository URL ~/.pypirc defines for target, if any
+        """
+        return self._option(target, 'repository')
+
+    def get(self, target):
+        """Gets the credentials of target
+        :param target: name of the index, e.g. pypi or a ~/.pypirc section
+        :return: Credentials
+        :raises: CredentialsError if no credentials could be found
+        """
+        if self.credentials:
+            username, password = self.credentials
+        else:
+            suffix = _env_suffix(target)
+            username = self._option(target, 'username') or \
+                os.getenv('PYPIUSER_' + suffix) or os.getenv('PYPIUSER')
+            password = self._option(target, 'password') or \
+                os.getenv('PYPIPWD_' + suffix) or os.getenv('PYPIPWD')
+        if not username or not password:
+            raise CredentialsError(
+                "Unable to find credentials for {0}. Please include one of "
+                "the following:\n{1} file with a [{0}] section (see "
+                "http://peterdowns.com/posts/first-time-with-pypi.html)\n"
+                "set environment variables PYPIUSER and PYPIPWD\ncall with "
+                "credentials flag. depypi upload --help for details".format(
+                    target, self.pypirc_file))
+        return Credentials(username, password, self.repository_url(target))
@@ -0,0 +1,231 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+
+from . import logger
+from .client import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .concurrency import imap_unordered, DEFAULT_WORKERS
+from .index import IndexClient, normalize_name, DEFAULT_INDEX_URL
+from .markers import evaluate_marker, MarkerError
+from .requirements import parse_requirement, RequirementsError
+
+lgr = logger.init()
+
+GRAPH_FORMATS = ('json', 'dot')
+
+
+def node_key(name, version):
+    return '{0}=={1}'.format(normalize_name(name), version)
+
+
+class DependencyGraph():
+    def __init__(self):
+        """Resolved releases and the requirements linking them.
+        Every node is keyed name==version and lists the requirements it
+        declares along with the node each one resolved to.
+        """
+        self.roots = []
+        self.nodes = {}
+        self.unresolved = {}
+
+    def to_dict(self):
+        return {
+            'roots': self.roots,
+            'nodes': self.nodes,
+            'unresolved': self.unresolved,
+        }
+
+    def to_json(self, indent=None):
+        return json.dumps(self.to_dict(), indent=indent, sort_keys=True)
+
+    def to_dot(self):
+        lines = ['digraph dependencies {']
+        roots = set(r['node'] for r in self.roots)
+        for key in sorted(self.nodes):
+            node = self.nodes[key]
+            lines.append('    "{0}" [label="{1}\\n{2}"{3}];'.format(
+                key, node['name'], node['version'],
+                ', shape=box' if key in roots else ''))
+        for key in sorted(self.nodes):
+            for edge in self.nodes[key]['requires']:
+                lines.append('    "{0}" -> "{1}" [label="{2}"];'.format(
+                    key, edge['node'],
+                    edge['requirement'].replace('"', '\\"')))
+        lines.append('}')
+        return '\n'.join(lines)
+
+    def format(self, graph_format):
+        if graph_format == 'dot':
+            return self.to_dot()
+        return self.to_json(indent=4)
+
+
+def _applies(requirement, extras):
+    """Does a requirement apply when installing with any of extras?
+    '' stands for installing without extras.
+    """
+    if requirement.marker is None:
+        return '' in extras
+    try:
+        return any(evaluate_marker(requirement.marker, extra=extra)
+                   for extra in extras)
+    except MarkerError as e:
+        lgr.debug('ignoring requirement of {0}: {1}'.format(
+            requirement.name, e))
+        return False
+
+
+class GraphBuilder():
+    def __init__(self, index_url=DEFAULT_INDEX_URL, workers=DEFAULT_WORKERS,
+                 max_depth=None, session=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)):
+        """Builds transitive dependency graphs from an index.
+        The graph is walked breadth first. The projects and releases of each
+        level are fetched concurrently, and every project and release is
+        fetched once, however many requirements lead to it.
+        :param index_url: base URL of the index's JSON API
+        :param workers: maximum number of concurrent requests
+        :param max_depth: levels of dependencies to follow. None follows
+        all of them
+        :param session: requests session. default is the shared one
+        :param timeout: (connect, read) timeout in seconds
+        :return: None
+        """
+        self.client = IndexClient(index_url, workers, session, timeout)
+        self.workers = workers
+        self.max_depth = max_depth
+        self._versions = {}
+        self._resolved = {}
+        self._parsed = {}
+
+    def _parse(self, text):
+        """Parses a requirement. Most requirements recur across a graph, so
+        each distinct one is only parsed once
+        """
+        if text not in self._parsed:
+            self._parsed[text] = parse_requirement(text)
+        return self._parsed[text]
+
+    def _resolve(self, text, requirement):
+        """Gets the latest released version satisfying a requirement.
+        Pre-releases are only picked when nothing else matches.
+        """
+        if text not in self._resolved:
+            self._resolved[text] = requirement.specifier.best_match(
+                self._versions[normalize_name(requirement.name)])
+        return self._resolved[text]
+
+    def build(self, requirements):
+        """Builds the graph of a list of requirements
+        :param requirements: requirement strings, e.g. requests>=2.7
+        :return: DependencyGraph
+        """
+        graph = DependencyGraph()
+        frontier = []
+        for text in requirements:
+            try:
+                requirement = self._parse(text)
+            except RequirementsError as e:
+                graph.unresolved[text] = str(e)
+                continue
+            if _applies(requirement, ('',)):
+                frontier.append((None, text, requirement))
+        # extras of every node whose requirements were followed already
+        expanded = {}
+        depth = 0
+        while frontier:
+            self._fetch_projects(graph, frontier)
+            links, pending = self._resolve_level(graph, frontier)
+            self._fetch_releases(graph, pending)
+            depth += 1
+            if self.max_depth is not None and depth > self.max_depth:
+                break
+            frontier = []
+            for key, extras in links:
+                if key not in graph.nodes:
+                    continue
+                done = expanded.setdefault(key, set())
+                new = set(('',) + extras) - done
+                if not new:
+                    continue
+                for text in graph.nodes[key]['requires_dist']:
+                    try:
+                        requirement = self._parse(text)
+                    except RequirementsError as e:
+                        graph.unresolved[text] = str(e)
+                        continue
+                    if _applies(requirement, new) and \
+                            not _applies(requirement, done):
+                        frontier.append((key, text, requirement))
+                done.update(new)
+        lgr.debug('resolved {0} releases in {1} levels'.format(
+            len(graph.nodes), depth))
+        return graph
+
+    def _fetch_projects(self, graph, frontier):
+        names = set(normalize_name(r.name) for _, _, r in frontier
+                    if not r.url) - set(self._versions)
+        for name, versions, error in imap_unordered(
+                self.client.versions, names, self.workers):
+            if error is not None:
+                graph.unresolved[name] = str(error)
+            else:
+                self._versions[name] = versions
+
+    def _resolve_level(self, graph, frontier):
+        """Resolves the requirements of a level to releases
+        :return: list of (node key, extras) linked to and dict of node keys
+        not fetched yet to (name, version)
+        """
+        links = []
+        pending = {}
+        for parent, text, requirement in frontier:
+            if requirement.url:
+                graph.unresolved[text] = 'direct URL requirements are not ' \
+                                         'resolved'
+                continue
+            if normalize_name(requirement.name) not in self._versions:
+                continue
+            version = self._resolve(text, requirement)
+            if version is None:
+                graph.unresolved[text] = 'no matching release'
+                continue
+            key = node_key(requirement.name, version)
+            edge = {'requirement': text, 'node': key}
+            if parent is None:
+                graph.roots.append(edge)
+            else:
+                graph.nodes[parent]['requires'].append(edge)
+            if key not in graph.nodes:
+                pending[key] = (requirement.name, version)
+            links.append((key, tuple(requirement.extras)))
+        return links, pending
+
+    def _fetch_releases(self, graph, pending):
+        def fetch(item):
+            return self.client.release(*item[1])
+
+        for (key, (name, version)), release, error in imap_unordered(
+                fetch, pending.items(), self.workers):
+            if error is not None or release is None:
+                graph.unresolved[key] = str(error or 'release not found')
+                continue
+            graph.nodes[key] = {
+                'name': release['name'] or name,
+                'version': version,
+                'requires_dist': release['requires_dist'] or [],
+                'requires': [],
+            }
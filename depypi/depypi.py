@@ -15,24 +15,64 @@
 
 
 import sys
+import json
+from glob import glob
+from functools import wraps
 
 import click
 
-from .pypi_handler import PypiHandler
-from .version_checker import VersionChecker
+# only what the options need is imported here. each command imports the
+# modules it runs on, so a command never pays for the others' imports
+from .cache import DEFAULT_NEGATIVE_TTL
+from .poller import DEFAULT_DEADLINE
+from .concurrency import DEFAULT_WORKERS
+from .depgraph import GRAPH_FORMATS
+from .index import DEFAULT_INDEX_URL
+from .outdated import REPORT_FORMATS, DEFAULT_LATEST_TTL
+from .timing import recording, RUN_REPORT_FORMATS
 from . import logger
 
 lgr = logger.init()
 
 
+def run_report(func):
+    """Adds --report and --report-format to a command. With --report, the
+    timing spans of the phases of the run are written to a file when it
+    ends, so slow runs can be attributed to setup.py, the network or the
+    index.
+    """
+    @wraps(func)
+    def command(report, report_format, **kwargs):
+        with recording(report, report_format, func.__name__.lower(),
+                       kwargs):
+            return func(**kwargs)
+
+    command = click.option(
+        '--report-format', default='json',
+        type=click.Choice(RUN_REPORT_FORMATS),
+        help='format of the run report. chrome is the trace event format '
+             'of chrome://tracing and Perfetto. default is json')(command)
+    return click.option(
+        '--report', required=False, type=click.Path(dir_okay=False),
+        help='write the timing of every phase of the run to this '
+             'file')(command)
+
+
 @click.group()
 def main():
     pass
 
 
 @click.command()
-@click.option('-d', '--dist-type', default=False, required=False,
-              help='distribution type. default is sdist')
+@click.option('-d', '--dist-type', multiple=True, required=False,
+              help='distribution type. may be repeated to build several, '
+                   'e.g. -d sdist -d bdist_wheel. default is sdist')
+@click.option('--files', multiple=True, required=False,
+              help='upload already built files matching this glob (e.g. '
+                   '"dist/*") instead of building. may be repeated')
+@click.option('-w', '--workers', default=DEFAULT_WORKERS, type=int,
+              help='maximum number of files uploaded at once. default is '
+                   '{0}'.format(DEFAULT_WORKERS))
 @click.option('-f', '--force', is_flag=True, default=False, required=False,
               help='upload to Pypi')
 @click.option('-t', '--test', is_flag=True, default=False, required=False,
@@ -42,18 +82,52 @@ def main():
 @click.option('-c', '--credentials', nargs=2, required=False, type=str,
               help='use specific credentials for upload '
                    '(not what is in .pypirc). usage: crt -c user password')
-def upload(path, credentials, test, force, dist_type):
+@click.option('--verify-timeout', default=DEFAULT_DEADLINE, type=float,
+              help='seconds to keep checking that the upload is available. '
+                   'default is {0}'.format(DEFAULT_DEADLINE))
+@click.option('-r', '--repository', multiple=True, required=False,
+              help='also upload to a repository defined in .pypirc, or to '
+                   'NAME=URL. may be repeated. the package is built once '
+                   'and uploaded to all targets concurrently')
+@run_report
+def upload(path, credentials, test, force, dist_type, verify_timeout,
+           repository, files, workers):
     """upload package to pypi
     """
+    from .pypi_handler import PypiHandler
+    from .release import release, resolve_targets, ReleaseError
+    distributions = sorted(set(
+        distribution for pattern in files for distribution in glob(pattern)))
+    if files and not distributions:
+        lgr.error("No files match {0}".format(', '.join(files)))
+        sys.exit(1)
+    if repository or (force and test):
+        targets = (['pypi'] if force else []) + \
+            (['pypitest'] if test else []) + list(repository)
+        try:
+            targets = resolve_targets(targets, credentials)
+        except ReleaseError as e:
+            lgr.error(e)
+            sys.exit(1)
+        results = release(path, targets, dist_type, distributions,
+                          verify_timeout=verify_timeout,
+                          upload_workers=workers)
+        if any(result not in (True, False) for result in results.values()):
+            sys.exit(1)
+        return
     if force:
-        pypi_handler = PypiHandler(path, credentials, dist_type, target="pypi")
+        pypi_handler = PypiHandler(path, credentials, dist_type, target="pypi",
+                                   verify_timeout=verify_timeout,
+                                   upload_workers=workers)
     elif test:
-        pypi_handler = PypiHandler(path, credentials, dist_type)
+        pypi_handler = PypiHandler(path, credentials, dist_type,
+                                   verify_timeout=verify_timeout,
+                                   upload_workers=workers)
     else:
         lgr.error("Target not specified. Please use --force for pypi or "
                   "--test for pypitest")
         sys.exit(1)
-    pypi_handler.upload()
+    pypi_handler.upload(distributions)
 
 
 @click.command()
@@ -68,13 +142,20 @@ def upload(path, credentials, test, force, dist_type):
 @click.option('-c', '--credentials', nargs=2, required=False, type=str,
               help='use specific credentials for registration '
                    '(not what is in .pypirc). usage: crt -c user password')
-def register(path, credentials, test, force, dist_type):
+@click.option('--verify-timeout', default=DEFAULT_DEADLINE, type=float,
+              help='seconds to keep checking that the registration is '
+                   'visible. default is {0}'.format(DEFAULT_DEADLINE))
+@run_report
+def register(path, credentials, test, force, dist_type, verify_timeout):
     """register package to pypi
     """
+    from .pypi_handler import PypiHandler
     if force:
-        pypi_handler = PypiHandler(path, credentials, target="pypi")
+        pypi_handler = PypiHandler(path, credentials, target="pypi",
+                                   verify_timeout=verify_timeout)
     elif test:
-        pypi_handler = PypiHandler(path, credentials)
+        pypi_handler = PypiHandler(path, credentials,
+                                   verify_timeout=verify_timeout)
     else:
         lgr.error("Target not specified. Please use --force for pypi or "
                   "--test for pypitest")
@@ -87,13 +168,45 @@ def register(path, credentials, test, force, dist_type):
               help='check Pypitest. default is to check Pypi')
 @click.option('-p', '--path', required=False, type=str,
               help='location of setup.py')
-def isOnPypi(path, test):
+@click.option('-b', '--batch', required=False, type=click.File('r'),
+              help='check name==version pairs listed in a file (- for '
+                   'stdin) instead of the package in path. results are '
+                   'printed as JSON lines')
+@click.option('-r', '--registered', is_flag=True, default=False,
+              help='in batch mode, check registration instead of '
+                   'availability')
+@click.option('-w', '--workers', default=DEFAULT_WORKERS, type=int,
+              help='maximum concurrent checks in batch mode. default is '
+                   '{0}'.format(DEFAULT_WORKERS))
+@click.option('--negative-ttl', default=DEFAULT_NEGATIVE_TTL, type=int,
+              help='seconds to cache a negative result. default is '
+                   '{0}'.format(DEFAULT_NEGATIVE_TTL))
+@run_report
+def isOnPypi(path, test, batch, registered, workers, negative_ttl):
     """Check if package exists on pypi
     """
+    from .pypi_handler import PypiHandler, availability_cache
+    from .batch import read_pairs, check_pairs
     if test:
-        pypi_handler = PypiHandler(path, target="testpypi")
+        pypi_handler = PypiHandler(path, target="testpypi",
+                                   negative_ttl=negative_ttl)
     else:
-        pypi_handler = PypiHandler(path, target="pypi")
+        pypi_handler = PypiHandler(path, target="pypi",
+                                   negative_ttl=negative_ttl)
+    if batch:
+        try:
+            for result in check_pairs(pypi_handler, read_pairs(batch),
+                                      registered, workers):
+                click.echo(json.dumps(result))
+                sys.stdout.flush()
+        except (IOError, ValueError) as e:
+            lgr.error("Unable to read {0}: {1}".format(batch.name, e))
+            sys.exit(1)
+        stats = availability_cache.stats()
+        click.echo('cache: {hits} hits, {misses} misses ({0:.0%} hit rate), '
+                   '{bytes_saved} bytes saved'.format(stats['hit_rate'],
+                                                      **stats), err=True)
+        return
     if pypi_handler.is_package_of_specific_version_available_on_pypi(
             package_name=pypi_handler.name,
             expected_version=pypi_handler.version):
@@ -105,32 +218,95 @@ def isOnPypi(path, test):
 
 
 @click.command()
-@click.option('-ef', '--extrafiles', required=False, type=str,
-              help='add extra files to check like dev-requirements.txt')
+@click.option('-ef', '--extrafiles', required=False, type=str, multiple=True,
+              help='add extra files to check like dev-requirements.txt. '
+                   'can be given several times')
 @click.option('-p', '--path', required=False, type=str,
               help='location of setup.py')
+@run_report
 def getdeps(path, extrafiles):
     """Checks if the package has unlocked dependencies
     """
+    from .version_checker import VersionChecker
+    from .requirements import is_locked
     version_checker = VersionChecker(path, extrafiles)
+    dependencies = version_checker.get_all_dependencies()
     lgr.info("The package in has the following dependencies: {0}".format(
-            version_checker.get_all_dependencies()))
-
-
-# @click.command()
-# @click.option('-ef', '--extrafiles', required=False, type=str,
-#               help='add extra files to check like dev-requirements.txt')
-# @click.option('-p', '--path', required=False, type=str,
-#               help='location of setup.py')
-# def getSubDeps(path, extrafiles):
-#     """Checks gets all subdependencies (recursively)
-#     """
-#     version_checker = VersionChecker(path, extrafiles)
-#     lgr.info("The package in has the following dependencies: {0}".format(
-#             version_checker.get_all_sub_dependencies()))
-#
-#
-# main.add_command(getSubDeps)
+            dependencies))
+    unlocked = [d for d in dependencies if not is_locked(d)]
+    if unlocked:
+        lgr.info("The following dependencies are not locked to a single "
+                 "version: {0}".format(unlocked))
+
+
+@click.command()
+@click.option('-ef', '--extrafiles', required=False, type=str, multiple=True,
+              help='add extra files to check like dev-requirements.txt. '
+                   'can be given several times')
+@click.option('-p', '--path', required=False, type=str,
+              help='location of setup.py')
+@click.option('-f', '--format', 'graph_format', default='json',
+              type=click.Choice(GRAPH_FORMATS),
+              help='output format of the graph. default is json')
+@click.option('-d', '--depth', default=None, type=int,
+              help='levels of dependencies to follow. default is all')
+@click.option('-i', '--index-url', default=DEFAULT_INDEX_URL,
+              help='JSON API of the index to resolve against. default is '
+                   '{0}'.format(DEFAULT_INDEX_URL))
+@click.option('-w', '--workers', default=DEFAULT_WORKERS, type=int,
+              help='maximum concurrent requests to the index. default is '
+                   '{0}'.format(DEFAULT_WORKERS))
+def getSubDeps(path, extrafiles, graph_format, depth, index_url, workers):
+    """Prints the graph of all dependencies (recursively)
+    """
+    from .version_checker import VersionChecker
+    version_checker = VersionChecker(path, extrafiles)
+    graph = version_checker.get_all_sub_dependencies(
+        index_url=index_url, workers=workers, max_depth=depth)
+    click.echo(graph.format(graph_format))
+    for requirement, reason in sorted(graph.unresolved.items()):
+        lgr.warn("unable to resolve {0}: {1}".format(requirement, reason))
+
+
+@click.command()
+@click.option('-p', '--path', multiple=True, required=False, type=str,
+              help='location of setup.py. can be given several times to '
+                   'report on many packages at once')
+@click.option('-ef', '--extrafiles', required=False, type=str, multiple=True,
+              help='add extra files to check like dev-requirements.txt. '
+                   'can be given several times')
+@click.option('-f', '--format', 'report_format', default='table',
+              type=click.Choice(REPORT_FORMATS),
+              help='output format of the report. default is table')
+@click.option('-i', '--index-url', default=DEFAULT_INDEX_URL,
+              help='JSON API of the index to compare with. default is '
+                   '{0}'.format(DEFAULT_INDEX_URL))
+@click.option('-w', '--workers', default=DEFAULT_WORKERS, type=int,
+              help='maximum concurrent requests to the index. default is '
+                   '{0}'.format(DEFAULT_WORKERS))
+@click.option('--ttl', default=DEFAULT_LATEST_TTL, type=int,
+              help='seconds to cache latest versions. default is '
+                   '{0}'.format(DEFAULT_LATEST_TTL))
+def outdated(path, extrafiles, report_format, index_url, workers, ttl):
+    """Reports dependencies which are behind their latest release
+    """
+    from .version_checker import VersionChecker
+    from .outdated import build_report, OUTDATED
+    dependencies = {}
+    for package_path in path or ('',):
+        version_checker = VersionChecker(package_path, extrafiles)
+        dependencies[package_path or '.'] = \
+            version_checker.get_all_dependencies()
+    report = build_report(dependencies, index_url=index_url,
+                          workers=workers, ttl=ttl)
+    click.echo(report.format(report_format))
+    if report.counts()[OUTDATED]:
+        lgr.info("{0} dependencies are outdated".format(
+            report.counts()[OUTDATED]))
+
+
+main.add_command(getSubDeps)
+main.add_command(outdated)
 main.add_command(getdeps)
 main.add_command(isOnPypi)
 main.add_command(upload)
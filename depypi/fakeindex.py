@@ -0,0 +1,526 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import re
+import json
+import time
+import base64
+import random
+import hashlib
+import threading
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlparse, unquote
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlparse
+    from urllib import unquote
+
+import click
+
+from . import logger
+from .index import normalize_name, SIMPLE_JSON_TYPE
+from .uploader import (is_distribution_of, MULTIPLE_HEADER_FIELDS,
+                       SETUP_FIELDS)
+from .versions import latest
+
+lgr = logger.init()
+
+DEFAULT_HOST = '127.0.0.1'
+# status of injected errors. a transient one, as a real index gives them
+DEFAULT_ERROR_STATUS = 503
+
+# form fields which may be repeated, e.g. requires_dist
+LIST_FIELDS = set(MULTIPLE_HEADER_FIELDS.values()) | \
+    set(['classifiers', 'platform'])
+# form fields which are not metadata
+UPLOAD_FIELDS = set([':action', 'protocol_version', 'filetype', 'pyversion',
+                     'md5_digest', 'sha256_digest', 'content'])
+
+_BOUNDARY = re.compile(r'boundary="?([^";]+)"?')
+_DISPOSITION = re.compile(
+    br'name="([^"]*)"(?:;\s*filename="([^"]*)")?', re.IGNORECASE)
+
+
+class FakeIndexError(Exception):
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+def parse_form(content_type, body):
+    """Parses a multipart/form-data body as the upload API receives it
+    :return: tuple of a list of (name, value) text fields and a dict of
+    name to (filename, content) file fields
+    :raises: FakeIndexError if the body is not multipart/form-data
+    """
+    match = _BOUNDARY.search(content_type or '')
+    if not match or not content_type.startswith('multipart/form-data'):
+        raise FakeIndexError(400, 'expected multipart/form-data')
+    delimiter = b'--' + match.group(1).encode('ascii')
+    fields = []
+    files = {}
+    for part in body.split(delimiter)[1:]:
+        if part.startswith(b'--'):
+            break
+        headers, _, value = part.lstrip(b'\r\n').partition(b'\r\n\r\n')
+        if value.endswith(b'\r\n'):
+            value = value[:-2]
+        disposition = _DISPOSITION.search(headers)
+        if not disposition:
+            raise FakeIndexError(400, 'form part without a name')
+        name = disposition.group(1).decode('utf-8')
+        if disposition.group(2) is not None:
+            files[name] = (disposition.group(2).decode('utf-8'), value)
+        else:
+            fields.append((name, value.decode('utf-8')))
+    return fields, files
+
+
+class _Release():
+    def __init__(self, version, visible_at):
+        self.version = version
+        self.visible_at = visible_at
+        self.info = {}
+        self.files = []
+
+
+class _File():
+    def __init__(self, filename, content, packagetype, python_version,
+                 visible_at):
+        self.filename = filename
+        self.content = content
+        self.packagetype = packagetype
+        self.python_version = python_version
+        self.visible_at = visible_at
+        self.md5 = hashlib.md5(content).hexdigest()
+        self.sha256 = hashlib.sha256(content).hexdigest()
+        self.upload_time = time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime())
+
+
+class FakeIndex():
+    def __init__(self, host=DEFAULT_HOST, port=0, latency=0, error_rate=0,
+                 error_status=DEFAULT_ERROR_STATUS, propagation_delay=0,
+                 credentials=None, seed=None, private=False):
+        """An in-memory package index served over HTTP from a background
+        thread, for testing and measuring depypi without a real index.
+        It serves the upload API (file_upload and submit), the project and
+        release JSON API, the simple API (PEP 691 JSON and PEP 503 HTML)
+        and file downloads, with ETag revalidation.
+        :param host: address to listen on
+        :param port: port to listen on. 0 picks a free one
+        :param latency: seconds every request is delayed by
+        :param error_rate: fraction of requests (0 to 1) answered with
+        error_status instead
+        :param error_status: HTTP status of injected errors
+        :param propagation_delay: seconds before uploaded files and
+        registered releases show up on the read APIs
+        :param credentials: (user, password) the upload API requires.
+        default is to accept any
+        :param seed: seed of the random error injection
+        :param private: require credentials for reads as well, like a
+        private index
+        :return: None
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.propagation_delay = propagation_delay
+        self.credentials = credentials
+        self.private = private
+        self.counts = {}
+        self._random = random.Random(seed)
+        self._projects = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return 'http://{0}:{1}'.format(self.host, self.port)
+
+    @property
+    def url(self):
+        """URL of the JSON and upload APIs, for PypiHandler's repository_url
+        """
+        return self.base_url + '/pypi'
+
+    def start(self):
+        """Starts serving in a daemon thread
+        :return: the FakeIndex
+        """
+        self._server = _Server((self.host, self.port), _Handler)
+        self._server.index = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        lgr.debug('fake index serving on {0}'.format(self.base_url))
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def add_release(self, name, version, files=None, visible_after=0,
+                    **info):
+        """Adds a release directly, bypassing the upload API
+        :param files: dict of filename to content
+        :param visible_after: seconds before the release is visible
+        :param info: metadata, e.g. requires_dist=['six>=1.9']
+        :return: None
+        """
+        visible_at = time.time() + visible_after
+        with self._lock:
+            release = self._release(name, version, visible_at)
+            release.info.update(info)
+            for filename, content in (files or {}).items():
+                release.files.append(_File(
+                    filename, content,
+                    'bdist_wheel' if filename.endswith('.whl') else 'sdist',
+                    'py2.py3' if filename.endswith('.whl') else 'source',
+                    visible_at))
+
+    def reset_counts(self):
+        with self._lock:
+            self.counts = {}
+
+    def _count(self, kind):
+        with self._lock:
+            self.counts[kind] = self.counts.get(kind, 0) + 1
+
+    def _release(self, name, version, visible_at):
+        """Gets or creates a release. The lock must be held.
+        """
+        project = self._projects.setdefault(
+            normalize_name(name), {'name': name, 'releases': {}})
+        if version not in project['releases']:
+            project['releases'][version] = _Release(version, visible_at)
+        release = project['releases'][version]
+        release.info.setdefault('name', project['name'])
+        release.info['version'] = version
+        return release
+
+    def _inject(self):
+        """Delays a request and decides whether it fails
+        :return: True if the request should get an error
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if not self.error_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def _authorize(self, header):
+        if self.credentials is None:
+            return
+        if not header or not header.startswith('Basic '):
+            raise FakeIndexError(401, 'authentication required')
+        decoded = base64.b64decode(header[len('Basic '):]).decode('utf-8')
+        if tuple(decoded.split(':', 1)) != tuple(self.credentials):
+            raise FakeIndexError(403, 'invalid credentials')
+
+    def post(self, content_type, body, authorization=None):
+        """Handles an upload API request
+        :raises: FakeIndexError
+        """
+        self._authorize(authorization)
+        fields, files = parse_form(content_type, body)
+        values = dict(fields)
+        action = values.get(':action')
+        name = values.get('name')
+        version = values.get('version')
+        if not name or not version:
+            raise FakeIndexError(400, 'name and version are required')
+        info = {}
+        for field, value in fields:
+            if field in UPLOAD_FIELDS:
+                continue
+            if field in LIST_FIELDS:
+                info.setdefault(field, []).append(value)
+            else:
+                info[field] = value
+        visible_at = time.time() + self.propagation_delay
+        if action == 'submit':
+            self._count('register')
+            with self._lock:
+                self._release(name, version, visible_at).info.update(info)
+            return
+        if action != 'file_upload':
+            raise FakeIndexError(400, 'unknown action {0!r}'.format(action))
+        self._count('upload')
+        if 'content' not in files:
+            raise FakeIndexError(400, 'no file uploaded')
+        filename, content = files['content']
+        if not is_distribution_of(filename, name, version):
+            raise FakeIndexError(
+                400, '{0} is not a distribution of {1} {2}'.format(
+                    filename, name, version))
+        new = _File(filename, content, values.get('filetype', 'sdist'),
+                    values.get('pyversion', 'source'), visible_at)
+        for digest, expected in (('md5', values.get('md5_digest')),
+                                 ('sha256', values.get('sha256_digest'))):
+            if expected and expected != getattr(new, digest):
+                raise FakeIndexError(400, '{0} digest of {1} does not '
+                                          'match'.format(digest, filename))
+        with self._lock:
+            for project in self._projects.values():
+                for release in project['releases'].values():
+                    if any(f.filename == filename for f in release.files):
+                        raise FakeIndexError(400, 'File already exists')
+            release = self._release(name, version, visible_at)
+            release.info.update(info)
+            release.files.append(new)
+
+    def _visible(self, name):
+        """Gets the visible releases of a project
+        :return: tuple of the project name and a dict of version to
+        (info, files), or None if nothing of the project is visible
+        """
+        now = time.time()
+        with self._lock:
+            project = self._projects.get(normalize_name(name))
+            if project is None:
+                return None
+            releases = dict(
+                (version, (dict(release.info),
+                           [f for f in release.files if f.visible_at <= now]))
+                for version, release in project['releases'].items()
+                if release.visible_at <= now)
+        if not releases:
+            return None
+        return project['name'], releases
+
+    def _file_dict(self, f):
+        return {
+            'filename': f.filename,
+            'size': len(f.content),
+            'digests': {'md5': f.md5, 'sha256': f.sha256},
+            'md5_digest': f.md5,
+            'url': '{0}/packages/{1}/{2}'.format(
+                self.base_url, f.sha256[:8], f.filename),
+            'packagetype': f.packagetype,
+            'python_version': f.python_version,
+            'upload_time': f.upload_time,
+            'yanked': False,
+        }
+
+    def _info(self, info):
+        info = dict(info)
+        for field in SETUP_FIELDS.values():
+            info.setdefault(field, None)
+        info.setdefault('requires_dist', None)
+        return info
+
+    def project_json(self, name):
+        self._count('project')
+        visible = self._visible(name)
+        if visible is None:
+            return None
+        name, releases = visible
+        version = latest(releases)
+        return {
+            'info': self._info(releases[version][0]),
+            'releases': dict(
+                (v, [self._file_dict(f) for f in files])
+                for v, (_, files) in releases.items()),
+            'urls': [self._file_dict(f) for f in releases[version][1]],
+        }
+
+    def release_json(self, name, version):
+        self._count('release')
+        visible = self._visible(name)
+        if visible is None or version not in visible[1]:
+            return None
+        info, files = visible[1][version]
+        return {'info': self._info(info),
+                'urls': [self._file_dict(f) for f in files]}
+
+    def simple(self, name, as_json):
+        """Gets the simple API page of a project
+        :return: tuple of the content type and body, or None
+        """
+        self._count('simple')
+        visible = self._visible(name)
+        if visible is None:
+            return None
+        files = [self._file_dict(f) for _, release_files
+                 in visible[1].values() for f in release_files]
+        files.sort(key=lambda f: f['filename'])
+        if as_json:
+            return SIMPLE_JSON_TYPE, json.dumps({
+                'meta': {'api-version': '1.0'},
+                'name': normalize_name(visible[0]),
+                'files': [{'filename': f['filename'], 'url': f['url'],
+                           'hashes': {'sha256': f['digests']['sha256']},
+                           'yanked': False} for f in files],
+            })
+        links = ''.join('<a href="{0}#sha256={1}">{2}</a><br/>\n'.format(
+            f['url'], f['digests']['sha256'], f['filename']) for f in files)
+        return 'text/html', '<!DOCTYPE html>\n<html><body>\n{0}' \
+                            '</body></html>\n'.format(links)
+
+    def download(self, filename):
+        self._count('download')
+        now = time.time()
+        with self._lock:
+            for project in self._projects.values():
+                for release in project['releases'].values():
+                    for f in release.files:
+                        if f.filename == filename and f.visible_at <= now:
+                            return f.content
+        return None
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    # clients open a connection per worker at once
+    request_queue_size = 128
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        lgr.debug('fake index: ' + format % args)
+
+    def _send(self, status, body=b'', content_type='text/plain',
+              headers=None):
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in (headers or {}).items():
+            self.send_header(header, value)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_cacheable(self, content_type, body):
+        if not isinstance(body, bytes):
+            body = body.encode('utf-8')
+        etag = '"{0}"'.format(hashlib.md5(body).hexdigest())
+        if self.headers.get('If-None-Match') == etag:
+            self.server.index._count('not modified')
+            self._send(304, headers={'ETag': etag})
+        else:
+            self._send(200, body, content_type, {'ETag': etag})
+
+    def _send_error(self, error):
+        headers = {'WWW-Authenticate': 'Basic realm="fake index"'} \
+            if error.status == 401 else None
+        self._send(error.status, str(error), headers=headers)
+
+    def do_GET(self):
+        index = self.server.index
+        if index._inject():
+            index._count('error')
+            return self._send(index.error_status, 'injected error')
+        if index.private:
+            try:
+                index._authorize(self.headers.get('Authorization'))
+            except FakeIndexError as e:
+                return self._send_error(e)
+        parts = [unquote(p) for p in
+                 urlparse(self.path).path.strip('/').split('/')]
+        if parts[0] == 'pypi' and len(parts) in (3, 4) and \
+                parts[-1] == 'json':
+            if len(parts) == 3:
+                document = index.project_json(parts[1])
+            else:
+                document = index.release_json(parts[1], parts[2])
+            if document is None:
+                return self._send(404, 'Not Found')
+            return self._send_cacheable('application/json',
+                                        json.dumps(document))
+        if parts[0] == 'pypi' and len(parts) == 3:
+            # the page of a release, as probed for registrations
+            document = index.release_json(parts[1], parts[2])
+            if document is None:
+                return self._send(404, 'Not Found')
+            return self._send(200, '{0} {1}'.format(parts[1], parts[2]))
+        if parts[0] == 'simple' and len(parts) == 2:
+            page = index.simple(parts[1], SIMPLE_JSON_TYPE in
+                                self.headers.get('Accept', ''))
+            if page is None:
+                return self._send(404, 'Not Found')
+            return self._send_cacheable(*page)
+        if parts[0] == 'packages' and len(parts) > 1:
+            content = index.download(parts[-1])
+            if content is None:
+                return self._send(404, 'Not Found')
+            return self._send(200, content, 'application/octet-stream')
+        self._send(404, 'Not Found')
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        index = self.server.index
+        length = self.headers.get('Content-Length')
+        if length is None:
+            return self._send(411, 'Length Required')
+        body = self.rfile.read(int(length))
+        if index._inject():
+            index._count('error')
+            return self._send(index.error_status, 'injected error')
+        try:
+            index.post(self.headers.get('Content-Type'), body,
+                       self.headers.get('Authorization'))
+        except FakeIndexError as e:
+            return self._send_error(e)
+        self._send(200, 'OK')
+
+
+@click.command()
+@click.option('--host', default=DEFAULT_HOST, help='address to listen on')
+@click.option('--port', default=8080, type=int, help='port to listen on')
+@click.option('--latency', default=0, type=float,
+              help='seconds every request is delayed by')
+@click.option('--error-rate', default=0, type=float,
+              help='fraction of requests answered with an error')
+@click.option('--propagation-delay', default=0, type=float,
+              help='seconds before uploads show up on the read APIs')
+def main(host, port, latency, error_rate, propagation_delay):
+    """serve an in-memory package index, e.g. for depypi upload -r fake=URL
+    """
+    logger.configure()
+    index = FakeIndex(host, port, latency, error_rate,
+                      propagation_delay=propagation_delay).start()
+    lgr.info('fake index serving on {0}'.format(index.url))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        index.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,360 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import re
+import threading
+
+from . import logger
+from .cache import FileCache, cache_enabled
+from .client import (get_session, DEFAULT_CONNECT_TIMEOUT,
+                     DEFAULT_READ_TIMEOUT)
+from .concurrency import imap_unordered, DEFAULT_WORKERS
+from .versions import latest, sort_versions
+
+lgr = logger.init()
+
+# JSON API of the public index, used for read-only lookups
+DEFAULT_INDEX_URL = 'https://pypi.org/pypi'
+
+PROJECT_JSON_URL = '{0}/{1}/json'
+RELEASE_JSON_URL = '{0}/{1}/{2}/json'
+SIMPLE_PROJECT_URL = '{0}/{1}/'
+
+# JSON form of the simple API (PEP 691), preferred over its HTML (PEP 503)
+SIMPLE_JSON_TYPE = 'application/vnd.pypi.simple.v1+json'
+SIMPLE_HTML_TYPE = 'text/html'
+SIMPLE_ACCEPT = '{0}, {1};q=0.1'.format(SIMPLE_JSON_TYPE, SIMPLE_HTML_TYPE)
+
+_ANCHOR = re.compile(r'<a\s([^>]*)>([^<]+)</a>', re.IGNORECASE)
+
+ARCHIVE_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tar.xz', '.tgz', '.tar',
+                      '.zip', '.egg')
+
+FILE_FIELDS = ('filename', 'size', 'digests', 'url', 'packagetype')
+
+# fields of a release's info kept by get_release_info
+RELEASE_FIELDS = ('name', 'version', 'requires_dist', 'requires_python')
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+# published releases never change, so their info is kept indefinitely
+_release_cache = FileCache('releases')
+
+# versions of projects from the simple API, revalidated by ETag
+_simple_cache = FileCache('simple')
+_versions = {}
+_versions_lock = threading.Lock()
+
+
+def normalize_name(name):
+    """Normalizes a project name as the index does (PEP 503)
+    """
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def get_project_index(index_url, name, session=None,
+                      timeout=(DEFAULT_CONNECT_TIMEOUT,
+                               DEFAULT_READ_TIMEOUT), auth=None):
+    """Gets the process wide ProjectIndex of a project on an index
+    :param index_url: base URL of the index, e.g. https://pypi.python.org/pypi
+    :param name: name of the project
+    :param auth: (user, password) to read a private index with
+    :return: ProjectIndex
+    """
+    key = (index_url.rstrip('/'), normalize_name(name), auth)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = ProjectIndex(index_url, name, session, timeout,
+                                         auth)
+        return _indexes[key]
+
+
+def get_release_info(index_url, name, version, session=None,
+                     timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)):
+    """Gets the metadata of one release of a project
+    :return: dict of RELEASE_FIELDS or None if the release does not exist
+    """
+    url = RELEASE_JSON_URL.format(index_url.rstrip('/'), name, version)
+    use_cache = cache_enabled()
+    cached = _release_cache.get(url) if use_cache else None
+    if cached is not None:
+        return cached
+    r = (session or get_session()).get(url, timeout=timeout)
+    if r.status_code == 404:
+        return None
+    r.raise_for_status()
+    info = r.json().get('info') or {}
+    release = dict((field, info.get(field)) for field in RELEASE_FIELDS)
+    if use_cache:
+        _release_cache.set(url, release, cost=len(r.content))
+    return release
+
+
+def simple_index_url(index_url):
+    """Gets the simple API URL matching a JSON API URL, e.g.
+    https://pypi.org/simple for https://pypi.org/pypi
+    """
+    index_url = index_url.rstrip('/')
+    if index_url.endswith('/pypi'):
+        index_url = index_url[:-len('/pypi')]
+    return index_url + '/simple'
+
+
+def version_from_filename(filename, name):
+    """Gets the version of a distribution file from its name
+    :return: the version or None if the name does not tell
+    """
+    if filename.endswith('.whl'):
+        parts = filename.split('-')
+        return parts[1] if len(parts) >= 5 else None
+    for extension in ARCHIVE_EXTENSIONS:
+        if filename.endswith(extension):
+            stem = filename[:-len(extension)]
+            break
+    else:
+        return None
+    if extension == '.egg':
+        stem = stem.rsplit('-py', 1)[0]
+    prefix = normalize_name(name) + '-'
+    for index in range(len(stem)):
+        if stem[index] == '-' and \
+                normalize_name(stem[:index + 1]) == prefix:
+            return stem[index + 1:] or None
+    return None
+
+
+def get_project_versions(index_url, name, session=None,
+                         timeout=(DEFAULT_CONNECT_TIMEOUT,
+                                  DEFAULT_READ_TIMEOUT)):
+    """Gets the versions of a project which have files that are not yanked.
+    The simple API is used, in its JSON form (PEP 691) where the index
+    serves it, as its response is a fraction of the size of the project's
+    JSON document. It is revalidated with ETag/Last-Modified across
+    processes. Indexes without it are asked through their JSON API instead.
+    :return: list of versions. empty if the project does not exist
+    """
+    key = (index_url.rstrip('/'), normalize_name(name))
+    with _versions_lock:
+        if key in _versions:
+            return _versions[key]
+    url = SIMPLE_PROJECT_URL.format(simple_index_url(index_url),
+                                    normalize_name(name))
+    use_cache = cache_enabled()
+    cached = _simple_cache.get(url) if use_cache else None
+    headers = {'Accept': SIMPLE_ACCEPT}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    r = (session or get_session()).get(url, headers=headers, timeout=timeout)
+    content_type = r.headers.get('Content-Type', '')
+    if r.status_code == 304 and cached:
+        versions = cached['versions']
+    elif r.ok and content_type.startswith((SIMPLE_JSON_TYPE,
+                                           SIMPLE_HTML_TYPE)):
+        if content_type.startswith(SIMPLE_JSON_TYPE):
+            files = [(f['filename'], f.get('yanked'))
+                     for f in r.json().get('files', [])]
+        else:
+            files = [(filename.strip(), 'data-yanked' in attributes)
+                     for attributes, filename in _ANCHOR.findall(r.text)]
+        versions = sort_versions(set(
+            version_from_filename(filename, name)
+            for filename, yanked in files if not yanked) - set([None]))
+        if use_cache:
+            _simple_cache.set(url, {
+                'etag': r.headers.get('ETag'),
+                'last_modified': r.headers.get('Last-Modified'),
+                'versions': versions,
+            }, cost=len(r.content))
+    else:
+        # a 404 may mean the index has no simple API rather than no such
+        # project, which the JSON API tells apart
+        lgr.debug('{0} is not a simple API page ({1}), using the JSON '
+                  'API'.format(url, r.status_code))
+        index = get_project_index(index_url, name, session, timeout)
+        index.ensure()
+        versions = sort_versions(
+            v for v, files in index.releases.items() if files)
+    with _versions_lock:
+        _versions[key] = versions
+    return versions
+
+
+class IndexClient():
+    def __init__(self, index_url=DEFAULT_INDEX_URL, workers=DEFAULT_WORKERS,
+                 session=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)):
+        """Read-only lookups of packages on an index.
+        Lookups of many projects or releases run concurrently over one
+        pooled session, and every answer is cached (see
+        get_project_versions and get_release_info).
+        :param index_url: base URL of the index's JSON API
+        :param workers: maximum number of concurrent requests
+        :param session: requests session. default is the shared one
+        :param timeout: (connect, read) timeout in seconds
+        :return: None
+        """
+        self.index_url = index_url
+        self.workers = workers
+        self.session = session or get_session(pool_size=workers)
+        self.timeout = timeout
+
+    def project(self, name):
+        """Gets the ProjectIndex of a project, with the files of every
+        release
+        """
+        return get_project_index(self.index_url, name, self.session,
+                                 self.timeout)
+
+    def versions(self, name):
+        return get_project_versions(self.index_url, name, self.session,
+                                    self.timeout)
+
+    def latest(self, name, prereleases=False):
+        """Gets the latest version of a project, or None if it has none
+        """
+        return latest(self.versions(name), prereleases)
+
+    def release(self, name, version):
+        """Gets the metadata of a release, e.g. its requires_dist
+        """
+        return get_release_info(self.index_url, name, version,
+                                self.session, self.timeout)
+
+    def _map(self, func, items):
+        results = {}
+        for item, result, error in imap_unordered(func, set(items),
+                                                  self.workers):
+            if error is not None:
+                lgr.warn('failed to look up {0} on {1}: {2}'.format(
+                    item, self.index_url, error))
+            results[item] = result
+        return results
+
+    def versions_of(self, names):
+        """Gets the versions of many projects concurrently
+        :return: dict of name to list of versions, or None if the lookup
+        failed
+        """
+        return self._map(self.versions, names)
+
+    def releases_of(self, releases):
+        """Gets the metadata of many releases concurrently
+        :param releases: iterable of (name, version)
+        :return: dict of (name, version) to the metadata, or None if the
+        release does not exist or the lookup failed
+        """
+        return self._map(lambda release: self.release(*release), releases)
+
+
+class ProjectIndex():
+    def __init__(self, index_url, name, session=None,
+                 timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT),
+                 auth=None):
+        """All releases of a project, fetched with one request.
+        The project's JSON document is downloaded once and kept as a map of
+        version to the files of that release. refresh() revalidates it with
+        ETag/Last-Modified so an unchanged project costs a 304 response.
+        :param index_url: base URL of the index
+        :param name: name of the project
+        :param session: requests session. default is the shared one
+        :param timeout: (connect, read) timeout in seconds
+        :param auth: (user, password) to read a private index with
+        :return: None
+        """
+        self.name = name
+        self.url = PROJECT_JSON_URL.format(index_url.rstrip('/'), name)
+        self.session = session or get_session()
+        self.timeout = timeout
+        self.auth = auth
+        self.releases = None
+        self.info = {}
+        self.etag = None
+        self.last_modified = None
+        # size of the last full response, i.e. what a refetch would cost
+        self.size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def exists(self):
+        self.ensure()
+        return bool(self.releases)
+
+    def ensure(self):
+        """Fetches the project unless it was fetched already
+        """
+        with self._lock:
+            if self.releases is None:
+                self._fetch()
+
+    def refresh(self):
+        """Revalidates the project against the index
+        """
+        with self._lock:
+            self._fetch()
+
+    def _fetch(self):
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        r = self.session.get(self.url, headers=headers, timeout=self.timeout,
+                             auth=self.auth)
+        if r.status_code == 304:
+            lgr.debug('{0} has not changed'.format(self.url))
+            return
+        if r.status_code == 404:
+            self.releases = {}
+            self.info = {}
+            self.etag = self.last_modified = None
+            return
+        r.raise_for_status()
+        project = r.json()
+        self.size = len(r.content)
+        self.info = project.get('info') or {}
+        self.releases = dict(
+            (version, [dict((field, f.get(field)) for field in FILE_FIELDS)
+                       for f in files])
+            for version, files in (project.get('releases') or {}).items())
+        self.etag = r.headers.get('ETag')
+        self.last_modified = r.headers.get('Last-Modified')
+
+    def versions(self):
+        self.ensure()
+        return list(self.releases)
+
+    def files(self, version):
+        """Gets the files of a release
+        :return: list of dicts with filename, size, digests, url and
+        packagetype. empty if the version does not exist
+        """
+        self.ensure()
+        return self.releases.get(version, [])
+
+    def is_registered(self, version):
+        self.ensure()
+        return version in self.releases
+
+    def is_available(self, version, filename=None):
+        """Is any file (or a specific one) of a version available?
+        """
+        files = self.files(version)
+        if filename:
+            return any(f['filename'] == filename for f in files)
+        return bool(files)
@@ -1,11 +1,28 @@
 import os
 import sys
+import copy
+import atexit
 import logging
-import dictconfig
+import threading
+import logging.handlers
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    from logging.config import dictConfig
+except ImportError:
+    # python 2.6
+    from .dictconfig import dictConfig
 
 DEFAULT_BASE_LOGGING_LEVEL = logging.INFO
 DEFAULT_VERBOSE_LOGGING_LEVEL = logging.DEBUG
 
+LOG_FILE_ENV = 'DEPYPI_LOG_FILE'
+DEFAULT_LOG_FILE = '~/.depypi/depypi.log'
+
 LOGGER = {
     "version": 1,
     "formatters": {
@@ -21,9 +38,9 @@ LOGGER = {
             "class": "logging.handlers.RotatingFileHandler",
             "formatter": "file",
             "level": "DEBUG",
-            "filename": os.path.expanduser("~/.wagon/wagon.log"),
-            "maxBytes": "5000000",
-            "backupCount": "20"
+            "filename": DEFAULT_LOG_FILE,
+            "maxBytes": 5000000,
+            "backupCount": 20
         },
         "console": {
             "class": "logging.StreamHandler",
@@ -38,35 +55,147 @@ LOGGER = {
     }
 }
 
+_configured = False
+_configure_lock = threading.Lock()
+_writer = None
+
+
+class _QueueHandler(logging.Handler):
+    """Hands records to a queue, like logging.handlers.QueueHandler which
+    python 2 does not have
+    """
+    def __init__(self, records):
+        logging.Handler.__init__(self)
+        self.records = records
+
+    def emit(self, record):
+        try:
+            # the message is formatted now, as its arguments may change
+            # before the writer gets to it
+            record = copy.copy(record)
+            if record.exc_info:
+                self.format(record)
+            record.msg = record.getMessage()
+            record.args = None
+            record.exc_info = None
+            self.records.put_nowait(record)
+        except Exception:
+            self.handleError(record)
+
+
+class _BackgroundWriter():
+    def __init__(self, records, handlers):
+        """Passes queued records to handlers from a daemon thread
+        :param records: queue of log records. None stops the writer
+        :param handlers: handlers to write the records with, each only
+        receiving records of its level or above
+        :return: None
+        """
+        self.records = records
+        self.handlers = handlers
+        self.thread = threading.Thread(target=self._write,
+                                       name='depypi-log-writer')
+        self.thread.daemon = True
+
+    def start(self):
+        self.thread.start()
+
+    def _write(self):
+        while True:
+            record = self.records.get()
+            if record is None:
+                return
+            for handler in self.handlers:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+
+    def stop(self):
+        """Writes out the records still queued
+        """
+        self.records.put(None)
+        self.thread.join()
+
 
 def init(base_level=DEFAULT_BASE_LOGGING_LEVEL,
          verbose_level=DEFAULT_VERBOSE_LOGGING_LEVEL):
     """Initializes a base logger
+    Every module calls this at import, so the level is only set the first
+    time and later changes to it are kept.
     """
     lgr = logging.getLogger('user')
-    lgr.setLevel(base_level)
+    if lgr.level == logging.NOTSET:
+        lgr.setLevel(base_level)
     return lgr
 
 
+def get_log_file():
+    """Gets the path of depypi's log file
+    :return: $DEPYPI_LOG_FILE or ~/.depypi/depypi.log
+    """
+    return os.path.expanduser(
+        os.environ.get(LOG_FILE_ENV) or
+        LOGGER['handlers']['file']['filename'])
+
+
 def configure():
     """Configures the logger using the default configuration.
+    Only the first call in a process does anything, so it is cheap to call
+    from every handler object. Records for the log file are handed to a
+    background thread, so no thread ever waits for the file to be written.
+    """
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        log_file = get_log_file()
+        log_dir = os.path.dirname(log_file)
+        if os.path.isfile(log_dir):
+            sys.exit('File {0} exists - log directory cannot be created '
+                     'there. please remove the file or set {1} and try '
+                     'again.'.format(log_dir, LOG_FILE_ENV))
+        config = dict(LOGGER, handlers=dict(LOGGER['handlers']))
+        config['handlers']['file'] = dict(LOGGER['handlers']['file'],
+                                          filename=log_file)
+        try:
+            if not os.path.exists(log_dir) and not len(log_dir) == 0:
+                os.makedirs(log_dir)
+            dictConfig(config)
+        except (OSError, ValueError) as ex:
+            sys.exit('Could not configure logger.'
+                     ' verify your logger config'
+                     ' and permissions to write to {0} ({1})'.format(
+                         log_file, str(ex)))
+        _write_in_background(logging.getLogger('user'))
+        _configured = True
+
+
+def background_threads():
+    """Gets the threads the logger runs, which never touch the working
+    directory or sys.path
+    :return: list of threads
+    """
+    return [_writer.thread] if _writer is not None else []
+
+
+def _write_in_background(lgr):
+    """Replaces the file handlers of a logger with a queue a background
+    thread writes to them from.
     """
-    try:
-        log_file = LOGGER['handlers']['file']['filename']
-    except KeyError as ex:
-        sys.exit('Failed retrieving log file path ({0}).'.format(str(ex)))
-    log_dir = os.path.dirname(os.path.expanduser(log_file))
-    if os.path.isfile(log_dir):
-        sys.exit('File {0} exists - log directory cannot be created '
-                 'there. please remove the file and try again.'.format(
-                     log_dir))
-    try:
-        if not os.path.exists(log_dir) and not len(log_dir) == 0:
-            os.makedirs(log_dir)
-        dictconfig.dictConfig(LOGGER)
-
-    except ValueError as ex:
-        sys.exit('Could not configure logger.'
-                 ' verify your logger config'
-                 ' and permissions to write to {0} ({1})'.format(
-                     log_file, str(ex)))
+    global _writer
+    file_handlers = [h for h in lgr.handlers
+                     if isinstance(h, logging.FileHandler)]
+    if not file_handlers:
+        return
+    records = queue.Queue()
+    for handler in file_handlers:
+        lgr.removeHandler(handler)
+    queue_handler = getattr(logging.handlers, 'QueueHandler', _QueueHandler)
+    lgr.addHandler(queue_handler(records))
+    _writer = _BackgroundWriter(records, file_handlers)
+    _writer.start()
+    atexit.register(_stop_writer)
+
+
+def _stop_writer():
+    if _writer is not None:
+        _writer.stop()
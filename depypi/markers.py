@@ -0,0 +1,197 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import re
+import sys
+import platform
+
+from .versions import SpecifierSet, InvalidSpecifier, is_valid
+
+_TOKEN = re.compile(r'''\s*(\(|\)|===|==|!=|<=|>=|~=|<|>|not\s+in\b|in\b|
+                        and\b|or\b|'[^']*'|"[^"]*"|[A-Za-z_][\w.]*)''',
+                    re.VERBOSE)
+
+VARIABLES = (
+    'implementation_name',
+    'implementation_version',
+    'os_name',
+    'platform_machine',
+    'platform_python_implementation',
+    'platform_release',
+    'platform_system',
+    'platform_version',
+    'python_full_version',
+    'python_version',
+    'sys_platform',
+    'extra',
+)
+
+_environment = None
+
+
+class MarkerError(Exception):
+    pass
+
+
+def default_environment():
+    """Gets the values of marker variables for this interpreter (PEP 508)
+    """
+    global _environment
+    if _environment is None:
+        implementation = getattr(sys, 'implementation', None)
+        if implementation is None:
+            implementation_name = 'cpython'
+            implementation_version = '0'
+        else:
+            implementation_name = implementation.name
+            info = implementation.version
+            implementation_version = '{0}.{1}.{2}'.format(*info[:3])
+        _environment = {
+            'implementation_name': implementation_name,
+            'implementation_version': implementation_version,
+            'os_name': os.name,
+            'platform_machine': platform.machine(),
+            'platform_python_implementation':
+                platform.python_implementation(),
+            'platform_release': platform.release(),
+            'platform_system': platform.system(),
+            'platform_version': platform.version(),
+            'python_full_version': platform.python_version(),
+            'python_version': '.'.join(platform.python_version_tuple()[:2]),
+            'sys_platform': sys.platform,
+            'extra': '',
+        }
+    return _environment
+
+
+def _tokenize(marker):
+    tokens = []
+    position = 0
+    marker = marker.rstrip()
+    while position < len(marker):
+        match = _TOKEN.match(marker, position)
+        if not match:
+            raise MarkerError('invalid marker {0!r} at {1!r}'.format(
+                marker, marker[position:]))
+        tokens.append(re.sub(r'\s+', ' ', match.group(1)))
+        position = match.end()
+    return tokens
+
+
+def _compare(left, op, right):
+    if op == 'in':
+        return left in right
+    if op == 'not in':
+        return left not in right
+    # versions on both sides compare as versions (PEP 508)
+    if is_valid(left):
+        try:
+            return SpecifierSet(op + right).contains(left, prereleases=True)
+        except InvalidSpecifier:
+            pass
+    if op in ('==', '==='):
+        return left == right
+    if op == '!=':
+        return left != right
+    if op == '<':
+        return left < right
+    if op == '<=':
+        return left <= right
+    if op == '>':
+        return left > right
+    if op == '>=':
+        return left >= right
+    raise MarkerError('unable to compare {0!r} {1} {2!r}'.format(
+        left, op, right))
+
+
+class _Evaluator():
+    def __init__(self, tokens, environment):
+        self.tokens = tokens
+        self.position = 0
+        self.environment = environment
+
+    def _peek(self):
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self):
+        token = self._peek()
+        if token is None:
+            raise MarkerError('unexpected end of marker')
+        self.position += 1
+        return token
+
+    def evaluate(self):
+        result = self._or()
+        if self._peek() is not None:
+            raise MarkerError('unexpected {0!r}'.format(self._peek()))
+        return result
+
+    def _or(self):
+        result = self._and()
+        while self._peek() == 'or':
+            self._next()
+            # both sides are parsed even when the result is known
+            right = self._and()
+            result = result or right
+        return result
+
+    def _and(self):
+        result = self._expression()
+        while self._peek() == 'and':
+            self._next()
+            right = self._expression()
+            result = result and right
+        return result
+
+    def _expression(self):
+        if self._peek() == '(':
+            self._next()
+            result = self._or()
+            if self._next() != ')':
+                raise MarkerError('expected )')
+            return result
+        left = self._value()
+        op = self._next()
+        right = self._value()
+        return _compare(left, op, right)
+
+    def _value(self):
+        token = self._next()
+        if token[0] in '\'"':
+            return token[1:-1]
+        if token in self.environment:
+            return self.environment[token]
+        if token in VARIABLES:
+            return ''
+        raise MarkerError('unknown marker variable {0}'.format(token))
+
+
+def evaluate_marker(marker, environment=None, extra=None):
+    """Evaluates an environment marker (PEP 508)
+    :param marker: the marker, e.g. python_version < "3"
+    :param environment: values of marker variables. default is this
+    interpreter's
+    :param extra: name of the extra being installed, if any
+    :return: bool
+    :raises: MarkerError if the marker is invalid
+    """
+    environment = dict(environment or default_environment())
+    if extra is not None:
+        environment['extra'] = extra
+    return _Evaluator(_tokenize(marker), environment).evaluate()
@@ -0,0 +1,296 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import re
+import sys
+import glob
+import json
+import logging
+import threading
+
+from . import logger
+from .cache import FileCache, cache_enabled, hash_key
+from .runner import run_python, CommandError
+
+lgr = logger.init()
+
+SETUP_FILE = 'setup.py'
+
+# setting this environment variable skips the in-process probe altogether
+FORCE_SUBPROCESS_ENV = 'DEPYPI_METADATA_SUBPROCESS'
+
+# seconds the subprocess probe may take
+PROBE_TIMEOUT = 300
+
+# besides setup.py itself, these files commonly feed the setup() call
+KEY_FILES = ('setup.cfg', 'pyproject.toml')
+VERSION_FILE_PATTERNS = (
+    'VERSION',
+    'version.txt',
+    '*/__init__.py',
+    '*/version.py',
+    '*/_version.py',
+    '*/__version__.py',
+    'src/*/__init__.py',
+    'src/*/version.py',
+    'src/*/_version.py',
+)
+# matches string literals in setup.py which may name a file it reads
+_FILE_LITERAL = re.compile(r'''['"]([\w./-]+)['"]''')
+
+METADATA_FIELDS = (
+    'name',
+    'version',
+    'author',
+    'author_email',
+    'maintainer',
+    'maintainer_email',
+    'url',
+    'download_url',
+    'license',
+    'description',
+    'long_description',
+    'keywords',
+    'platforms',
+    'classifiers',
+    'python_requires',
+    'install_requires',
+    'extras_require',
+    'setup_requires',
+    'tests_require',
+    'packages',
+    'entry_points',
+)
+
+# The probe is kept as source so that the exact same code can run either
+# inside this interpreter or, as a fallback, in a single child interpreter.
+_PROBE_SOURCE = '''
+import sys
+
+try:
+    text_type = unicode
+except NameError:
+    text_type = str
+
+
+class SetupCalled(Exception):
+    pass
+
+
+def probe(setup_file):
+    captured = {}
+
+    def setup(**attrs):
+        captured.update(attrs)
+        raise SetupCalled()
+
+    patched = []
+    for module_name in ('setuptools', 'distutils.core'):
+        try:
+            module = __import__(module_name, fromlist=['setup'])
+        except ImportError:
+            continue
+        patched.append((module, module.setup))
+        module.setup = setup
+    argv = sys.argv
+    sys.argv = [setup_file, '--name']
+    namespace = {'__name__': '__main__', '__file__': setup_file}
+    try:
+        with open(setup_file, 'rb') as f:
+            code = compile(f.read(), setup_file, 'exec')
+        exec(code, namespace)
+    except SetupCalled:
+        pass
+    finally:
+        sys.argv = argv
+        for module, original in patched:
+            module.setup = original
+    return normalize(captured)
+
+
+def normalize(attrs):
+    metadata = {}
+    for field in FIELDS:
+        if attrs.get(field) is not None:
+            metadata[field] = _plain(attrs[field])
+    return metadata
+
+
+def _plain(value):
+    if isinstance(value, dict):
+        return dict((_plain(k), _plain(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return [_plain(v) for v in value]
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    if isinstance(value, text_type):
+        return value
+    return text_type(value)
+'''
+
+_PROBE_MAIN = '''
+import json
+sys.stdout.write(MARKER + json.dumps(probe(SETUP_FILE)) + '\\n')
+'''
+
+_PROBE_MARKER = '__DEPYPI_METADATA__'
+
+_probe_code = compile(_PROBE_SOURCE, '<depypi-metadata-probe>', 'exec')
+# the in-process probe changes the working directory and sys.path of the
+# whole process, so it only runs while no other thread can observe them
+# (see _in_process_is_safe), and only one may run at a time.
+_probe_lock = threading.Lock()
+
+_metadata_cache = FileCache('metadata')
+
+
+class MetadataError(Exception):
+    pass
+
+
+def get_metadata(path='', use_cache=True):
+    """Extracts the core metadata of a package in a single pass.
+    Results are cached on disk by the content of setup.py and the files it
+    depends on, so an unchanged checkout does not execute setup.py again.
+    Otherwise setup.py is executed once in this interpreter with a stubbed
+    `setup` call. If other threads are running, which would see the
+    working directory change, or if the script fails, exits or never calls
+    setup, a single `python -c` subprocess runs the same probe instead.
+    :param path: location of setup.py
+    :param use_cache: read and update the on-disk metadata cache
+    :return: dict of metadata fields found in the setup() call
+    """
+    path = os.path.abspath(path or os.getcwd())
+    if not os.path.isfile(os.path.join(path, SETUP_FILE)):
+        raise MetadataError('{0} not found in {1}'.format(SETUP_FILE, path))
+    use_cache = use_cache and cache_enabled()
+    if use_cache:
+        key = metadata_cache_key(path)
+        metadata = _metadata_cache.get(key)
+        if _is_complete(metadata):
+            lgr.debug('using cached metadata for {0}'.format(path))
+            return metadata
+    metadata = _probe(path)
+    if use_cache:
+        _metadata_cache.set(key, metadata)
+    return metadata
+
+
+def metadata_cache_key(path):
+    """Hashes every file the package metadata is likely to depend on.
+    :param path: absolute location of setup.py
+    :return: hex digest
+    """
+    parts = ['{0}.{1}'.format(*sys.version_info[:2])]
+    for relative_path in _key_files(path):
+        with open(os.path.join(path, relative_path), 'rb') as f:
+            parts.extend((relative_path, f.read()))
+    return hash_key(*parts)
+
+
+def _key_files(path):
+    with open(os.path.join(path, SETUP_FILE), 'rb') as f:
+        setup_source = f.read().decode('utf-8', 'replace')
+    candidates = set(KEY_FILES)
+    candidates.update(_FILE_LITERAL.findall(setup_source))
+    for pattern in VERSION_FILE_PATTERNS:
+        candidates.update(os.path.relpath(p, path)
+                          for p in glob.glob(os.path.join(path, pattern)))
+    candidates.discard(SETUP_FILE)
+    return [SETUP_FILE] + sorted(
+        c for c in candidates if os.path.isfile(os.path.join(path, c)))
+
+
+def _probe(path):
+    metadata = None
+    if not os.environ.get(FORCE_SUBPROCESS_ENV) and _in_process_is_safe():
+        metadata = _probe_in_process(path)
+    if not _is_complete(metadata):
+        lgr.debug('falling back to probing {0} in a subprocess'.format(
+            os.path.join(path, SETUP_FILE)))
+        metadata = _probe_subprocess(path)
+    if not _is_complete(metadata):
+        raise MetadataError('Unable to retrieve package name and version '
+                            'from {0}'.format(os.path.join(path, SETUP_FILE)))
+    return metadata
+
+
+def _is_complete(metadata):
+    return bool(metadata and metadata.get('name') and
+                metadata.get('version'))
+
+
+def _in_process_is_safe():
+    """Is this the only thread which could be affected by the probe
+    changing the working directory and sys.path?
+    """
+    current = threading.current_thread()
+    others = set(threading.enumerate()) - set(logger.background_threads())
+    return all(thread is current for thread in others)
+
+
+def _probe_in_process(path):
+    """Runs the probe in this interpreter.
+    Any module setup.py imports from its own tree is dropped afterwards so
+    that it can not shadow anything in later probes.
+    :return: metadata dict or None if setup.py could not be probed safely
+    """
+    namespace = {'FIELDS': METADATA_FIELDS}
+    exec(_probe_code, namespace)
+    with _probe_lock:
+        current_dir = os.getcwd()
+        sys_path = list(sys.path)
+        modules = set(sys.modules)
+        try:
+            os.chdir(path)
+            sys.path.insert(0, path)
+            return namespace['probe'](SETUP_FILE)
+        except (Exception, SystemExit) as e:
+            lgr.debug('in-process probe of {0} failed: {1}'.format(path, e))
+            return None
+        finally:
+            os.chdir(current_dir)
+            sys.path[:] = sys_path
+            _unload_modules_under(path, set(sys.modules) - modules)
+
+
+def _unload_modules_under(path, module_names):
+    prefix = os.path.join(path, '')
+    for name in module_names:
+        module_file = getattr(sys.modules.get(name), '__file__', None) or ''
+        if os.path.abspath(module_file).startswith(prefix):
+            del sys.modules[name]
+
+
+def _probe_subprocess(path):
+    """Runs the probe in one child interpreter.
+    :return: metadata dict or None if the probe printed no result
+    """
+    script = '\n'.join((
+        'FIELDS = {0!r}'.format(METADATA_FIELDS),
+        'MARKER = {0!r}'.format(_PROBE_MARKER),
+        'SETUP_FILE = {0!r}'.format(SETUP_FILE),
+        _PROBE_SOURCE,
+        _PROBE_MAIN))
+    try:
+        output = run_python(['-c', script], cwd=path, level=logging.DEBUG,
+                            timeout=PROBE_TIMEOUT, name='metadata probe')
+    except CommandError as e:
+        raise MetadataError(str(e))
+    for line in output.splitlines():
+        if line.startswith(_PROBE_MARKER):
+            return json.loads(line[len(_PROBE_MARKER):])
+    return None
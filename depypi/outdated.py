@@ -0,0 +1,165 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+
+from . import logger
+from .cache import FileCache, cache_enabled
+from .client import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from .concurrency import imap_unordered, DEFAULT_WORKERS
+from .index import IndexClient, normalize_name, DEFAULT_INDEX_URL
+from .requirements import parse_requirement, RequirementsError
+from .versions import version_key, InvalidVersion
+
+lgr = logger.init()
+
+# new releases appear all the time, so latest versions are only cached for
+# a while
+DEFAULT_LATEST_TTL = 3600
+
+OUTDATED = 'outdated'
+UNPINNED = 'unpinned'
+UP_TO_DATE = 'up-to-date'
+UNKNOWN = 'unknown'
+STATUSES = (OUTDATED, UNPINNED, UP_TO_DATE, UNKNOWN)
+
+REPORT_FORMATS = ('table', 'json')
+TABLE_COLUMNS = ('package', 'name', 'requirement', 'pinned', 'latest',
+                 'status')
+
+_latest_cache = FileCache('latest')
+
+
+def latest_versions(names, index_url=DEFAULT_INDEX_URL,
+                    workers=DEFAULT_WORKERS, ttl=DEFAULT_LATEST_TTL,
+                    session=None,
+                    timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)):
+    """Gets the latest final release of many projects concurrently.
+    Every project is looked up once, however many times it is named.
+    :param names: project names
+    :param ttl: seconds to cache a latest version
+    :return: dict of normalized name to latest version, or None if the
+    project has no releases or could not be fetched
+    """
+    client = IndexClient(index_url, workers, session, timeout)
+    use_cache = cache_enabled()
+    results = {}
+    missing = []
+    for name in set(normalize_name(n) for n in names):
+        key = '{0}/{1}'.format(index_url.rstrip('/'), name)
+        cached = _latest_cache.get(key) if use_cache else None
+        if cached is not None:
+            results[name] = cached['latest']
+        else:
+            missing.append(name)
+
+    for name, version, error in imap_unordered(client.latest, missing,
+                                               workers):
+        if error is not None:
+            lgr.warn('unable to get the latest version of {0}: {1}'.format(
+                name, error))
+            results[name] = None
+            continue
+        results[name] = version
+        if use_cache:
+            _latest_cache.set('{0}/{1}'.format(index_url.rstrip('/'), name),
+                              {'latest': version}, ttl=ttl)
+    return results
+
+
+def _status(pinned, latest_version):
+    if latest_version is None:
+        return UNKNOWN
+    if pinned is None:
+        return UNPINNED
+    try:
+        if version_key(pinned) < version_key(latest_version):
+            return OUTDATED
+    except InvalidVersion:
+        return UNKNOWN
+    return UP_TO_DATE
+
+
+class OutdatedReport():
+    def __init__(self, entries):
+        """Dependencies of packages compared with the latest releases
+        :param entries: list of dicts of TABLE_COLUMNS
+        :return: None
+        """
+        self.entries = entries
+
+    def counts(self):
+        counts = dict((status, 0) for status in STATUSES)
+        for entry in self.entries:
+            counts[entry['status']] += 1
+        return counts
+
+    def to_json(self):
+        return json.dumps({'dependencies': self.entries,
+                           'counts': self.counts()}, indent=4, sort_keys=True)
+
+    def to_table(self):
+        rows = [[c.upper() for c in TABLE_COLUMNS]]
+        for entry in self.entries:
+            rows.append([str(entry[c] if entry[c] is not None else '-')
+                         for c in TABLE_COLUMNS])
+        widths = [max(len(row[i]) for row in rows)
+                  for i in range(len(TABLE_COLUMNS))]
+        lines = ['  '.join(cell.ljust(width) for cell, width
+                           in zip(row, widths)).rstrip() for row in rows]
+        lines.append('')
+        lines.append(', '.join('{0} {1}'.format(count, status) for status,
+                               count in sorted(self.counts().items())))
+        return '\n'.join(lines)
+
+    def format(self, report_format):
+        if report_format == 'json':
+            return self.to_json()
+        return self.to_table()
+
+
+def build_report(dependencies, **lookup_kwargs):
+    """Compares the dependencies of packages with the latest releases
+    :param dependencies: dict of package (e.g. its path) to its list of
+    requirement strings
+    :param lookup_kwargs: arguments for latest_versions
+    :return: OutdatedReport, outdated entries first
+    """
+    parsed = []
+    for package, requirements in sorted(dependencies.items()):
+        for text in requirements:
+            try:
+                requirement = parse_requirement(text)
+            except RequirementsError as e:
+                lgr.warn(e)
+                continue
+            parsed.append((package, text, requirement))
+    latest_by_name = latest_versions(
+        [r.name for _, _, r in parsed if not r.url], **lookup_kwargs)
+    entries = []
+    for package, text, requirement in parsed:
+        pinned = requirement.specifier.pinned_version
+        latest_version = latest_by_name.get(normalize_name(requirement.name))
+        entries.append({
+            'package': package,
+            'name': requirement.name,
+            'requirement': text,
+            'pinned': pinned,
+            'latest': latest_version,
+            'status': _status(pinned, latest_version),
+        })
+    entries.sort(key=lambda e: (STATUSES.index(e['status']), e['package'],
+                                e['name'].lower()))
+    return OutdatedReport(entries)
@@ -0,0 +1,97 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import random
+from collections import namedtuple
+
+from . import logger
+from . import timing
+from .concurrency import imap_unordered
+
+lgr = logger.init()
+
+DEFAULT_DEADLINE = 60
+DEFAULT_INITIAL_DELAY = 1
+DEFAULT_MAX_DELAY = 15
+DEFAULT_FACTOR = 2
+DEFAULT_JITTER = 0.5
+
+PollResult = namedtuple('PollResult',
+                        ['name', 'visible', 'attempts', 'time_to_visible'])
+
+
+class Poller():
+    def __init__(self, deadline=DEFAULT_DEADLINE,
+                 initial_delay=DEFAULT_INITIAL_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY, factor=DEFAULT_FACTOR,
+                 jitter=DEFAULT_JITTER):
+        """Re-runs checks with exponential backoff until they pass or the
+        deadline is reached.
+        :param deadline: seconds after which a check is considered failed.
+        0 checks exactly once.
+        :param initial_delay: seconds to wait after the first failed check
+        :param max_delay: upper bound for the wait between checks
+        :param factor: multiplier applied to the wait after every check
+        :param jitter: fraction of every wait which is randomized so that
+        concurrent pollers do not hit the index in lockstep
+        :return: None
+        """
+        self.deadline = deadline
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.factor = factor
+        self.jitter = jitter
+
+    def poll(self, check, name=None):
+        """Polls a single check
+        :param check: callable returning True once the check passes
+        :param name: name to report the result under
+        :return: PollResult. time_to_visible is None if the deadline passed
+        """
+        start = time.time()
+        delay = self.initial_delay
+        attempts = 0
+        while True:
+            attempts += 1
+            with timing.span('verify_attempt', check=name,
+                             attempt=attempts) as attributes:
+                visible = bool(check())
+                attributes['visible'] = visible
+            if visible:
+                return PollResult(name, True, attempts, time.time() - start)
+            remaining = self.deadline - (time.time() - start)
+            if remaining <= 0:
+                return PollResult(name, False, attempts, None)
+            wait = random.uniform(delay * (1 - self.jitter), delay)
+            lgr.debug('{0} is not visible yet, checking again in '
+                      '{1:.1f}s'.format(name, wait))
+            time.sleep(min(wait, remaining))
+            delay = min(delay * self.factor, self.max_delay)
+
+    def poll_all(self, checks):
+        """Polls several checks concurrently
+        :param checks: dict of name to check callable
+        :return: dict of name to PollResult
+        """
+        results = {}
+        for name, result, error in imap_unordered(
+                lambda name: self.poll(checks[name], name), list(checks),
+                workers=len(checks)):
+            if error is not None:
+                lgr.error('verifying {0} failed: {1}'.format(name, error))
+                result = PollResult(name, False, 0, None)
+            results[name] = result
+        return results
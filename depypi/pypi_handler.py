@@ -16,236 +16,571 @@
 import os
 import shutil
 import sys
+import tempfile
+from functools import partial
 
-import sh
 import requests
 
 from . import logger
+from . import timing
+from .client import (VerificationClient, DEFAULT_CONNECT_TIMEOUT,
+                     DEFAULT_READ_TIMEOUT, get_session)
+from .credentials import CredentialProvider, CredentialsError
+from .concurrency import imap_unordered, map_concurrently, DEFAULT_WORKERS
+from .build_cache import BuildCache, build_key
+from .cache import FileCache, cache_enabled, DEFAULT_NEGATIVE_TTL
+from .index import get_project_index, normalize_name
+from .metadata import get_metadata, MetadataError
+from .poller import Poller, DEFAULT_DEADLINE
+from .runner import run_python, CommandError, DEFAULT_TIMEOUT
+from .uploader import (Uploader, UploadError, find_distributions,
+                       metadata_from_setup, file_digests, read_release)
 
 lgr = logger.init()
 
-PYPI_TEMPLATE = "[distutils]\n" \
-                "index-servers =\n" \
-                "    pypi\n" \
-                "[pypi]\n" \
-                "repository=https://pypi.python.org/pypi\n" \
-                "username={0}\n" \
-                "password={1}"
+availability_cache = FileCache('availability')
+build_cache = BuildCache()
 
-PYPITEST_TEMPLATE = "[distutils]\n" \
-                    "index-servers =\n" \
-                    "    pypitest\n\n" \
-                    "[pypitest]\n" \
-                    "repository=https://testpypi.python.org/pypi\n" \
-                    "username={0}\n" \
-                    "password={1}"
+# uploads report their progress every this many percent
+PROGRESS_STEP = 25
+
+REPOSITORIES = {
+    'pypi': 'https://pypi.python.org/pypi',
+    'pypitest': 'https://testpypi.python.org/pypi',
+}
+
+
+def is_public_repository(url):
+    """Is url one of the public indexes in REPOSITORIES?
+    Reads from those are never authenticated.
+    """
+    return url.rstrip('/') in REPOSITORIES.values()
 
 
 class PypiHandler():
     def __init__(self, path='', credentials=None, dist_type=None,
-                 target="pypitest"):
+                 target="pypitest", connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_READ_TIMEOUT,
+                 verify_timeout=DEFAULT_DEADLINE,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL, repository_url=None,
+                 upload_workers=DEFAULT_WORKERS,
+                 command_timeout=DEFAULT_TIMEOUT, auth=None):
         """A Pypi handler object for uploading, registering and testing.
         :param path: location of setup.py
         :param credentials: credentials to use for upload or registation
         if none are specified a best effort will be made to use either:
         ~/.pypirc or environment variables PYPIUSER and PYPIPWD.
         Credentials are not needed for checking pypi and pypitest for packages.
+        :param dist_type: distribution type, or list of types, to build
         :param target: pypi for live and pypitest for test
+        :param connect_timeout: seconds to wait for a connection to the index
+        :param read_timeout: seconds to wait for the index to respond
+        :param verify_timeout: seconds to keep checking that an upload or
+        registration became visible on the index
+        :param negative_ttl: seconds to cache a negative availability or
+        registration result. positive results are cached indefinitely
+        :param repository_url: URL of the index to upload and register to
+        and to verify against. default is the repository of target in
+        ~/.pypirc, or the public one of target
+        :param auth: (user, password) to read a private repository with.
+        default is the credentials of target, once they are resolved for an
+        upload or registration
+        :param upload_workers: maximum number of files uploaded at once
+        :param command_timeout: seconds after which a setup.py command is
+        killed
         :return: None
         """
         logger.configure()
-        if credentials:
-            if isinstance(credentials, tuple):
-                self.pypiuser = credentials[0]
-                self.pypipwd = credentials[1]
-            else:
-                lgr.error("Credentials provided are of the wrong format."
-                          "Should be tuple(str,str) if calling by API, or "
-                          "-c user password")
-                sys.exit(1)
+        if credentials and not isinstance(credentials, tuple):
+            lgr.error("Credentials provided are of the wrong format."
+                      "Should be tuple(str,str) if calling by API, or "
+                      "-c user password")
+            sys.exit(1)
         self.path = path
         self.target = target
         if target == "pypitest":
             self.test_target = "testpypi"
         else:
             self.test_target = target
-        self.name = self.get_package_name()
-        self.version = self.get_package_version()
+        self._metadata = None
         self.credentials = credentials
-        self.cleanup_pypirc = False
-        self.dist_type = dist_type or 'sdist'
-        self.pypirc_file = os.path.expanduser('~/.pypirc')
-        self.pypirc_backup_file = os.path.expanduser('~/.pypirc.crt.backup')
+        if isinstance(dist_type, (list, tuple)):
+            self.dist_types = list(dist_type) or ['sdist']
+        else:
+            self.dist_types = [dist_type or 'sdist']
+        self.dist_type = ' '.join(self.dist_types)
+        self.credential_provider = CredentialProvider(credentials)
+        repository_url = repository_url or \
+            self.credential_provider.repository_url(target)
+        self.index_url = repository_url or \
+            "https://{0}.python.org/pypi".format(self.test_target)
+        self.auth = auth
+        self.client = VerificationClient(connect_timeout, read_timeout)
+        self.poller = Poller(deadline=verify_timeout)
+        self.time_to_visible = None
+        self.negative_ttl = negative_ttl
+        self.repository_url = repository_url
+        self.upload_workers = upload_workers
+        self.upload_results = []
+        self.command_timeout = command_timeout
 
     def _command(self, args):
         """Runs python commands from command line
+        The command runs in path without changing the working directory of
+        this process, and its output is logged as it arrives.
         :param args: arguments to run command with.
         :return: returns the text output of the command.
         """
-        current_dir = os.getcwd()
         try:
-            if self.path:
-                os.chdir(self.path)
-            p = sh.python(*args)
-            p.wait()
-        except (sh.ErrorReturnCode, ValueError, OSError) as e:
+            return run_python(args, cwd=self.path,
+                              timeout=self.command_timeout)
+        except CommandError as e:
+            lgr.error(e)
+            sys.exit(1)
+
+    @property
+    def metadata(self):
+        """Metadata of the package in path, probed on first use
+        """
+        if self._metadata is None:
+            self._metadata = self.get_package_metadata()
+        return self._metadata
+
+    @property
+    def name(self):
+        return self.get_package_name()
+
+    @property
+    def version(self):
+        return self.get_package_version()
+
+    def get_package_metadata(self):
+        """Gets the core metadata of the python package in a single pass
+        :return: dict of metadata fields passed to setup()
+        """
+        try:
+            with timing.span('metadata', path=self.path or '.'):
+                return get_metadata(self.path)
+        except MetadataError as e:
             lgr.error(e)
-            if self.cleanup_pypirc:
-                self._cleanup_injected_credentials()
             sys.exit(1)
-        finally:
-            os.chdir(current_dir)
-        return p
 
     def get_package_version(self):
         """Gets the version of the python package
         :return: version of the python package
         """
-        args = ("setup.py", "--version")
-        return ''.join(self._command(args=args).splitlines())
+        return self.metadata['version']
 
     def get_package_name(self):
         """Gets the name of the python package
         :return: name of the python package
         """
-        args = ("setup.py", "--name")
-        return ''.join(self._command(args=args).splitlines())
+        return self.metadata['name']
+
+    def build(self, use_cache=True):
+        """Builds the distributions of the package
+        setup.py writes to an empty directory, so files left in dist/ by
+        earlier builds are never mistaken for this build's. The new files
+        are then moved to dist/.
+        Builds are cached by a hash of the source tree, so an unchanged
+        tree reuses the files of its previous build instead of rebuilding.
+        :param use_cache: read and update the build cache
+        :return: list of paths to the built distribution files
+        """
+        with timing.span('build', dist_types=self.dist_types) as attributes:
+            distributions = self._build(use_cache, attributes)
+            attributes['files'] = [os.path.basename(f) for f in distributions]
+            return distributions
 
-    def upload(self):
+    def _build(self, use_cache, attributes):
+        dist_dir = os.path.join(self.path or '', 'dist')
+        use_cache = use_cache and cache_enabled()
+        if use_cache:
+            try:
+                key = build_key(self.path or os.getcwd(), self.dist_types)
+            except (IOError, OSError) as e:
+                lgr.debug('not using the build cache, unable to hash the '
+                          'source tree: {0}'.format(e))
+                use_cache = False
+        if use_cache:
+            cached = build_cache.get(key)
+            attributes['cached'] = bool(cached)
+            if cached:
+                lgr.info("source tree unchanged, reusing {0}".format(
+                    ', '.join(os.path.basename(f) for f in cached)))
+                return self._copy_to_dist_dir(cached, dist_dir)
+        build_dir = tempfile.mkdtemp(prefix='depypi-build-')
+        try:
+            args = ["setup.py"]
+            for dist_type in self.dist_types:
+                args.extend([dist_type, "--dist-dir", build_dir])
+            self._command(args=args)
+            built = find_distributions(build_dir, self.name, self.version)
+            if not built:
+                lgr.error("{0} did not build any distribution of {1} "
+                          "{2}".format(self.dist_type, self.name,
+                                       self.version))
+                sys.exit(1)
+            distributions = self._copy_to_dist_dir(built, dist_dir)
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+        if use_cache:
+            build_cache.put(key, distributions)
+        return distributions
+
+    def _copy_to_dist_dir(self, paths, dist_dir):
+        """Copies build files to dist_dir, replacing files of the same name
+        :return: list of paths in dist_dir
+        """
+        if not os.path.isdir(dist_dir):
+            os.makedirs(dist_dir)
+        distributions = []
+        for path in paths:
+            destination = os.path.join(dist_dir, os.path.basename(path))
+            shutil.copy2(path, destination)
+            distributions.append(destination)
+        return distributions
+
+    def upload(self, distributions=None):
         """Uploads a package to Pypi\TestPypi and verify it is available
-        :param target: pypi for live and pypitest for testpypi
+        The distributions are built first and then streamed to the index.
+        :param distributions: already built files to upload instead of
+        building them
         :return: None
         """
-        self._verify_and_inject_credentials()
-        args = ("setup.py", self.dist_type, "upload", "-r", self.target)
-        lgr.info(self._command(args=args))
+        distributions = distributions or self.build()
         try:
-            if self.is_package_of_specific_version_available_on_pypi(
-                    self.name, self.version):
-                lgr.info(
-                        "package {0} of version {1} is available on {2}".format(
-                                self.name, self.version, self.target))
+            self.upload_distributions(self._get_uploader(), distributions)
+        except UploadError as e:
+            lgr.error(e)
+            sys.exit(1)
+
+    def upload_distributions(self, uploader, distributions):
+        """Uploads built distributions concurrently and verifies that they
+        are available.
+        The project and version of every file are read from the file
+        itself, so already built files need no setup.py.
+        Files the index already has with the same sha256 are skipped, so a
+        retried release only sends what is missing. Every other file is
+        attempted even if another one fails. A summary per file is logged
+        and kept in upload_results.
+        :param uploader: Uploader for the target index
+        :param distributions: list of paths to distribution files
+        :return: True if verification succeeded
+        :raises: UploadError if any file could not be read or uploaded
+        """
+        get_session(self.upload_workers)
+        self.upload_results = []
+        with timing.span('inspect', files=len(distributions)):
+            inspected = map_concurrently(
+                lambda path: (read_release(path), file_digests(path)),
+                distributions, self.upload_workers)
+        releases = dict((path, release) for path, (release, _)
+                        in zip(distributions, inspected))
+        digests = dict((path, file_digest) for path, (_, file_digest)
+                       in zip(distributions, inspected))
+        missing = self._find_missing_distributions(distributions, releases,
+                                                   digests)
+        for distribution, result, error in imap_unordered(
+                lambda path: self._transfer(uploader, path, digests[path]),
+                missing, self.upload_workers):
+            summary = {
+                'filename': os.path.basename(distribution),
+                'target': self.target,
+                'status': 'uploaded' if error is None else 'failed',
+            }
+            if error is None:
+                summary.update(size=result.size, elapsed=result.elapsed,
+                               rate=result.rate)
             else:
-                lgr.warn(
-                        "The upload operation was completed successfully but "
-                        "verification has failed")
-        finally:
-            if self.cleanup_pypirc:
-                self._cleanup_injected_credentials()
+                summary['error'] = str(error)
+            self.upload_results.append(summary)
+        failed = []
+        for summary in sorted(self.upload_results,
+                              key=lambda s: s['filename']):
+            if summary['status'] == 'uploaded':
+                lgr.info("uploaded {filename} ({size} bytes) to {target} in "
+                         "{elapsed:.1f}s ({rate:.0f} bytes/s)".format(
+                             **summary))
+            elif summary['status'] == 'skipped':
+                lgr.info("skipped {filename}: {target} already has it with "
+                         "sha256 {sha256}".format(**summary))
+            else:
+                lgr.error("Failed to upload {filename} to {target}: "
+                          "{error}".format(**summary))
+                failed.append(summary['filename'])
+        if failed:
+            raise UploadError("{0} of {1} files failed to upload to {2}: "
+                              "{3}".format(len(failed), len(distributions),
+                                           self.target, ', '.join(failed)))
+        if self._wait_until_visible(dict(
+                (os.path.basename(path), partial(
+                    self.is_package_of_specific_version_available_on_pypi,
+                    releases[path][0], releases[path][1], refresh=True,
+                    filename=os.path.basename(path)))
+                for path in distributions)):
+            for name, version in sorted(set(releases.values())):
+                lgr.info(
+                    "package {0} of version {1} is available on {2}".format(
+                        name, version, self.target))
+            return True
+        lgr.warn(
+                "The upload operation was completed successfully but "
+                "verification has failed")
+        return False
+
+    def _transfer(self, uploader, path, digests):
+        """Uploads a single distribution file
+        :return: UploadResult
+        """
+        with timing.span('transfer', filename=os.path.basename(path),
+                         target=self.target) as attributes:
+            result = uploader.upload(
+                path, _ProgressLogger(path, self.target), digests)
+            attributes.update(size=result.size, rate=result.rate)
+            return result
+
+    def _find_missing_distributions(self, distributions, releases, digests):
+        """Compares local files with the digests the index publishes for
+        their versions.
+        Skipped files are recorded in upload_results.
+        :param distributions: list of paths to distribution files
+        :param releases: dict of path to the (name, version) of the file
+        :param digests: dict of path to the (md5, sha256) of the file
+        :return: list of the paths to upload
+        """
+        published = {}
+        for name, version in set(releases.values()):
+            published.update(self._published_digests(name, version))
+        missing = []
+        for path in distributions:
+            filename = os.path.basename(path)
+            sha256 = digests[path][1]
+            if published.get(filename) == sha256:
+                self.upload_results.append({
+                    'filename': filename,
+                    'target': self.target,
+                    'status': 'skipped',
+                    'sha256': sha256,
+                })
+                continue
+            if filename in published:
+                lgr.warn("{0} already exists on {1} with a different "
+                         "sha256".format(filename, self.target))
+            missing.append(path)
+        return missing
+
+    def _published_digests(self, name, version):
+        """Gets the sha256 of every file of a version on the index
+        :return: dict of filename to sha256. empty if the index can not
+        be read
+        """
+        index = get_project_index(self.index_url, name,
+                                  self.client.session, self.client.timeout,
+                                  self.auth)
+        try:
+            with timing.span('index_lookup', target=self.target):
+                index.refresh()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            lgr.warn("Unable to read published files from {0}, uploading "
+                     "all files: {1}".format(self.index_url, e))
+            return {}
+        return dict((f['filename'], (f.get('digests') or {}).get('sha256'))
+                    for f in index.files(version))
 
     def register(self):
         """Registers a package to Pypi or TestPypi and verify it is registered
         :param target: pypi for live and pypitest for testpypi
         :return: None
         """
-        self._verify_and_inject_credentials()
-        args = ("setup.py", "register", "-r", self.target)
-        lgr.info(self._command(args=args))
+        fields = metadata_from_setup(self.metadata)
+        uploader = self._get_uploader()
         try:
-            if self.is_package_of_specific_version_registered_on_pypi(
-                    self.name, self.version):
-                lgr.info(
-                        "package {0} of version {1} is registered on {2}".format(
-                                self.name, self.version, self.target))
-            else:
-                lgr.warn(
-                        "The register operation was completed successfully "
-                        "but verification has failed")
-        finally:
-            if self.cleanup_pypirc:
-                self._cleanup_injected_credentials()
+            with timing.span('register', target=self.target):
+                uploader.register(fields)
+        except UploadError as e:
+            lgr.error("Failed to register {0} {1}: {2}".format(
+                self.name, self.version, e))
+            sys.exit(1)
+        lgr.info("registered {0} {1} on {2}".format(
+            self.name, self.version, self.target))
+        if self._wait_until_visible({'registration': partial(
+                self.is_package_of_specific_version_registered_on_pypi,
+                self.name, self.version, refresh=True)}):
+            lgr.info(
+                    "package {0} of version {1} is registered on {2}".format(
+                            self.name, self.version, self.target))
+        else:
+            lgr.warn(
+                    "The register operation was completed successfully "
+                    "but verification has failed")
+
+    def _get_uploader(self):
+        """Creates an uploader with the credentials of target.
+        Credentials are resolved in memory, nothing is written to disk.
+        :return: Uploader
+        """
+        try:
+            with timing.span('credentials', target=self.target):
+                credentials = self.credential_provider.get(self.target)
+        except CredentialsError as e:
+            lgr.error(e)
+            sys.exit(1)
+        repository_url = self.repository_url or \
+            credentials.repository_url or REPOSITORIES.get(self.target)
+        if not repository_url:
+            lgr.error("No repository URL known for {0}".format(self.target))
+            sys.exit(1)
+        if self.auth is None and not is_public_repository(repository_url):
+            self.auth = (credentials.username, credentials.password)
+        return Uploader(repository_url, credentials.username,
+                        credentials.password,
+                        connect_timeout=self.client.timeout[0])
+
+    def _wait_until_visible(self, checks):
+        """Polls checks concurrently until they all pass or verify_timeout
+        has passed, to ride out propagation delays on the index.
+        Sets time_to_visible to the time the slowest check took to pass.
+        :param checks: dict of name to check callable
+        :return: True if all checks passed
+        """
+        with timing.span('verify', target=self.target, checks=sorted(checks)):
+            results = self.poller.poll_all(checks)
+        for result in results.values():
+            if result.visible:
+                lgr.info("{0} became visible on {1} after {2:.1f}s "
+                         "({3} checks)".format(result.name, self.target,
+                                               result.time_to_visible,
+                                               result.attempts))
+        if not all(result.visible for result in results.values()):
+            self.time_to_visible = None
+            return False
+        self.time_to_visible = max(
+            result.time_to_visible for result in results.values())
+        return True
 
     def _check_url(self, url):
         """Checks availability of a specific file for download
         :param url: URL to check
         :return: True or False based on availability
         """
+        return self.client.is_available(url, self.auth)
+
+    def _query_index(self, package_name, query, refresh, fallback_url):
+        """Answers a query from the project's release index.
+        The index is fetched once per project and shared by all queries.
+        If the index does not serve project JSON, fallback_url is probed.
+        :param package_name: package_name
+        :param query: callable receiving the ProjectIndex
+        :param refresh: revalidate the index before answering
+        :param fallback_url: URL to check when the index is not available
+        :return: tuple of the result of query (None on network errors) and
+        the bytes the index transferred for it
+        """
+        index = get_project_index(self.index_url, package_name,
+                                  self.client.session, self.client.timeout,
+                                  self.auth)
         try:
-            r = requests.get(url)
-        except requests.exceptions.ConnectionError as e:
+            if refresh:
+                index.refresh()
+            else:
+                index.ensure()
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code >= 500:
+                # the index is having trouble, not missing the JSON API
+                lgr.warn(e)
+                return None, 0
+            lgr.debug('falling back to {0}: {1}'.format(fallback_url, e))
+            return self._check_url(fallback_url), 0
+        except (requests.exceptions.RequestException, ValueError) as e:
             lgr.error(e)
-            return None
-        if 200 <= r.status_code < 300:
-            return True
-        else:
-            return False
+            return None, 0
+        return query(index), index.size
+
+    def _cached_query(self, kind, package_name, expected_version, query,
+                      refresh, fallback_url):
+        """Answers a query from the cross-run availability cache, or from
+        the index (see _query_index) on a miss.
+        Positive answers are stored forever, negative ones for
+        negative_ttl seconds, errors are not stored.
+        With refresh, only a cached positive answer is trusted.
+        :return: True, False or None on network errors
+        """
+        use_cache = cache_enabled()
+        key = '|'.join((kind, self.index_url.rstrip('/'),
+                        normalize_name(package_name), expected_version))
+        with timing.span('check', kind=kind, package=package_name,
+                         version=expected_version) as attributes:
+            if use_cache:
+                cached = availability_cache.get(key)
+                if cached or (cached is False and not refresh):
+                    attributes.update(cached=True, result=cached)
+                    return cached
+            result, cost = self._query_index(
+                package_name, query, refresh, fallback_url)
+            attributes.update(cached=False, result=result, bytes=cost)
+        if use_cache and result is not None:
+            availability_cache.set(
+                key, result, ttl=None if result else self.negative_ttl,
+                cost=cost)
+        return result
+
+    def _release_page_url(self, package_name, expected_version):
+        """Gets the page of a release on the index, checked when the index
+        does not serve project JSON
+        """
+        return "{0}/{1}/{2}".format(self.index_url.rstrip('/'), package_name,
+                                    expected_version)
 
     def is_package_of_specific_version_registered_on_pypi(
-            self, package_name, expected_version):
+            self, package_name, expected_version, refresh=False):
         """Is Package of specific version registered on Pypi?
         :param package_name: package_name
         :param expected_version: expected_version
+        :param refresh: revalidate cached index data first
         :return: True or False based on registration
         """
-        url = "https://{0}.python.org/pypi/{1}/{2}".format(
-                self.test_target, package_name, expected_version)
-        return self._check_url(url)
+        url = self._release_page_url(package_name, expected_version)
+        return self._cached_query(
+            'registered', package_name, expected_version,
+            lambda index: index.is_registered(expected_version), refresh, url)
 
     def is_package_of_specific_version_available_on_pypi(
-            self, package_name, expected_version):
+            self, package_name, expected_version, refresh=False,
+            filename=None):
         """Is Package of specific version available on Pypi?
         :param package_name: package_name
         :param expected_version: expected_version
+        :param refresh: revalidate cached index data first
+        :param filename: check for this distribution file specifically
         :return: True or False based on availability
         """
-        url = "https://{0}.python.org/packages/source/{3}/{1}/{1}-{2}.tar.gz" \
-              "".format(self.test_target, package_name, expected_version,
-                        package_name[0])
-        return self._check_url(url)
-
-    def _create_credentials_string(self):
-        """
-        Creates credentials string for temporary use
-        :return: file contents
-        """
-        if self.target == "pypi":
-            return PYPI_TEMPLATE.format(self.pypiuser,
-                                        self.pypipwd)
-        else:
-            return PYPITEST_TEMPLATE.format(self.pypiuser,
-                                            self.pypipwd)
-
-    def _verify_and_inject_credentials(self):
-        """Verify credentials exist or make best effort to retrieve them
-        If credentials were specified ~/.pypirc will be backed up and then
-        overwritten for the duration of tool use, afterwhich the original
-        file will be restored.
-        Otherwise a best effort will be made to use existing credentials from
-        ~/.pypirc, environment variables. If no credentials are found,
-        will exist with code 1
-        :return: None
-        """
-        if self.credentials:
-            if os.path.isfile(self.pypirc_file):
-                shutil.move(src=self.pypirc_file,
-                            dst=self.pypirc_backup_file)
-            with open(self.pypirc_file, 'w') as f:
-                f.write(self._create_credentials_string())
-            self.cleanup_pypirc = True
-        elif os.path.isfile(self.pypirc_file):
-            return
+        if is_public_repository(self.index_url):
+            url = "https://{0}.python.org/packages/source/{3}/{1}/{1}-{2}" \
+                  ".tar.gz".format(self.test_target, package_name,
+                                   expected_version, package_name[0])
         else:
-            self.pypiuser = os.getenv("PYPIUSER")
-            self.pypipwd = os.getenv("PYPIPWD")
-            self.cleanup_pypirc = True
-            if self.pypipwd and self.pypiuser:
-                with open(self.pypirc_file, 'w') as f:
-                    f.write(self._create_credentials_string())
-            else:
-                lgr.error("Unable to find credentials for Pypi. Please "
-                          "include one of the following:\n~/.pypirc file "
-                          "(see http://peterdowns.com/posts/first-time-with-"
-                          "pypi.html\n set environment variables PYPIUSER and "
-                          "PYPIPWD\ncall with credentials flag. crt pypi "
-                          "-c help for details")
-                sys.exit(1)
+            url = self._release_page_url(package_name, expected_version)
+        kind = 'available:' + filename if filename else 'available'
+        return self._cached_query(
+            kind, package_name, expected_version,
+            lambda index: index.is_available(expected_version, filename),
+            refresh, url)
 
-    def _cleanup_injected_credentials(self):
-        """remove injected credentials and restore original ones.
-        :return: None
-        """
-        if os.path.isfile(self.pypirc_backup_file):
-            shutil.move(src=self.pypirc_backup_file,
-                        dst=self.pypirc_file)
-        else:
-            os.remove(self.pypirc_file)
+
+class _ProgressLogger():
+    """Logs the progress of an upload in PROGRESS_STEP percent steps
+    """
+    def __init__(self, path, target):
+        self.filename = os.path.basename(path)
+        self.target = target
+        self.size = os.path.getsize(path)
+        self.reported = 0
+
+    def __call__(self, bytes_sent):
+        percent = bytes_sent * 100 // self.size if self.size else 100
+        step = percent - percent % PROGRESS_STEP
+        if step > self.reported and step < 100:
+            self.reported = step
+            lgr.info("uploading {0} to {1}: {2}%".format(
+                self.filename, self.target, step))
@@ -0,0 +1,104 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from collections import namedtuple
+
+from . import logger
+from . import timing
+from .concurrency import imap_unordered
+from .credentials import CredentialProvider, CredentialsError
+from .pypi_handler import PypiHandler, REPOSITORIES, is_public_repository
+from .uploader import Uploader
+
+lgr = logger.init()
+
+Target = namedtuple('Target',
+                    ['name', 'repository_url', 'username', 'password'])
+
+
+class ReleaseError(Exception):
+    pass
+
+
+def resolve_targets(names, credentials=None):
+    """Resolves repository names to upload targets.
+    A name is either pypi, pypitest, a section of ~/.pypirc or NAME=URL.
+    Credentials of each target are resolved by a CredentialProvider.
+    :param names: list of repository names
+    :param credentials: (user, password) to use for every target
+    :return: list of Target
+    """
+    provider = CredentialProvider(credentials)
+    targets = []
+    for name in names:
+        name, _, repository_url = name.partition('=')
+        try:
+            with timing.span('credentials', target=name):
+                target_credentials = provider.get(name)
+        except CredentialsError as e:
+            raise ReleaseError(str(e))
+        repository_url = repository_url or \
+            target_credentials.repository_url or REPOSITORIES.get(name)
+        if not repository_url:
+            raise ReleaseError('No repository URL known for {0}. Add it to '
+                               '{1} or pass {0}=URL'.format(
+                                   name, provider.pypirc_file))
+        targets.append(Target(name, repository_url,
+                              target_credentials.username,
+                              target_credentials.password))
+    return targets
+
+
+def release(path, targets, dist_type=None, distributions=None,
+            **handler_kwargs):
+    """Builds a package once and uploads it to several indexes at once.
+    Each target is uploaded to and verified in its own thread, so the
+    whole release takes about one build plus the slowest upload.
+    :param path: location of setup.py
+    :param targets: list of Target
+    :param dist_type: distribution type, or list of types, to build.
+    default is sdist
+    :param distributions: already built files to upload instead of building
+    :param handler_kwargs: extra arguments for each target's PypiHandler
+    :return: dict of target name to True if the upload was verified, False
+    if it was not, or the error that failed it
+    """
+    builder = PypiHandler(path, dist_type=dist_type, **handler_kwargs)
+    distributions = distributions or builder.build()
+
+    def upload_to(target):
+        auth = None if is_public_repository(target.repository_url) \
+            else (target.username, target.password)
+        pypi_handler = PypiHandler(path, target=target.name,
+                                   repository_url=target.repository_url,
+                                   auth=auth, **handler_kwargs)
+        uploader = Uploader(target.repository_url, target.username,
+                            target.password, session=builder.client.session)
+        try:
+            with timing.span('release', target=target.name):
+                return pypi_handler.upload_distributions(uploader,
+                                                         distributions)
+        except SystemExit as e:
+            # the handler logged why before exiting
+            raise ReleaseError('releasing to {0} failed with exit status '
+                               '{1}'.format(target.name, e.code))
+
+    results = {}
+    for target, verified, error in imap_unordered(upload_to, targets,
+                                                  workers=len(targets)):
+        if error is not None:
+            lgr.error(error)
+        results[target.name] = verified if error is None else error
+    return results
@@ -0,0 +1,224 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import re
+import threading
+from collections import namedtuple
+
+from . import logger
+from .concurrency import map_concurrently, DEFAULT_WORKERS
+from .markers import evaluate_marker, MarkerError
+from .versions import SpecifierSet, InvalidSpecifier
+
+lgr = logger.init()
+
+RequirementLine = namedtuple('RequirementLine', [
+    'name', 'requirement', 'marker', 'path', 'lineno', 'constraint'])
+
+Requirement = namedtuple('Requirement', [
+    'name', 'extras', 'specifier', 'url', 'marker'])
+
+_COMMENT = re.compile(r'(^|\s+)#.*$')
+_ENV_VAR = re.compile(r'\$\{([A-Z0-9_]+)\}')
+_INCLUDE = re.compile(
+    r'^(-r|--requirement|-c|--constraint)(?:\s*=\s*|\s+|(?<=-[rc]))(\S+)$')
+_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+_REQUIREMENT_PARTS = re.compile(r'''
+    ^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*
+    (?:\[(?P<extras>[^\]]*)\])?\s*
+    (?:@\s*(?P<url>\S+)\s*|\(?(?P<specifier>[^;()]*)\)?\s*)
+    (?:;\s*(?P<marker>.*?))?\s*$''', re.VERBOSE)
+
+# entries of a parsed file
+_REQUIREMENT = 'requirement'
+_REQUIREMENT_FILE = 'requirement file'
+_CONSTRAINT_FILE = 'constraint file'
+
+# parsed files by absolute path, kept as long as their mtime and size match
+_parsed = {}
+_parsed_lock = threading.Lock()
+
+
+class RequirementsError(Exception):
+    pass
+
+
+def requirement_name(requirement):
+    """Gets the project name of a requirement, e.g. requests for
+    requests[security]>=2.7
+    """
+    match = _NAME.match(requirement)
+    return match.group(1) if match else None
+
+
+def parse_requirement(text):
+    """Parses a requirement (PEP 508), e.g. requests[security]>=2.7
+    :return: Requirement
+    :raises: RequirementsError if the requirement is invalid
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    match = _REQUIREMENT_PARTS.match(text)
+    if not match:
+        raise RequirementsError('Invalid requirement: {0!r}'.format(text))
+    try:
+        specifier = SpecifierSet(match.group('specifier') or '')
+    except InvalidSpecifier as e:
+        raise RequirementsError('Invalid requirement {0!r}: {1}'.format(
+            text, e))
+    extras = tuple(e.strip() for e in (match.group('extras') or '').split(',')
+                   if e.strip())
+    return Requirement(match.group('name'), extras, specifier,
+                       match.group('url'), match.group('marker') or None)
+
+
+def is_locked(requirement):
+    """Is a requirement pinned to a single release (==X or ===X), or to a
+    URL?
+    """
+    try:
+        requirement = parse_requirement(requirement)
+    except RequirementsError:
+        return False
+    return bool(requirement.url) or requirement.specifier.is_pinned
+
+
+def _logical_lines(f):
+    """Joins continued lines and strips comments
+    :return: generator of (line number, line)
+    """
+    buffered = []
+    start = None
+    for lineno, line in enumerate(f, 1):
+        line = line.rstrip('\r\n')
+        if start is None:
+            start = lineno
+        if line.endswith('\\') and not line.lstrip().startswith('#'):
+            buffered.append(line[:-1])
+            continue
+        buffered.append(line)
+        logical = _COMMENT.sub('', ''.join(buffered)).strip()
+        if logical:
+            yield start, logical
+        buffered = []
+        start = None
+    if buffered:
+        logical = _COMMENT.sub('', ''.join(buffered)).strip()
+        if logical:
+            yield start, logical
+
+
+def _expand(line):
+    return _ENV_VAR.sub(lambda m: os.environ.get(m.group(1), m.group(0)),
+                        line)
+
+
+def _parse_file(path):
+    """Parses one requirements file, without following includes.
+    :return: list of (kind, value, marker, line number) tuples
+    """
+    try:
+        stat = os.stat(path)
+    except OSError as e:
+        raise RequirementsError('Unable to read {0}: {1}'.format(path, e))
+    signature = (stat.st_mtime, stat.st_size)
+    with _parsed_lock:
+        cached = _parsed.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+    entries = []
+    directory = os.path.dirname(path)
+    with open(path) as f:
+        for lineno, line in _logical_lines(f):
+            line = _expand(line)
+            include = _INCLUDE.match(line)
+            if include:
+                kind = _REQUIREMENT_FILE if include.group(1) in (
+                    '-r', '--requirement') else _CONSTRAINT_FILE
+                target = include.group(2)
+                if '://' in target:
+                    lgr.warn('{0}:{1}: skipping remote include {2}'.format(
+                        path, lineno, target))
+                    continue
+                entries.append((kind, os.path.abspath(
+                    os.path.join(directory, target)), None, lineno))
+                continue
+            if line.startswith('-'):
+                lgr.debug('{0}:{1}: skipping option {2}'.format(
+                    path, lineno, line))
+                continue
+            # per-requirement options such as --hash
+            line = re.split(r'\s--?\w', line, 1)[0].strip()
+            requirement, _, marker = line.partition(';')
+            entries.append((_REQUIREMENT, requirement.strip(),
+                            marker.strip() or None, lineno))
+    with _parsed_lock:
+        _parsed[path] = (signature, entries)
+    return entries
+
+
+def read_requirements(paths, environment=None, workers=DEFAULT_WORKERS):
+    """Reads requirements files along with the files they include with
+    -r and -c. The files of every level of includes are parsed
+    concurrently, and parsed files are kept until their mtime changes.
+    :param paths: list of requirements files
+    :param environment: values of marker variables. default is this
+    interpreter's. requirements whose marker is false are skipped
+    :param workers: maximum number of files parsed at once
+    :return: list of RequirementLine in file order, includes expanded in
+    place. requirements of constraint files have constraint set
+    :raises: RequirementsError if a file is missing or includes itself
+    """
+    roots = [os.path.abspath(p) for p in paths]
+    parsed = {}
+    frontier = roots
+    while frontier:
+        for path, entries in zip(frontier, map_concurrently(
+                _parse_file, frontier, workers)):
+            parsed[path] = entries
+        frontier = list(set(
+            value for entries in parsed.values()
+            for kind, value, _, _ in entries
+            if kind != _REQUIREMENT and value not in parsed))
+
+    lines = []
+    visited = set()
+
+    def walk(path, chain, constraint):
+        if path in chain:
+            raise RequirementsError('circular include: {0}'.format(
+                ' -> '.join(chain + [path])))
+        if (path, constraint) in visited:
+            return
+        visited.add((path, constraint))
+        for kind, value, marker, lineno in parsed[path]:
+            if kind == _REQUIREMENT:
+                try:
+                    if marker and not evaluate_marker(marker, environment):
+                        continue
+                except MarkerError as e:
+                    raise RequirementsError('{0}:{1}: {2}'.format(
+                        path, lineno, e))
+                lines.append(RequirementLine(
+                    requirement_name(value), value, marker, path, lineno,
+                    constraint))
+            else:
+                walk(value, chain + [path],
+                     constraint or kind == _CONSTRAINT_FILE)
+
+    for root in roots:
+        walk(root, [], False)
+    return lines
@@ -0,0 +1,139 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import sys
+import signal
+import logging
+import threading
+import subprocess
+
+from . import logger
+
+lgr = logger.init()
+
+PYTHON = sys.executable or 'python'
+DEFAULT_TIMEOUT = 3600
+# seconds to wait for the output of a killed command. children which left
+# its process group may keep the pipes open forever
+KILLED_OUTPUT_TIMEOUT = 5
+
+
+class CommandError(Exception):
+    def __init__(self, message, returncode=None):
+        Exception.__init__(self, message)
+        self.returncode = returncode
+
+
+def _pump(stream, level, lines):
+    for line in iter(stream.readline, b''):
+        line = line.decode('utf-8', 'replace').rstrip('\r\n')
+        if lines is not None:
+            lines.append(line)
+        lgr.log(level, line)
+    stream.close()
+
+
+def _process_group_kwargs():
+    """Popen arguments starting the command in a process group of its own,
+    so that it can be killed along with the processes it started
+    """
+    if os.name != 'posix':
+        return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+    if sys.version_info[0] >= 3:
+        return {'start_new_session': True}
+    return {'preexec_fn': os.setsid}
+
+
+def _kill(process):
+    """Kills a command started by run and every process in its group
+    """
+    if os.name == 'posix':
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    try:
+        process.kill()
+    except OSError:
+        pass
+
+
+def run(args, cwd=None, timeout=DEFAULT_TIMEOUT, level=logging.INFO,
+        env=None, name=None):
+    """Runs a command and waits for it to finish.
+    The working directory is given to the child process only, so this is
+    safe to call from several threads at once. stdout and stderr are
+    logged line by line as they arrive.
+    :param args: command and its arguments
+    :param cwd: directory to run the command in. default is the current one
+    :param timeout: seconds after which the command and every process it
+    started are killed. None waits forever
+    :param level: log level of the command's output
+    :param env: environment of the command. default is this process's
+    :param name: name of the command in errors. default is the command line
+    :return: stdout of the command
+    :raises: CommandError if the command could not run, failed or timed out
+    """
+    command = name or ' '.join(args)
+    try:
+        process = subprocess.Popen(args, cwd=cwd or None, env=env,
+                                   stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE,
+                                   **_process_group_kwargs())
+    except OSError as e:
+        raise CommandError('Failed to run {0}: {1}'.format(command, e))
+    output = []
+    pumps = [
+        threading.Thread(target=_pump, args=(process.stdout, level, output)),
+        threading.Thread(target=_pump, args=(process.stderr, level, None)),
+    ]
+    for pump in pumps:
+        pump.daemon = True
+        pump.start()
+    timed_out = []
+    timer = None
+    if timeout is not None:
+        def kill():
+            timed_out.append(True)
+            _kill(process)
+        timer = threading.Timer(timeout, kill)
+        timer.daemon = True
+        timer.start()
+    try:
+        process.wait()
+    except BaseException:
+        # the command is not in our process group, so it would outlive us
+        _kill(process)
+        raise
+    finally:
+        if timer:
+            timer.cancel()
+    for pump in pumps:
+        pump.join(KILLED_OUTPUT_TIMEOUT if timed_out else None)
+    if timed_out:
+        raise CommandError('{0} timed out after {1}s'.format(
+            command, timeout))
+    if process.returncode:
+        raise CommandError('{0} failed with exit code {1}'.format(
+            command, process.returncode), process.returncode)
+    return '\n'.join(output)
+
+
+def run_python(args, **kwargs):
+    """Runs the python interpreter depypi runs on (see run)
+    """
+    return run([PYTHON] + list(args), **kwargs)
@@ -0,0 +1,266 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import ast
+
+try:
+    import ConfigParser as configparser
+except ImportError:
+    import configparser
+
+try:
+    import tomllib as toml
+except ImportError:
+    try:
+        import tomli as toml
+    except ImportError:
+        try:
+            import toml
+        except ImportError:
+            toml = None
+
+from . import logger
+
+lgr = logger.init()
+
+SETUP_FILE = 'setup.py'
+SETUP_CFG_FILE = 'setup.cfg'
+PYPROJECT_FILE = 'pyproject.toml'
+
+DEPENDENCY_FIELDS = ('install_requires', 'extras_require', 'setup_requires',
+                     'build_requires')
+
+# methods which change a list or dict in place
+_MUTATORS = ('append', 'extend', 'insert', 'update', 'setdefault', 'pop',
+             'remove')
+
+
+class _Dynamic(Exception):
+    """Dependencies can only be known by running setup.py
+    """
+
+
+def get_static_dependencies(path=''):
+    """Reads the dependencies of a package without running any of its code.
+    setup.cfg is read first, then the setup() call of setup.py, whose
+    arguments may be literals or module level variables holding literals,
+    and finally the [project] and [build-system] tables of pyproject.toml.
+    The requires of [build-system] are kept apart in build_requires.
+    :param path: location of setup.py
+    :return: dict of DEPENDENCY_FIELDS, or None if there is no setup.py or
+    the dependencies are computed when setup.py runs
+    """
+    dependencies = {
+        'install_requires': [],
+        'extras_require': {},
+        'setup_requires': [],
+        'build_requires': [],
+    }
+    try:
+        dependencies.update(
+            _from_setup_cfg(os.path.join(path, SETUP_CFG_FILE)))
+        dependencies.update(_from_setup_py(os.path.join(path, SETUP_FILE)))
+        pyproject = _from_pyproject(os.path.join(path, PYPROJECT_FILE))
+    except _Dynamic as e:
+        lgr.debug('dependencies of {0} are dynamic: {1}'.format(
+            path or '.', e))
+        return None
+    dependencies.update(pyproject)
+    return dependencies
+
+
+def _requirement_list(value):
+    """Normalizes a requirements value, which setuptools accepts as a
+    list or as a string with one requirement per line
+    """
+    if hasattr(value, 'splitlines'):
+        value = value.splitlines()
+    elif not isinstance(value, (list, tuple)):
+        raise _Dynamic('requirements are a {0}'.format(type(value).__name__))
+    requirements = []
+    for line in value:
+        if not hasattr(line, 'strip'):
+            raise _Dynamic('requirement is a {0}'.format(
+                type(line).__name__))
+        line = line.split(' #', 1)[0].strip()
+        if line and not line.startswith('#'):
+            requirements.append(line)
+    return requirements
+
+
+def _extras(value):
+    if not isinstance(value, dict):
+        raise _Dynamic('extras_require is a {0}'.format(
+            type(value).__name__))
+    return dict((extra, _requirement_list(requirements))
+                for extra, requirements in value.items())
+
+
+def _from_setup_cfg(path):
+    config = configparser.RawConfigParser()
+    if not config.read(path):
+        return {}
+    directory = os.path.dirname(path)
+    dependencies = {}
+    for field in ('install_requires', 'setup_requires'):
+        if config.has_option('options', field):
+            dependencies[field] = _cfg_list(
+                config.get('options', field), directory)
+    if config.has_section('options.extras_require'):
+        dependencies['extras_require'] = dict(
+            (extra, _cfg_list(value, directory))
+            for extra, value in config.items('options.extras_require'))
+    return dependencies
+
+
+def _cfg_list(value, directory):
+    """Reads a setup.cfg list, one item per line, or the files a
+    file: directive names
+    """
+    value = value.strip()
+    if not value.startswith('file:'):
+        return _requirement_list(value)
+    requirements = []
+    for name in value[len('file:'):].split(','):
+        try:
+            with open(os.path.join(directory, name.strip())) as f:
+                requirements.extend(_requirement_list(f.read()))
+        except IOError as e:
+            raise _Dynamic(str(e))
+    return requirements
+
+
+def _from_pyproject(path):
+    try:
+        with open(path) as f:
+            source = f.read()
+    except IOError:
+        return {}
+    if toml is None:
+        if '[project]' in source:
+            raise _Dynamic('no TOML parser to read {0}'.format(path))
+        return {}
+    try:
+        data = toml.loads(source)
+    except Exception as e:
+        raise _Dynamic('failed to parse {0}: {1}'.format(path, e))
+    dependencies = {}
+    project = data.get('project', {})
+    dynamic = project.get('dynamic', [])
+    if 'dependencies' in project and 'dependencies' not in dynamic:
+        dependencies['install_requires'] = _requirement_list(
+            project['dependencies'])
+    if 'optional-dependencies' in project and \
+            'optional-dependencies' not in dynamic:
+        dependencies['extras_require'] = _extras(
+            project['optional-dependencies'])
+    dependencies['build_requires'] = _requirement_list(
+        data.get('build-system', {}).get('requires', []))
+    return dependencies
+
+
+def _from_setup_py(path):
+    try:
+        with open(path) as f:
+            source = f.read()
+    except IOError as e:
+        raise _Dynamic(str(e))
+    try:
+        tree = ast.parse(source, path)
+    except SyntaxError as e:
+        raise _Dynamic(str(e))
+    call = _find_setup_call(tree)
+    if call is None:
+        raise _Dynamic('no setup() call found')
+    if getattr(call, 'kwargs', None) is not None or \
+            any(k.arg is None for k in call.keywords):
+        raise _Dynamic('setup() is called with **kwargs')
+    names = _Names(tree)
+    dependencies = {}
+    for keyword in call.keywords:
+        if keyword.arg in ('install_requires', 'setup_requires'):
+            dependencies[keyword.arg] = _requirement_list(
+                names.evaluate(keyword.value))
+        elif keyword.arg == 'extras_require':
+            dependencies[keyword.arg] = _extras(
+                names.evaluate(keyword.value))
+    return dependencies
+
+
+def _find_setup_call(tree):
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call):
+            continue
+        func = node.func
+        if isinstance(func, ast.Name) and func.id == 'setup' or \
+                isinstance(func, ast.Attribute) and func.attr == 'setup':
+            return node
+    return None
+
+
+class _Names():
+    def __init__(self, tree):
+        """Module level variables of a setup.py which are assigned exactly
+        once and never changed in place, so their value is known statically
+        """
+        self.values = {}
+        assignments = {}
+        changed = set()
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Assign):
+                for target in node.targets:
+                    for name in ast.walk(target):
+                        if isinstance(name, ast.Name):
+                            assignments[name.id] = \
+                                assignments.get(name.id, 0) + 1
+            elif isinstance(node, ast.AugAssign) and \
+                    isinstance(node.target, ast.Name):
+                changed.add(node.target.id)
+            elif isinstance(node, ast.Call) and \
+                    isinstance(node.func, ast.Attribute) and \
+                    isinstance(node.func.value, ast.Name) and \
+                    node.func.attr in _MUTATORS:
+                changed.add(node.func.value.id)
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and len(node.targets) == 1 and \
+                    isinstance(node.targets[0], ast.Name):
+                name = node.targets[0].id
+                if assignments[name] == 1 and name not in changed:
+                    self.values[name] = node.value
+
+    def evaluate(self, node, depth=0):
+        """Evaluates literals, known variables and their concatenation
+        """
+        if depth > 20:
+            raise _Dynamic('variables nest too deep')
+        if isinstance(node, ast.Name) and node.id in self.values:
+            return self.evaluate(self.values[node.id], depth + 1)
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add):
+            return self.evaluate(node.left, depth + 1) + \
+                self.evaluate(node.right, depth + 1)
+        if isinstance(node, (ast.List, ast.Tuple)):
+            return [self.evaluate(e, depth + 1) for e in node.elts]
+        if isinstance(node, ast.Dict):
+            if None in node.keys:
+                raise _Dynamic('line {0} unpacks a dict'.format(node.lineno))
+            return dict((self.evaluate(k, depth + 1),
+                         self.evaluate(v, depth + 1))
+                        for k, v in zip(node.keys, node.values))
+        try:
+            return ast.literal_eval(node)
+        except (ValueError, TypeError):
+            raise _Dynamic('line {0} is not a literal'.format(
+                getattr(node, 'lineno', '?')))
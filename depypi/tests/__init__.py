@@ -1 +1,133 @@
 __author__ = 'heathenasparagus'
+
+import os
+import io
+import atexit
+import shutil
+import tarfile
+import zipfile
+import tempfile
+
+import testtools
+
+# depypi's caches and its log file pick their location when the modules
+# are imported, so they are pointed at a scratch directory before any test
+# imports them. the fake index listens on localhost, which must never go
+# through a proxy
+_scratch = tempfile.mkdtemp(prefix='depypi-tests-')
+atexit.register(shutil.rmtree, _scratch, True)
+os.environ['DEPYPI_CACHE_DIR'] = os.path.join(_scratch, 'cache')
+os.environ['DEPYPI_LOG_FILE'] = os.path.join(_scratch, 'depypi.log')
+os.environ['NO_PROXY'] = os.environ['no_proxy'] = '127.0.0.1,localhost'
+
+CREDENTIALS = ('user', 'password')
+
+SETUP_PY = '''from setuptools import setup
+
+setup(
+    name={name!r},
+    version={version!r},
+    description='depypi test package',
+    py_modules=[{module!r}],
+    install_requires={install_requires!r},
+)
+'''
+
+
+class TestCase(testtools.TestCase):
+    def make_dir(self):
+        """Creates a directory which is removed after the test
+        """
+        path = tempfile.mkdtemp(prefix='depypi-test-')
+        self.addCleanup(shutil.rmtree, path, True)
+        return path
+
+    def write_file(self, path, content=''):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'w') as f:
+            f.write(content)
+        return path
+
+    def set_env(self, name, value):
+        """Sets an environment variable for the duration of the test.
+        None unsets it
+        """
+        original = os.environ.get(name)
+        self.addCleanup(self._restore_env, name, original)
+        self._restore_env(name, value)
+
+    @staticmethod
+    def _restore_env(name, value):
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+
+    def disable_cache(self):
+        self.set_env('DEPYPI_NO_CACHE', '1')
+
+    def reset_indexes(self):
+        """Forgets the projects and versions memoized by earlier tests,
+        whose fake indexes may have listened on the same port
+        """
+        from depypi import index
+        with index._indexes_lock:
+            index._indexes.clear()
+        with index._versions_lock:
+            index._versions.clear()
+
+    def start_index(self, **kwargs):
+        """Starts a FakeIndex which is stopped after the test
+        """
+        from depypi.fakeindex import FakeIndex
+        fake_index = FakeIndex(**kwargs).start()
+        self.addCleanup(fake_index.stop)
+        return fake_index
+
+    def make_package(self, name='fake-pkg', version='1.0',
+                     install_requires=()):
+        """Writes a package with a setup.py
+        :return: path of the package
+        """
+        path = os.path.join(self.make_dir(), name)
+        module = name.replace('-', '_')
+        self.write_file(os.path.join(path, 'setup.py'), SETUP_PY.format(
+            name=name, version=version, module=module,
+            install_requires=list(install_requires)))
+        self.write_file(os.path.join(path, module + '.py'), 'VALUE = 1\n')
+        return path
+
+
+def pkg_info(name, version, requires_dist=()):
+    lines = ['Metadata-Version: 2.1', 'Name: ' + name, 'Version: ' + version,
+             'Summary: depypi test package']
+    lines.extend('Requires-Dist: ' + r for r in requires_dist)
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def make_sdist(directory, name='fake-pkg', version='1.0', **kwargs):
+    """Writes an sdist with a PKG-INFO, without running setup.py
+    :return: path of the sdist
+    """
+    base = '{0}-{1}'.format(name, version)
+    path = os.path.join(directory, base + '.tar.gz')
+    content = pkg_info(name, version, **kwargs)
+    with tarfile.open(path, 'w:gz') as archive:
+        info = tarfile.TarInfo(base + '/PKG-INFO')
+        info.size = len(content)
+        archive.addfile(info, io.BytesIO(content))
+    return path
+
+
+def make_wheel(directory, name='fake-pkg', version='1.0', **kwargs):
+    """Writes a wheel with a METADATA, without running setup.py
+    :return: path of the wheel
+    """
+    base = '{0}-{1}'.format(name.replace('-', '_'), version)
+    path = os.path.join(directory, base + '-py2.py3-none-any.whl')
+    with zipfile.ZipFile(path, 'w') as archive:
+        archive.writestr(base + '.dist-info/METADATA',
+                         pkg_info(name, version, **kwargs))
+    return path
@@ -0,0 +1,84 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+
+from depypi.tests import TestCase
+from depypi.batch import read_pairs, check_pairs
+
+
+class _Handler():
+    target = 'fake'
+
+    def __init__(self):
+        self.checked = []
+        self._lock = threading.Lock()
+
+    def _check(self, kind, name, version):
+        with self._lock:
+            self.checked.append((kind, name, version))
+        if name == 'broken':
+            raise ValueError('broken index')
+        return version == '1.0'
+
+    def is_package_of_specific_version_available_on_pypi(self, name,
+                                                         version):
+        return self._check('available', name, version)
+
+    def is_package_of_specific_version_registered_on_pypi(self, name,
+                                                          version):
+        return self._check('registered', name, version)
+
+
+class TestBatch(TestCase):
+
+    def test_read_pairs(self):
+        lines = ['a==1.0\n', '  b == 2.0  # comment\n', '\n', '# c==3.0\n',
+                 'd>=1.0\n', 'e==\n']
+        self.assertEqual([('a', '1.0'), ('b', '2.0')],
+                         list(read_pairs(lines)))
+
+    def test_read_pairs_decodes_bytes(self):
+        self.assertEqual([('a', '1.0')], list(read_pairs([b'a==1.0\n'])))
+        self.assertRaises(UnicodeDecodeError, list,
+                          read_pairs([b'a==1.0\n', b'\xff\xfe==1.0\n']))
+
+    def test_check_pairs(self):
+        handler = _Handler()
+        results = list(check_pairs(
+            handler, [('a', '1.0'), ('b', '2.0'), ('broken', '1.0')],
+            workers=2))
+        self.assertEqual([
+            {'name': 'a', 'version': '1.0', 'target': 'fake',
+             'available': True, 'error': None},
+            {'name': 'b', 'version': '2.0', 'target': 'fake',
+             'available': False, 'error': None},
+            {'name': 'broken', 'version': '1.0', 'target': 'fake',
+             'available': None, 'error': 'broken index'},
+        ], sorted(results, key=lambda r: r['name']))
+
+    def test_check_registered(self):
+        handler = _Handler()
+        results = list(check_pairs(handler, [('a', '1.0')], registered=True))
+        self.assertTrue(results[0]['registered'])
+        self.assertEqual([('registered', 'a', '1.0')], handler.checked)
+
+    def test_pairs_are_consumed_lazily(self):
+        handler = _Handler()
+        pairs = (('p{0}'.format(n), '1.0') for n in range(10000))
+        results = check_pairs(handler, pairs, workers=4)
+        for _ in range(10):
+            next(results)
+        self.assertLess(len(handler.checked), 100)
@@ -0,0 +1,83 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from depypi.tests import TestCase
+from depypi import benchmark
+from depypi.cache import CACHE_DIR_ENV
+from depypi.benchmark import find_regressions, make_package, seed_graph
+from depypi.version_checker import VersionChecker
+
+
+class TestWorkload(TestCase):
+
+    def setUp(self):
+        super(TestWorkload, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index()
+        seed_graph(self.index, 7)
+
+    def test_packages_resolve_against_the_seeded_graph(self):
+        path = make_package(self.make_dir(), 3)
+        checker = VersionChecker(path, 'requirements.txt')
+        self.assertEqual(['bench-dep-0', 'bench-dep-1>=1.0',
+                          'bench-dep-3>=1.0', 'bench-dep-2==1.1'],
+                         checker.get_all_dependencies())
+        graph = checker.get_all_sub_dependencies(index_url=self.index.url,
+                                                 workers=4)
+        self.assertEqual({}, graph.unresolved)
+        self.assertEqual(['bench-dep-{0}==1.1'.format(n) for n in range(7)],
+                         sorted(graph.nodes))
+        self.assertEqual(['bench-dep-1==1.1', 'bench-dep-2==1.1'],
+                         sorted(r['node'] for r in
+                                graph.nodes['bench-dep-0==1.1']['requires']))
+
+
+class TestRunBenchmarks(TestCase):
+
+    def test_restores_the_cache_directory(self):
+        self.patch(benchmark, 'measure_startup', lambda repeat: {})
+        cache_dir = os.environ.get(CACHE_DIR_ENV)
+        report = benchmark.run_benchmarks(packages=2, repeat=1, workers=2,
+                                          graph_size=3, quiet=True)
+        self.assertEqual(cache_dir, os.environ.get(CACHE_DIR_ENV))
+        self.assertEqual(
+            set(benchmark.PHASES),
+            set(r['phase'] for r in report['results']
+                if r['scenario'] == 'batch' and r['cache'] == 'warm'))
+
+
+class TestResults(TestCase):
+
+    def test_summary(self):
+        self.assertEqual({'runs': [3, 1, 2], 'min': 1, 'median': 2,
+                          'mean': 2, 'max': 3},
+                         benchmark._summary([3, 1, 2]))
+        self.assertEqual(2.5, benchmark._summary([1, 4, 2, 3])['median'])
+
+    def test_find_regressions(self):
+        def report(**medians):
+            return {'results': [
+                {'scenario': 'single', 'cache': 'cold', 'phase': phase,
+                 'median': median} for phase, median in medians.items()]}
+        self.assertEqual(
+            [{'scenario': 'single', 'cache': 'cold', 'phase': 'upload',
+              'baseline': 1.0, 'median': 1.5}],
+            find_regressions(report(build=1.0, upload=1.0),
+                             report(build=1.1, upload=1.5, check=9.0)))
+        self.assertEqual([], find_regressions(
+            report(upload=1.0), report(upload=1.5), tolerance=0.6))
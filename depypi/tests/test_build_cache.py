@@ -0,0 +1,142 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from depypi.tests import TestCase
+from depypi import build_cache
+from depypi import cache
+from depypi.build_cache import BuildCache, source_files, tree_hash, build_key
+
+
+class TestSourceFiles(TestCase):
+
+    def setUp(self):
+        super(TestSourceFiles, self).setUp()
+        self.path = self.make_dir()
+        for name in ('setup.py', 'pkg/__init__.py', 'pkg/data.json',
+                     'pkg/mod.pyc', 'dist/pkg-1.0.tar.gz', '.git/HEAD',
+                     'pkg.egg-info/PKG-INFO', 'docs/index.rst',
+                     'notes.log', 'keep.log'):
+            self.write_file(os.path.join(self.path, name), name)
+
+    def files(self):
+        return sorted(f for f, _ in source_files(self.path))
+
+    def test_skips_build_output_and_version_control(self):
+        self.assertEqual(['docs/index.rst', 'keep.log', 'notes.log',
+                          'pkg/__init__.py', 'pkg/data.json', 'setup.py'],
+                         self.files())
+
+    def test_gitignore_and_manifest(self):
+        self.write_file(os.path.join(self.path, '.gitignore'),
+                        '*.log\n!keep.log\n/docs/\n')
+        self.write_file(os.path.join(self.path, 'MANIFEST.in'),
+                        'global-exclude *.json\ninclude notes.log\n')
+        self.assertEqual(['.gitignore', 'MANIFEST.in', 'keep.log',
+                          'notes.log', 'pkg/__init__.py', 'setup.py'],
+                         self.files())
+
+    def test_manifest_prune(self):
+        self.write_file(os.path.join(self.path, 'MANIFEST.in'), 'prune pkg\n')
+        self.assertNotIn('pkg/__init__.py', self.files())
+
+    def test_symlinks(self):
+        if not hasattr(os, 'symlink'):
+            self.skipTest('symlinks are not supported')
+        os.symlink(os.path.join(self.path, 'pkg'),
+                   os.path.join(self.path, 'linked'))
+        os.symlink(self.path, os.path.join(self.path, 'pkg', 'loop'))
+        os.symlink(os.path.join(self.path, 'missing'),
+                   os.path.join(self.path, 'dangling'))
+        files = self.files()
+        self.assertIn('linked/__init__.py', files)
+        self.assertIn('dangling', files)
+        self.assertFalse([f for f in files if 'loop' in f])
+        # dangling links are hashed by their target
+        digest = tree_hash(self.path)
+        os.remove(os.path.join(self.path, 'dangling'))
+        os.symlink(os.path.join(self.path, 'other'),
+                   os.path.join(self.path, 'dangling'))
+        self.assertNotEqual(digest, tree_hash(self.path))
+
+
+class TestTreeHash(TestCase):
+
+    def setUp(self):
+        super(TestTreeHash, self).setUp()
+        self.patch(build_cache, '_tree_stats', cache.FileCache('tree-stats'))
+        build_cache._tree_stats.directory = self.make_dir()
+        self.path = self.make_dir()
+        self.setup_py = self.write_file(
+            os.path.join(self.path, 'setup.py'), 'setup()\n')
+
+    def test_changes_with_content(self):
+        digest = tree_hash(self.path)
+        self.assertEqual(digest, tree_hash(self.path))
+        self.write_file(self.setup_py, 'setup(name="a")\n')
+        self.assertNotEqual(digest, tree_hash(self.path))
+        self.write_file(os.path.join(self.path, 'dist', 'a-1.0.tar.gz'))
+        self.assertEqual(tree_hash(self.path), tree_hash(self.path))
+
+    def test_unchanged_files_are_not_read_again(self):
+        old = time.time() - 60
+        os.utime(self.setup_py, (old, old))
+        digest = tree_hash(self.path)
+        reads = []
+        self.patch(build_cache, '_file_sha256', reads.append)
+        self.assertEqual(digest, tree_hash(self.path))
+        self.assertEqual([], reads)
+
+    def test_build_key(self):
+        self.assertNotEqual(build_key(self.path, ['sdist']),
+                            build_key(self.path, ['sdist', 'bdist_wheel']))
+
+
+class TestBuildCache(TestCase):
+
+    def setUp(self):
+        super(TestBuildCache, self).setUp()
+        self.set_env(cache.CACHE_DIR_ENV, self.make_dir())
+        self.dist_dir = self.make_dir()
+
+    def build(self, name, size=10):
+        return self.write_file(os.path.join(self.dist_dir, name), 'x' * size)
+
+    def test_put_and_get(self):
+        builds = BuildCache()
+        self.assertIsNone(builds.get('key'))
+        builds.put('key', [self.build('a-1.0.tar.gz'),
+                           self.build('a-1.0-py3-none-any.whl')])
+        files = builds.get('key')
+        self.assertEqual(['a-1.0-py3-none-any.whl', 'a-1.0.tar.gz'],
+                         [os.path.basename(f) for f in files])
+        self.assertTrue(all(os.path.isfile(f) for f in files))
+
+    def test_evicts_least_recently_used(self):
+        builds = BuildCache(max_size=25)
+        builds.put('old', [self.build('a-1.0.tar.gz')])
+        old = time.time() - 60
+        os.utime(os.path.join(builds.directory, 'old'), (old, old))
+        builds.put('new', [self.build('a-1.1.tar.gz')])
+        builds.put('newer', [self.build('a-1.2.tar.gz')])
+        self.assertIsNone(builds.get('old'))
+        self.assertIsNotNone(builds.get('newer'))
+
+    def test_failing_to_store_is_not_fatal(self):
+        builds = BuildCache()
+        builds.put('key', [os.path.join(self.dist_dir, 'missing')])
+        self.assertIsNone(builds.get('key'))
@@ -0,0 +1,92 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from depypi.tests import TestCase
+from depypi import cache
+from depypi.cache import FileCache
+
+
+class TestFileCache(TestCase):
+
+    def setUp(self):
+        super(TestFileCache, self).setUp()
+        self.set_env(cache.CACHE_DIR_ENV, self.make_dir())
+
+    def test_get_and_set(self):
+        file_cache = FileCache('test')
+        self.assertIsNone(file_cache.get('key'))
+        file_cache.set('key', {'versions': ['1.0']}, cost=100)
+        self.assertEqual({'versions': ['1.0']}, file_cache.get('key'))
+        self.assertEqual({'versions': ['1.0']}, FileCache('test').get('key'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'hit_rate': 0.5,
+                          'bytes_saved': 100}, file_cache.stats())
+
+    def test_directory(self):
+        self.assertEqual(
+            os.path.join(os.environ[cache.CACHE_DIR_ENV], 'test'),
+            FileCache('test').directory)
+
+    def test_ttl(self):
+        file_cache = FileCache('test')
+        file_cache.set('expired', True, ttl=-1)
+        file_cache.set('fresh', False, ttl=60)
+        self.assertIsNone(file_cache.get('expired'))
+        self.assertIs(False, file_cache.get('fresh'))
+
+    def test_delete(self):
+        file_cache = FileCache('test')
+        file_cache.set('key', 1)
+        file_cache.delete('key')
+        file_cache.delete('key')
+        self.assertIsNone(file_cache.get('key'))
+
+    def test_corrupt_entries_are_misses(self):
+        file_cache = FileCache('test')
+        file_cache.set('key', 1)
+        with open(file_cache._entry_path('key'), 'w') as f:
+            f.write('{"val')
+        self.assertIsNone(file_cache.get('key'))
+
+    def test_unwritable_cache_is_not_fatal(self):
+        self.write_file(os.path.join(os.environ[cache.CACHE_DIR_ENV],
+                                     'test'))
+        file_cache = FileCache('test')
+        file_cache.set('key', 1)
+        self.assertIsNone(file_cache.get('key'))
+
+    def test_evicts_least_recently_used(self):
+        file_cache = FileCache('test', max_size=300)
+        for number in range(cache.EVICT_INTERVAL + 1):
+            file_cache.set(str(number), 'x' * 50)
+            path = file_cache._entry_path(str(number))
+            os.utime(path, (time.time() - 1000 + number,) * 2)
+        self.assertIsNone(file_cache.get('0'))
+        self.assertIsNotNone(file_cache.get(str(cache.EVICT_INTERVAL)))
+        size = sum(os.path.getsize(os.path.join(file_cache.directory, f))
+                   for f in os.listdir(file_cache.directory))
+        self.assertLessEqual(size, 300 + 100)
+
+    def test_cache_enabled(self):
+        self.set_env(cache.DISABLE_CACHE_ENV, None)
+        self.assertTrue(cache.cache_enabled())
+        self.set_env(cache.DISABLE_CACHE_ENV, '1')
+        self.assertFalse(cache.cache_enabled())
+
+    def test_hash_key(self):
+        self.assertEqual(cache.hash_key('a', b'b'), cache.hash_key(u'a', 'b'))
+        self.assertNotEqual(cache.hash_key('ab', ''), cache.hash_key('a', 'b'))
@@ -0,0 +1,97 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import requests
+
+from depypi.tests import TestCase, CREDENTIALS
+from depypi import client
+from depypi.client import VerificationClient, get_session
+
+
+class _Response():
+    def __init__(self, method, status_code):
+        self.request = requests.Request(method, 'http://index').prepare()
+        self.status_code = status_code
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class _Session():
+    """Answers HEAD with 405, like servers without HEAD support
+    """
+    def __init__(self):
+        self.requests = []
+
+    def head(self, url, **kwargs):
+        self.requests.append(('HEAD', kwargs))
+        return _Response('HEAD', 405)
+
+    def get(self, url, **kwargs):
+        self.requests.append(('GET', kwargs))
+        self.response = _Response('GET', 206)
+        return self.response
+
+
+class TestVerificationClient(TestCase):
+
+    def test_check(self):
+        index = self.start_index()
+        index.add_release('fake-pkg', '1.0')
+        verification_client = VerificationClient()
+        result = verification_client.check(index.url + '/fake-pkg/json')
+        self.assertEqual('HEAD', result.method)
+        self.assertEqual(200, result.status_code)
+        self.assertTrue(result.available)
+        self.assertFalse(verification_client.is_available(
+            index.url + '/missing/json'))
+        self.assertEqual(2, len(verification_client.timings))
+
+    def test_check_with_auth(self):
+        index = self.start_index(credentials=CREDENTIALS, private=True)
+        index.add_release('fake-pkg', '1.0')
+        url = index.url + '/fake-pkg/json'
+        verification_client = VerificationClient()
+        self.assertFalse(verification_client.is_available(url))
+        self.assertTrue(verification_client.is_available(url, CREDENTIALS))
+
+    def test_falls_back_to_a_ranged_get(self):
+        session = _Session()
+        result = VerificationClient(session=session).check('http://index')
+        self.assertEqual('GET', result.method)
+        self.assertTrue(result.available)
+        self.assertEqual(['HEAD', 'GET'], [m for m, _ in session.requests])
+        get_kwargs = session.requests[1][1]
+        self.assertEqual({'Range': 'bytes=0-0'}, get_kwargs['headers'])
+        self.assertTrue(get_kwargs['stream'])
+        self.assertTrue(session.response.closed)
+
+    def test_network_errors(self):
+        index = self.start_index()
+        url = index.url + '/fake-pkg/json'
+        index.stop()
+        self.assertIsNone(VerificationClient(connect_timeout=1)
+                          .is_available(url))
+
+
+class TestGetSession(TestCase):
+
+    def test_shared_session_grows_its_pool(self):
+        session = get_session()
+        self.assertIs(session, get_session(client._session_pool_size + 10))
+        adapter = session.get_adapter('http://index')
+        self.assertEqual(client._session_pool_size,
+                         adapter._pool_maxsize)
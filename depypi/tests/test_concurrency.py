@@ -0,0 +1,110 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import threading
+
+from depypi.tests import TestCase
+from depypi.concurrency import imap_unordered, map_concurrently
+
+
+class TestImapUnordered(TestCase):
+
+    def test_results_and_errors(self):
+        def func(item):
+            if item == 3:
+                raise ValueError('three')
+            return item * 2
+
+        results = dict((item, (result, error)) for item, result, error
+                       in imap_unordered(func, range(5), workers=2))
+        self.assertEqual([0, 2, 4, None, 8],
+                         [results[i][0] for i in range(5)])
+        self.assertIsInstance(results[3][1], ValueError)
+
+    def test_system_exit_is_an_error(self):
+        def func(item):
+            raise SystemExit(1)
+
+        results = list(imap_unordered(func, [1]))
+        self.assertIsInstance(results[0][2], SystemExit)
+
+    def test_bounded_concurrency(self):
+        lock = threading.Lock()
+        running = [0, 0]
+
+        def func(item):
+            with lock:
+                running[0] += 1
+                running[1] = max(running)
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        list(imap_unordered(func, range(20), workers=3))
+        self.assertEqual(3, running[1])
+
+    def test_items_are_consumed_lazily(self):
+        consumed = []
+
+        def items():
+            for item in range(1000):
+                consumed.append(item)
+                yield item
+
+        results = imap_unordered(lambda item: item, items(), workers=2)
+        next(results)
+        time.sleep(0.1)
+        self.assertLess(len(consumed), 20)
+        self.assertEqual(999, len(list(results)))
+
+    def test_no_items(self):
+        self.assertEqual([], list(imap_unordered(lambda item: item, [])))
+
+    def test_errors_reading_items_are_raised(self):
+        def items():
+            for item in range(3):
+                yield item
+            raise ValueError('bad item')
+
+        seen = []
+
+        def consume():
+            for item, _, _ in imap_unordered(lambda item: item, items(),
+                                             workers=2):
+                seen.append(item)
+
+        e = self.assertRaises(ValueError, consume)
+        self.assertEqual('bad item', str(e))
+        self.assertEqual([0, 1, 2], sorted(seen))
+
+
+class TestMapConcurrently(TestCase):
+
+    def test_keeps_order(self):
+        def func(item):
+            time.sleep(0.01 * (5 - item))
+            return item
+
+        self.assertEqual(list(range(5)),
+                         map_concurrently(func, range(5), workers=5))
+
+    def test_raises_the_first_error(self):
+        def func(item):
+            raise ValueError(item)
+
+        error = self.assertRaises(ValueError, map_concurrently, func,
+                                  [1, 2])
+        self.assertEqual((1,), error.args)
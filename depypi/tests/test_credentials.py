@@ -0,0 +1,89 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from depypi.tests import TestCase
+from depypi.credentials import (CredentialProvider, Credentials,
+                                CredentialsError)
+
+PYPIRC = '''[distutils]
+index-servers =
+    pypi
+    internal
+
+[pypi]
+username = pypi-user
+password = pypi-password
+
+[internal]
+repository = https://pypi.example.com/pypi
+username = internal-user
+password = internal-password
+'''
+
+
+class TestCredentialProvider(TestCase):
+
+    def setUp(self):
+        super(TestCredentialProvider, self).setUp()
+        self.pypirc = self.write_file(
+            os.path.join(self.make_dir(), '.pypirc'), PYPIRC)
+        for name in ('PYPIUSER', 'PYPIPWD', 'PYPIUSER_PYPITEST',
+                     'PYPIPWD_PYPITEST', 'PYPIUSER_MY_INDEX',
+                     'PYPIPWD_MY_INDEX'):
+            self.set_env(name, None)
+
+    def test_pypirc(self):
+        provider = CredentialProvider(pypirc_file=self.pypirc)
+        self.assertEqual(Credentials('pypi-user', 'pypi-password', None),
+                         provider.get('pypi'))
+        self.assertEqual(
+            Credentials('internal-user', 'internal-password',
+                        'https://pypi.example.com/pypi'),
+            provider.get('internal'))
+        self.assertEqual('https://pypi.example.com/pypi',
+                         provider.repository_url('internal'))
+        self.assertIsNone(provider.repository_url('pypitest'))
+
+    def test_explicit_credentials_win(self):
+        provider = CredentialProvider(('user', 'password'), self.pypirc)
+        self.assertEqual(('user', 'password'),
+                         provider.get('internal')[:2])
+
+    def test_environment(self):
+        self.set_env('PYPIUSER', 'env-user')
+        self.set_env('PYPIPWD', 'env-password')
+        self.set_env('PYPIUSER_MY_INDEX', 'my-user')
+        self.set_env('PYPIPWD_MY_INDEX', 'my-password')
+        provider = CredentialProvider(pypirc_file=self.pypirc)
+        self.assertEqual(('env-user', 'env-password'),
+                         provider.get('pypitest')[:2])
+        self.assertEqual(('my-user', 'my-password'),
+                         provider.get('my-index')[:2])
+        self.assertEqual(('pypi-user', 'pypi-password'),
+                         provider.get('pypi')[:2])
+
+    def test_missing_credentials(self):
+        provider = CredentialProvider(pypirc_file=self.pypirc + '.missing')
+        error = self.assertRaises(CredentialsError, provider.get, 'pypi')
+        self.assertIn('Unable to find credentials for pypi', str(error))
+
+    def test_pypirc_is_never_written(self):
+        mtime = os.path.getmtime(self.pypirc)
+        CredentialProvider(('user', 'password'), self.pypirc).get('pypi')
+        with open(self.pypirc) as f:
+            self.assertEqual(PYPIRC, f.read())
+        self.assertEqual(mtime, os.path.getmtime(self.pypirc))
@@ -0,0 +1,141 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+
+from depypi.tests import TestCase
+from depypi.depgraph import GraphBuilder, DependencyGraph, node_key
+
+
+class TestGraphBuilder(TestCase):
+
+    def setUp(self):
+        super(TestGraphBuilder, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index()
+
+    def add(self, name, version, *requires_dist):
+        self.index.add_release(
+            name, version, {'{0}-{1}.tar.gz'.format(name, version): b'x'},
+            requires_dist=list(requires_dist))
+
+    def build(self, requirements, **kwargs):
+        return GraphBuilder(self.index.url, workers=4, **kwargs).build(
+            requirements)
+
+    def test_transitive_dependencies(self):
+        self.add('app', '1.0', 'lib>=1.0', 'shared')
+        self.add('lib', '1.0', 'shared<2')
+        self.add('lib', '1.1', 'shared<2')
+        self.add('lib', '2.0a1')
+        self.add('shared', '1.5')
+        self.add('shared', '2.0')
+        graph = self.build(['app'])
+        self.assertEqual([{'requirement': 'app', 'node': 'app==1.0'}],
+                         graph.roots)
+        self.assertEqual(['app==1.0', 'lib==1.1', 'shared==1.5',
+                          'shared==2.0'], sorted(graph.nodes))
+        self.assertEqual([{'requirement': 'shared<2',
+                           'node': 'shared==1.5'}],
+                         graph.nodes['lib==1.1']['requires'])
+        self.assertEqual({}, graph.unresolved)
+
+    def test_every_release_is_fetched_once(self):
+        self.add('a', '1.0', 'c')
+        self.add('b', '1.0', 'c')
+        self.add('c', '1.0')
+        graph = self.build(['a', 'b', 'c'])
+        self.assertEqual(3, len(graph.nodes))
+        self.assertEqual(3, self.index.counts['release'])
+        self.assertEqual(3, self.index.counts['simple'])
+
+    def test_markers_and_extras(self):
+        self.add('app', '1.0', 'never; python_version < "1"',
+                 'extra-dep; extra == "cli"', 'plain')
+        self.add('plain', '1.0')
+        self.add('extra-dep', '1.0')
+        self.add('never', '1.0')
+        self.assertEqual(['app==1.0', 'plain==1.0'],
+                         sorted(self.build(['app']).nodes))
+        self.assertEqual(['app==1.0', 'extra-dep==1.0', 'plain==1.0'],
+                         sorted(self.build(['app[cli]']).nodes))
+
+    def test_extras_requested_later_are_followed(self):
+        self.add('app', '1.0', 'extra-dep; extra == "cli"')
+        self.add('extra-dep', '1.0')
+        self.add('other', '1.0', 'app[cli]')
+        graph = self.build(['app', 'other'])
+        self.assertIn('extra-dep==1.0', graph.nodes)
+
+    def test_max_depth(self):
+        self.add('a', '1.0', 'b')
+        self.add('b', '1.0', 'c')
+        self.add('c', '1.0')
+        self.assertEqual(['a==1.0'], sorted(self.build(['a'],
+                                                       max_depth=0).nodes))
+        self.assertEqual(['a==1.0', 'b==1.0'],
+                         sorted(self.build(['a'], max_depth=1).nodes))
+
+    def test_unresolved(self):
+        self.add('app', '1.0', 'lib>=5', 'missing', 'url @ http://x/u.zip')
+        self.add('lib', '1.0')
+        graph = self.build(['app', 'not a requirement!'])
+        self.assertEqual(['app==1.0'], sorted(graph.nodes))
+        self.assertIn('Invalid requirement',
+                      graph.unresolved.pop('not a requirement!'))
+        self.assertEqual({
+            'lib>=5': 'no matching release',
+            'missing': 'no matching release',
+            'url @ http://x/u.zip': 'direct URL requirements are not '
+                                    'resolved',
+        }, graph.unresolved)
+
+    def test_cycles(self):
+        self.add('a', '1.0', 'b')
+        self.add('b', '1.0', 'a')
+        graph = self.build(['a'])
+        self.assertEqual(['a==1.0', 'b==1.0'], sorted(graph.nodes))
+        self.assertEqual('a==1.0', graph.nodes['b==1.0']['requires'][0][
+            'node'])
+
+
+class TestDependencyGraph(TestCase):
+
+    def setUp(self):
+        super(TestDependencyGraph, self).setUp()
+        self.graph = DependencyGraph()
+        self.graph.roots.append({'requirement': 'a', 'node': 'a==1.0'})
+        self.graph.nodes['a==1.0'] = {
+            'name': 'a', 'version': '1.0', 'requires_dist': ['b"x"'],
+            'requires': [{'requirement': 'b"x"', 'node': 'b==2.0'}]}
+        self.graph.nodes['b==2.0'] = {
+            'name': 'b', 'version': '2.0', 'requires_dist': [],
+            'requires': []}
+
+    def test_node_key(self):
+        self.assertEqual('fake-pkg==1.0', node_key('Fake_Pkg', '1.0'))
+
+    def test_json(self):
+        self.assertEqual(self.graph.to_dict(),
+                         json.loads(self.graph.format('json')))
+
+    def test_dot(self):
+        self.assertEqual(
+            'digraph dependencies {\n'
+            '    "a==1.0" [label="a\\n1.0", shape=box];\n'
+            '    "b==2.0" [label="b\\n2.0"];\n'
+            '    "a==1.0" -> "b==2.0" [label="b\\"x\\""];\n'
+            '}', self.graph.format('dot'))
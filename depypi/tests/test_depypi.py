@@ -0,0 +1,168 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+
+from click.testing import CliRunner
+
+from depypi.tests import TestCase, CREDENTIALS, make_sdist, make_wheel
+from depypi import logger
+from depypi.depypi import main
+from depypi.timing import REDACTED
+
+
+class TestCommands(TestCase):
+
+    def setUp(self):
+        super(TestCommands, self).setUp()
+        # the console handler is bound to the real stdout before the runner
+        # swaps it, so only what commands echo ends up in their output
+        logger.configure()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index(credentials=CREDENTIALS)
+        self.home = self.make_dir()
+        self.set_env('HOME', self.home)
+        for name in ('PYPIUSER', 'PYPIPWD'):
+            self.set_env(name, None)
+        self.dist_dir = self.make_dir()
+
+    def invoke(self, *args, **kwargs):
+        result = CliRunner().invoke(main, list(args), **kwargs)
+        if result.exception and not isinstance(result.exception,
+                                               SystemExit):
+            raise result.exception
+        return result
+
+    def upload(self, *args):
+        return self.invoke(
+            'upload', '--files', os.path.join(self.dist_dir, '*'),
+            '-r', 'fake={0}'.format(self.index.url),
+            '--verify-timeout', '5', *args)
+
+    def test_upload(self):
+        make_sdist(self.dist_dir)
+        make_wheel(self.dist_dir)
+        report = os.path.join(self.make_dir(), 'report.json')
+        result = self.upload('-c', 'user', 'password', '--report', report)
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(2, self.index.counts['upload'])
+        with open(report) as f:
+            report = json.load(f)
+        self.assertEqual('upload', report['command'])
+        self.assertEqual(REDACTED, report['options']['credentials'])
+        self.assertNotIn('password', json.dumps(report))
+        self.assertIn('release', [s['name'] for s in report['spans']])
+
+    def test_upload_fails(self):
+        make_sdist(self.dist_dir)
+        self.assertEqual(1, self.upload('-c', 'user', 'wrong').exit_code)
+        self.assertIsNone(self.index.project_json('fake-pkg'))
+
+    def test_upload_without_credentials(self):
+        make_sdist(self.dist_dir)
+        self.assertEqual(1, self.upload().exit_code)
+        self.assertNotIn('upload', self.index.counts)
+
+    def test_upload_without_matching_files(self):
+        self.assertEqual(1, self.upload('-c', 'user', 'password').exit_code)
+
+    def test_upload_without_a_target(self):
+        self.assertEqual(1, self.invoke('upload').exit_code)
+        self.assertEqual(1, self.invoke('register').exit_code)
+
+    def test_batch_isonpypi(self):
+        self.write_file(os.path.join(self.home, '.pypirc'),
+                        '[pypi]\nrepository = {0}\n'.format(self.index.url))
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        self.index.add_release('fake-pkg', '1.1')
+        result = self.invoke('isonpypi', '-b', '-',
+                             input='fake-pkg==1.0\nfake-pkg==1.1\n'
+                                   'other==1.0\n')
+        self.assertEqual(0, result.exit_code)
+        results = [json.loads(line) for line in result.output.splitlines()
+                   if line.startswith('{')]
+        self.assertEqual([('fake-pkg', '1.0', True),
+                          ('fake-pkg', '1.1', False),
+                          ('other', '1.0', False)],
+                         sorted((r['name'], r['version'], r['available'])
+                                for r in results))
+
+    def test_batch_isonpypi_with_undecodable_input(self):
+        self.write_file(os.path.join(self.home, '.pypirc'),
+                        '[pypi]\nrepository = {0}\n'.format(self.index.url))
+        pairs = os.path.join(self.make_dir(), 'pairs.txt')
+        with open(pairs, 'wb') as f:
+            f.write(b'fake-pkg==1.0\n\xff\xfe==1.0\n')
+        result = self.invoke('isonpypi', '-b', pairs)
+        self.assertEqual(1, result.exit_code)
+        self.assertNotIn('cache:', result.output)
+
+    def test_getdeps(self):
+        path = self.make_package(install_requires=['six==1.10.0',
+                                                   'click>=4'])
+        self.write_file(os.path.join(path, 'dev-requirements.txt'),
+                        'nose\n-c constraints.txt\n')
+        self.write_file(os.path.join(path, 'constraints.txt'), 'nose==1.3\n')
+        report = os.path.join(self.make_dir(), 'report.json')
+        result = self.invoke('getdeps', '-p', path, '-ef',
+                             'dev-requirements.txt', '--report', report)
+        self.assertEqual(0, result.exit_code)
+        with open(report) as f:
+            spans = dict((s['name'], s) for s in json.load(f)['spans'])
+        self.assertEqual({'path': os.path.join(path, 'setup.py'),
+                          'static': True, 'dependencies': 2},
+                         spans['setup_py']['attributes'])
+        self.assertEqual(2, spans['requirements']['attributes']['lines'])
+
+    def test_getdeps_without_setup_py(self):
+        self.assertEqual(1, self.invoke('getdeps', '-p', os.path.join(
+            self.make_dir(), 'missing')).exit_code)
+        self.assertEqual(1, self.invoke('getdeps', '-p',
+                                        self.make_dir()).exit_code)
+
+    def test_getdeps_does_not_report_build_system_requires(self):
+        path = self.make_package(install_requires=['six'])
+        self.write_file(os.path.join(path, 'pyproject.toml'),
+                        '[build-system]\nrequires = ["setuptools"]\n')
+        report = os.path.join(self.make_dir(), 'report.json')
+        result = self.invoke('getdeps', '-p', path, '--report', report)
+        self.assertEqual(0, result.exit_code)
+        with open(report) as f:
+            spans = dict((s['name'], s) for s in json.load(f)['spans'])
+        self.assertEqual(1, spans['setup_py']['attributes']['dependencies'])
+
+    def test_getsubdeps(self):
+        path = self.make_package(install_requires=['click'])
+        self.index.add_release('click', '6.2', {'click-6.2.tar.gz': b'x'},
+                               requires_dist=['six'])
+        self.index.add_release('six', '1.10.0', {'six-1.10.0.tar.gz': b'x'})
+        result = self.invoke('getsubdeps', '-p', path, '-i', self.index.url)
+        self.assertEqual(0, result.exit_code)
+        self.assertEqual(['click==6.2', 'six==1.10.0'],
+                         sorted(json.loads(result.output)['nodes']))
+
+    def test_outdated(self):
+        path = self.make_package(install_requires=['click==6.1'])
+        self.index.add_release('click', '6.2', {'click-6.2.tar.gz': b'x'})
+        result = self.invoke('outdated', '-p', path, '-i', self.index.url,
+                             '-f', 'json')
+        self.assertEqual(0, result.exit_code)
+        report = json.loads(result.output)
+        self.assertEqual([('click', '6.1', '6.2', 'outdated')],
+                         [(d['name'], d['pinned'], d['latest'], d['status'])
+                          for d in report['dependencies']])
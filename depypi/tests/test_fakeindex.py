@@ -0,0 +1,154 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+import requests
+
+from depypi.tests import TestCase, CREDENTIALS, make_sdist
+from depypi.fakeindex import FakeIndexError, parse_form
+from depypi.index import SIMPLE_JSON_TYPE
+from depypi.uploader import MultipartBody, Uploader, UploadError
+
+
+class TestFakeIndex(TestCase):
+
+    def setUp(self):
+        super(TestFakeIndex, self).setUp()
+        self.index = self.start_index(credentials=CREDENTIALS)
+        self.session = requests.Session()
+        self.addCleanup(self.session.close)
+
+    def get(self, path, **kwargs):
+        return self.session.get(self.index.base_url + path, **kwargs)
+
+    def test_project_and_release_json(self):
+        self.index.add_release('Fake_Pkg', '1.0',
+                               {'Fake_Pkg-1.0.tar.gz': b'sdist'},
+                               requires_dist=['six'])
+        self.index.add_release('Fake_Pkg', '2.0rc1')
+        project = self.get('/pypi/fake-pkg/json').json()
+        self.assertEqual('1.0', project['info']['version'])
+        self.assertEqual(['six'], project['info']['requires_dist'])
+        self.assertEqual(['Fake_Pkg-1.0.tar.gz'], [
+            f['filename'] for f in project['releases']['1.0']])
+        self.assertEqual([], project['releases']['2.0rc1'])
+        release = self.get('/pypi/fake-pkg/2.0rc1/json').json()
+        self.assertEqual('2.0rc1', release['info']['version'])
+        self.assertEqual(404, self.get('/pypi/fake-pkg/3.0/json').status_code)
+        self.assertEqual(404, self.get('/pypi/missing/json').status_code)
+
+    def test_simple_api(self):
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        page = self.get('/simple/fake-pkg/',
+                        headers={'Accept': SIMPLE_JSON_TYPE})
+        self.assertEqual(SIMPLE_JSON_TYPE, page.headers['Content-Type'])
+        self.assertEqual(['fake-pkg-1.0.tar.gz'],
+                         [f['filename'] for f in page.json()['files']])
+        html = self.get('/simple/fake-pkg/')
+        self.assertIn('>fake-pkg-1.0.tar.gz</a>', html.text)
+        download = self.session.get(page.json()['files'][0]['url'])
+        self.assertEqual(b'sdist', download.content)
+
+    def test_etag_revalidation(self):
+        self.index.add_release('fake-pkg', '1.0')
+        first = self.get('/pypi/fake-pkg/json')
+        second = self.get('/pypi/fake-pkg/json', headers={
+            'If-None-Match': first.headers['ETag']})
+        self.assertEqual(304, second.status_code)
+        self.assertEqual(1, self.index.counts['not modified'])
+
+    def test_upload(self):
+        sdist = make_sdist(self.make_dir())
+        Uploader(self.index.url, *CREDENTIALS).upload(sdist)
+        files = self.get('/pypi/fake-pkg/1.0/json').json()['urls']
+        self.assertEqual(['fake-pkg-1.0.tar.gz'],
+                         [f['filename'] for f in files])
+        self.assertEqual('sdist', files[0]['packagetype'])
+        error = self.assertRaises(
+            UploadError, Uploader(self.index.url, *CREDENTIALS).upload,
+            sdist)
+        self.assertIn('400', str(error))
+
+    def test_upload_requires_credentials(self):
+        sdist = make_sdist(self.make_dir())
+        error = self.assertRaises(
+            UploadError, Uploader(self.index.url, 'user', 'wrong').upload,
+            sdist)
+        self.assertIn('403', str(error))
+        self.assertEqual(404, self.get('/pypi/fake-pkg/json').status_code)
+
+    def test_register(self):
+        Uploader(self.index.url, *CREDENTIALS).register(
+            [('name', 'fake-pkg'), ('version', '1.0'),
+             ('classifiers', 'A'), ('classifiers', 'B')])
+        info = self.get('/pypi/fake-pkg/1.0/json').json()['info']
+        self.assertEqual(['A', 'B'], info['classifiers'])
+        self.assertEqual(200, self.get('/pypi/fake-pkg/1.0').status_code)
+
+    def test_propagation_delay(self):
+        self.index.add_release('fake-pkg', '1.0', visible_after=0.3)
+        self.assertEqual(404, self.get('/pypi/fake-pkg/json').status_code)
+        time.sleep(0.4)
+        self.assertEqual(200, self.get('/pypi/fake-pkg/json').status_code)
+
+    def test_injected_errors(self):
+        self.index.error_rate = 1
+        self.index.error_status = 502
+        self.assertEqual(502, self.get('/pypi/fake-pkg/json').status_code)
+        self.assertEqual(1, self.index.counts['error'])
+
+    def test_injected_errors_are_seeded(self):
+        runs = []
+        for _ in range(2):
+            index = self.start_index(error_rate=0.5, seed=1)
+            runs.append([self.session.get(index.url + '/fake-pkg/json')
+                         .status_code for _ in range(20)])
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(set([404, 503]), set(runs[0]))
+
+    def test_latency(self):
+        self.index.latency = 0.2
+        start = time.time()
+        self.get('/pypi/fake-pkg/json')
+        self.assertGreaterEqual(time.time() - start, 0.2)
+
+    def test_private(self):
+        self.index.private = True
+        self.index.add_release('fake-pkg', '1.0')
+        response = self.get('/pypi/fake-pkg/json')
+        self.assertEqual(401, response.status_code)
+        self.assertIn('Basic', response.headers['WWW-Authenticate'])
+        self.assertEqual(200, self.get('/pypi/fake-pkg/json',
+                                       auth=CREDENTIALS).status_code)
+
+
+class TestParseForm(TestCase):
+
+    def test_parse_form(self):
+        path = self.write_file(os.path.join(self.make_dir(), 'file.txt'),
+                               'content')
+        body = MultipartBody([('name', u'caf\xe9'), ('name', 'b')],
+                             [('content', path)])
+        fields, files = parse_form(body.content_type, body.read())
+        self.assertEqual([('name', u'caf\xe9'), ('name', 'b')], fields)
+        self.assertEqual({'content': ('file.txt', b'content')}, files)
+
+    def test_not_multipart(self):
+        error = self.assertRaises(FakeIndexError, parse_form,
+                                  'application/json', b'{}')
+        self.assertEqual(400, error.status)
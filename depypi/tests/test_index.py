@@ -0,0 +1,181 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import requests
+
+from depypi.tests import TestCase, CREDENTIALS
+from depypi import index
+from depypi.cache import FileCache
+from depypi.index import (IndexClient, ProjectIndex, get_project_index,
+                          get_project_versions, get_release_info,
+                          normalize_name, simple_index_url,
+                          version_from_filename)
+
+
+class TestNames(TestCase):
+
+    def test_normalize_name(self):
+        self.assertEqual('fake-pkg', normalize_name('Fake_Pkg'))
+        self.assertEqual('fake-pkg', normalize_name('fake.-_pkg'))
+
+    def test_simple_index_url(self):
+        self.assertEqual('https://pypi.org/simple',
+                         simple_index_url('https://pypi.org/pypi/'))
+        self.assertEqual('http://index/simple',
+                         simple_index_url('http://index'))
+
+    def test_version_from_filename(self):
+        for filename, version in (
+                ('fake-pkg-1.0.tar.gz', '1.0'),
+                ('Fake_Pkg-1.0rc1.zip', '1.0rc1'),
+                ('fake_pkg-1.0-py2.py3-none-any.whl', '1.0'),
+                ('fake_pkg-1.0-py2.7.egg', '1.0'),
+                ('fake-pkg-1.0.exe', None),
+                ('other-1.0.tar.gz', None)):
+            self.assertEqual(version,
+                             version_from_filename(filename, 'fake-pkg'),
+                             filename)
+
+
+class TestProjectIndex(TestCase):
+
+    def setUp(self):
+        super(TestProjectIndex, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index()
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        self.index.add_release('fake-pkg', '1.1')
+
+    def test_releases(self):
+        project = ProjectIndex(self.index.url, 'fake-pkg')
+        self.assertTrue(project.exists)
+        self.assertEqual(['1.0', '1.1'], sorted(project.versions()))
+        self.assertTrue(project.is_registered('1.1'))
+        self.assertFalse(project.is_registered('2.0'))
+        self.assertTrue(project.is_available('1.0'))
+        self.assertTrue(project.is_available('1.0', 'fake-pkg-1.0.tar.gz'))
+        self.assertFalse(project.is_available('1.0', 'fake-pkg-1.0.zip'))
+        self.assertFalse(project.is_available('1.1'))
+        self.assertEqual(['fake-pkg-1.0.tar.gz'],
+                         [f['filename'] for f in project.files('1.0')])
+        self.assertEqual(1, self.index.counts['project'])
+
+    def test_missing_project(self):
+        project = ProjectIndex(self.index.url, 'missing')
+        self.assertFalse(project.exists)
+        self.assertEqual([], project.files('1.0'))
+
+    def test_refresh_revalidates(self):
+        project = ProjectIndex(self.index.url, 'fake-pkg')
+        project.ensure()
+        project.refresh()
+        self.assertEqual(1, self.index.counts['not modified'])
+        self.index.add_release('fake-pkg', '2.0')
+        project.ensure()
+        self.assertFalse(project.is_registered('2.0'))
+        project.refresh()
+        self.assertTrue(project.is_registered('2.0'))
+
+    def test_server_errors_raise(self):
+        self.index.error_rate = 1
+        project = ProjectIndex(self.index.url, 'fake-pkg')
+        self.assertRaises(requests.exceptions.HTTPError, project.ensure)
+
+    def test_private_index(self):
+        self.index.credentials = CREDENTIALS
+        self.index.private = True
+        self.assertRaises(requests.exceptions.HTTPError,
+                          ProjectIndex(self.index.url, 'fake-pkg').ensure)
+        project = ProjectIndex(self.index.url, 'fake-pkg', auth=CREDENTIALS)
+        self.assertTrue(project.is_registered('1.0'))
+
+    def test_get_project_index_is_shared(self):
+        project = get_project_index(self.index.url, 'Fake_Pkg')
+        self.assertIs(project, get_project_index(self.index.url + '/',
+                                                 'fake-pkg'))
+        self.assertIsNot(project, get_project_index(
+            self.index.url, 'fake-pkg', auth=CREDENTIALS))
+
+
+class TestIndexClient(TestCase):
+
+    def setUp(self):
+        super(TestIndexClient, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index()
+        for version in ('1.0', '1.1', '2.0rc1'):
+            self.index.add_release(
+                'fake-pkg', version,
+                {'fake-pkg-{0}.tar.gz'.format(version): b'sdist'},
+                requires_dist=['six>=1.9'])
+        self.index.add_release('fake-pkg', '3.0')
+
+    def test_versions_from_the_simple_api(self):
+        self.assertEqual(['1.0', '1.1', '2.0rc1'],
+                         get_project_versions(self.index.url, 'fake-pkg'))
+        self.assertEqual(1, self.index.counts['simple'])
+        self.assertNotIn('project', self.index.counts)
+        get_project_versions(self.index.url, 'fake-pkg')
+        self.assertEqual(1, self.index.counts['simple'])
+
+    def test_versions_of_a_missing_project(self):
+        self.assertEqual([], get_project_versions(self.index.url, 'missing'))
+
+    def test_simple_pages_are_revalidated_across_processes(self):
+        self.set_env('DEPYPI_NO_CACHE', None)
+        self.patch(index, '_simple_cache', FileCache('simple'))
+        index._simple_cache.directory = self.make_dir()
+        get_project_versions(self.index.url, 'fake-pkg')
+        self.reset_indexes()
+        self.assertEqual(['1.0', '1.1', '2.0rc1'],
+                         get_project_versions(self.index.url, 'fake-pkg'))
+        self.assertEqual(1, self.index.counts['not modified'])
+
+    def test_latest(self):
+        client = IndexClient(self.index.url)
+        self.assertEqual('1.1', client.latest('fake-pkg'))
+        self.assertEqual('2.0rc1', client.latest('fake-pkg',
+                                                 prereleases=True))
+        self.assertIsNone(client.latest('missing'))
+
+    def test_release(self):
+        release = get_release_info(self.index.url, 'fake-pkg', '1.0')
+        self.assertEqual({'name': 'fake-pkg', 'version': '1.0',
+                          'requires_dist': ['six>=1.9'],
+                          'requires_python': None}, release)
+        self.assertIsNone(get_release_info(self.index.url, 'fake-pkg',
+                                           '9.0'))
+
+    def test_lookups_of_many_projects(self):
+        self.index.add_release('other', '0.1', {'other-0.1.zip': b'zip'})
+        client = IndexClient(self.index.url, workers=4)
+        self.assertEqual({'fake-pkg': ['1.0', '1.1', '2.0rc1'],
+                          'other': ['0.1'], 'missing': []},
+                         client.versions_of(['fake-pkg', 'other', 'missing',
+                                             'other']))
+        releases = client.releases_of([('fake-pkg', '1.0'),
+                                       ('other', '9.9')])
+        self.assertEqual(['six>=1.9'],
+                         releases[('fake-pkg', '1.0')]['requires_dist'])
+        self.assertIsNone(releases[('other', '9.9')])
+
+    def test_failed_lookups(self):
+        self.index.error_rate = 1
+        client = IndexClient(self.index.url)
+        self.assertEqual({'fake-pkg': None},
+                         client.versions_of(['fake-pkg']))
@@ -0,0 +1,88 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import logging
+
+from depypi.tests import TestCase
+from depypi import logger
+
+
+class TestConfigure(TestCase):
+
+    def test_configures_once(self):
+        logger.configure()
+        lgr = logging.getLogger('user')
+        handlers = list(lgr.handlers)
+        threads = logger.background_threads()
+        logger.configure()
+        self.assertEqual(handlers, lgr.handlers)
+        self.assertEqual(threads, logger.background_threads())
+        self.assertEqual(1, len(threads))
+        self.assertFalse(any(isinstance(h, logging.FileHandler)
+                             for h in lgr.handlers))
+
+    def test_log_file(self):
+        self.set_env(logger.LOG_FILE_ENV, None)
+        self.assertEqual(os.path.expanduser(logger.DEFAULT_LOG_FILE),
+                         logger.get_log_file())
+        path = os.path.join(self.make_dir(), 'depypi.log')
+        self.set_env(logger.LOG_FILE_ENV, path)
+        self.assertEqual(path, logger.get_log_file())
+
+
+class TestWriteInBackground(TestCase):
+
+    def setUp(self):
+        super(TestWriteInBackground, self).setUp()
+        self.path = os.path.join(self.make_dir(), 'test.log')
+        handler = logging.FileHandler(self.path)
+        handler.setLevel(logging.INFO)
+        handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+        self.addCleanup(handler.close)
+        self.lgr = logging.getLogger('depypi-test-{0}'.format(id(self)))
+        self.lgr.propagate = False
+        self.lgr.setLevel(logging.DEBUG)
+        self.lgr.addHandler(handler)
+        self.addCleanup(self.lgr.handlers.__delitem__, slice(None))
+        self.patch(logger, '_writer', None)
+        logger._write_in_background(self.lgr)
+        self.writer = logger._writer
+        self.addCleanup(self.writer.stop)
+
+    def read(self):
+        self.writer.stop()
+        with open(self.path) as f:
+            return f.read()
+
+    def test_records_are_written_by_the_writer(self):
+        self.assertEqual([self.writer.thread], logger.background_threads())
+        self.assertNotIn(logging.FileHandler,
+                         [type(h) for h in self.lgr.handlers])
+        for n in range(100):
+            self.lgr.info('record %d', n)
+        self.assertEqual(['INFO record {0}'.format(n) for n in range(100)],
+                         self.read().splitlines())
+
+    def test_handler_levels_are_kept(self):
+        self.lgr.debug('debug')
+        self.lgr.warning('warning')
+        self.assertEqual('WARNING warning\n', self.read())
+
+    def test_messages_are_formatted_when_logged(self):
+        names = ['before']
+        self.lgr.info('names: %s', names)
+        names[0] = 'after'
+        self.assertEqual("INFO names: ['before']\n", self.read())
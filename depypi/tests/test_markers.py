@@ -0,0 +1,105 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import sys
+
+import testtools
+
+from depypi.markers import (default_environment, evaluate_marker,
+                            MarkerError, VARIABLES)
+
+ENVIRONMENT = {
+    'python_version': '2.7',
+    'python_full_version': '2.7.10',
+    'sys_platform': 'linux2',
+    'os_name': 'posix',
+    'platform_machine': 'x86_64',
+}
+
+
+class TestMarkers(testtools.TestCase):
+
+    def assertMarker(self, expected, marker, **kwargs):
+        self.assertEqual(expected, evaluate_marker(
+            marker, kwargs.pop('environment', ENVIRONMENT), **kwargs),
+            marker)
+
+    def test_default_environment(self):
+        environment = default_environment()
+        self.assertEqual(set(VARIABLES), set(environment))
+        self.assertEqual(sys.platform, environment['sys_platform'])
+        self.assertEqual('', environment['extra'])
+        self.assertIs(True, evaluate_marker(
+            'python_version == "{0}.{1}"'.format(*sys.version_info[:2])))
+
+    def test_comparisons(self):
+        for expected, marker in (
+                (True, 'python_version < "3"'),
+                (False, 'python_version >= "3"'),
+                (True, 'python_version > "2.6"'),
+                (True, 'python_full_version == "2.7.*"'),
+                (True, 'python_version ~= "2.6"'),
+                (True, "sys_platform == 'linux2'"),
+                (True, 'sys_platform != "win32"'),
+                (True, '"linux" in sys_platform'),
+                (True, '"win" not in sys_platform'),
+                (True, 'os_name == "posix"'),
+                (True, 'platform_machine > "x86"'),
+                (True, '"2.7" == python_version')):
+            self.assertMarker(expected, marker)
+
+    def test_versions_compare_as_versions(self):
+        self.assertMarker(True, 'python_version < "2.10"')
+        self.assertMarker(False, 'python_version < "2.7"',
+                          environment={'python_version': '2.10'})
+
+    def test_boolean_operators(self):
+        for expected, marker in (
+                (True, 'python_version < "3" and os_name == "posix"'),
+                (False, 'python_version >= "3" and os_name == "posix"'),
+                (True, 'python_version >= "3" or os_name == "posix"'),
+                (False, 'os_name == "nt" or os_name == "java"'),
+                (True, 'os_name == "nt" or os_name == "java" or '
+                       'os_name == "posix"'),
+                (False, 'os_name == "posix" and (python_version >= "3" or '
+                        'sys_platform == "win32")'),
+                (True, '(os_name == "posix" or os_name == "nt") and '
+                       '((python_version < "3"))')):
+            self.assertMarker(expected, marker)
+
+    def test_extra(self):
+        self.assertMarker(False, 'extra == "cli"')
+        self.assertMarker(True, 'extra == "cli"', extra='cli')
+        self.assertMarker(False, 'extra == "cli"', extra='test')
+
+    def test_missing_variables_are_empty(self):
+        self.assertMarker(True, 'platform_release == ""')
+
+    def test_invalid_markers(self):
+        for marker in ('python_version', 'python_version <',
+                       'python_version < "3" and',
+                       '(python_version < "3"',
+                       'python_version < "3")',
+                       'python_version < "3" os_name == "nt"',
+                       'python_version $ "3"',
+                       'python_version < "3',
+                       'unknown == "1"'):
+            self.assertRaises(MarkerError, evaluate_marker, marker,
+                              ENVIRONMENT)
+
+    def test_unknown_variable(self):
+        e = self.assertRaises(MarkerError, evaluate_marker,
+                              'python_ver < "3"', ENVIRONMENT)
+        self.assertIn('python_ver', str(e))
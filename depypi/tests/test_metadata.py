@@ -0,0 +1,150 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import sys
+import threading
+
+from depypi.tests import TestCase
+from depypi import metadata
+from depypi.cache import FileCache
+from depypi.metadata import (get_metadata, metadata_cache_key, MetadataError,
+                             FORCE_SUBPROCESS_ENV)
+
+
+class TestGetMetadata(TestCase):
+
+    def setUp(self):
+        super(TestGetMetadata, self).setUp()
+        self.set_env(FORCE_SUBPROCESS_ENV, None)
+        self.patch(metadata, '_in_process_is_safe', lambda: True)
+        self.patch(metadata, '_metadata_cache', FileCache('metadata'))
+        metadata._metadata_cache.directory = self.make_dir()
+        self.path = self.make_package(install_requires=['six>=1.9'])
+
+    def assertMetadata(self, result):
+        self.assertEqual(
+            ('fake-pkg', '1.0', 'depypi test package', ['six>=1.9']),
+            (result['name'], result['version'], result['description'],
+             result['install_requires']))
+
+    def fail_probe(self, *args):
+        raise AssertionError('setup.py was probed')
+
+    def test_in_process(self):
+        self.patch(metadata, '_probe_subprocess', self.fail_probe)
+        self.assertMetadata(get_metadata(self.path, use_cache=False))
+
+    def test_subprocess(self):
+        self.set_env(FORCE_SUBPROCESS_ENV, '1')
+        self.patch(metadata, '_probe_in_process', self.fail_probe)
+        self.assertMetadata(get_metadata(self.path, use_cache=False))
+
+    def test_subprocess_when_other_threads_run(self):
+        self.patch(metadata, '_in_process_is_safe', lambda: False)
+        self.patch(metadata, '_probe_in_process', self.fail_probe)
+        self.assertMetadata(get_metadata(self.path, use_cache=False))
+
+    def test_subprocess_when_the_probe_fails_in_process(self):
+        self.write_file(os.path.join(self.path, 'setup.py'),
+                        'import sys\n'
+                        'from setuptools import setup\n'
+                        'if "depypi" in sys.modules:\n'
+                        '    sys.exit(1)\n'
+                        'setup(name="fake-pkg", version="1.0")\n')
+        self.assertEqual('fake-pkg', get_metadata(self.path)['name'])
+
+    def test_the_probe_leaves_no_trace(self):
+        self.write_file(os.path.join(self.path, 'fake_pkg_version.py'),
+                        'VERSION = "1.0"\n')
+        self.write_file(os.path.join(self.path, 'setup.py'),
+                        'import os\n'
+                        'from setuptools import setup\n'
+                        'from fake_pkg_version import VERSION\n'
+                        'setup(name="fake-pkg", version=VERSION,\n'
+                        '      description=os.getcwd())\n')
+        cwd = os.getcwd()
+        sys_path = list(sys.path)
+        result = get_metadata(self.path, use_cache=False)
+        self.assertEqual('1.0', result['version'])
+        self.assertEqual(os.path.realpath(self.path),
+                         os.path.realpath(result['description']))
+        self.assertEqual(cwd, os.getcwd())
+        self.assertEqual(sys_path, sys.path)
+        self.assertNotIn('fake_pkg_version', sys.modules)
+
+    def test_cached(self):
+        self.assertMetadata(get_metadata(self.path))
+        self.patch(metadata, '_probe', self.fail_probe)
+        self.assertMetadata(get_metadata(self.path))
+        self.assertRaises(AssertionError, get_metadata, self.path,
+                          use_cache=False)
+
+    def test_cache_is_disabled(self):
+        get_metadata(self.path)
+        self.disable_cache()
+        self.patch(metadata, '_probe', self.fail_probe)
+        self.assertRaises(AssertionError, get_metadata, self.path)
+
+    def test_cache_key(self):
+        key = metadata_cache_key(self.path)
+        self.assertEqual(key, metadata_cache_key(self.path))
+        self.write_file(os.path.join(self.path, 'README.rst'), 'readme')
+        self.assertEqual(key, metadata_cache_key(self.path))
+        for name in ('setup.cfg', os.path.join('fake_pkg', '__init__.py'),
+                     'VERSION'):
+            self.write_file(os.path.join(self.path, name), '1.1')
+            changed = metadata_cache_key(self.path)
+            self.assertNotEqual(key, changed, name)
+            key = changed
+
+    def test_cache_key_includes_files_setup_py_names(self):
+        self.write_file(os.path.join(self.path, 'setup.py'),
+                        'open("requirements.txt").read()\n')
+        key = metadata_cache_key(self.path)
+        self.write_file(os.path.join(self.path, 'requirements.txt'), 'six')
+        self.assertNotEqual(key, metadata_cache_key(self.path))
+
+    def test_missing_setup_py(self):
+        e = self.assertRaises(MetadataError, get_metadata, self.make_dir())
+        self.assertIn('setup.py not found', str(e))
+
+    def test_setup_is_never_called(self):
+        self.write_file(os.path.join(self.path, 'setup.py'), 'print(1)\n')
+        e = self.assertRaises(MetadataError, get_metadata, self.path)
+        self.assertIn('Unable to retrieve package name and version', str(e))
+
+    def test_setup_py_fails(self):
+        self.write_file(os.path.join(self.path, 'setup.py'),
+                        'raise SystemExit(3)\n')
+        e = self.assertRaises(MetadataError, get_metadata, self.path)
+        self.assertIn('exit code 3', str(e))
+
+
+class TestInProcessIsSafe(TestCase):
+
+    def test_other_threads(self):
+        stop = threading.Event()
+        thread = threading.Thread(target=stop.wait)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(stop.set)
+        current = threading.current_thread()
+        self.patch(metadata.threading, 'enumerate', lambda: [current])
+        self.assertTrue(metadata._in_process_is_safe())
+        self.patch(metadata.threading, 'enumerate', lambda: [current, thread])
+        self.assertFalse(metadata._in_process_is_safe())
+        self.patch(metadata.logger, 'background_threads', lambda: [thread])
+        self.assertTrue(metadata._in_process_is_safe())
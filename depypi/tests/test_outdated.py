@@ -0,0 +1,107 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import json
+
+from depypi.tests import TestCase
+from depypi import outdated
+from depypi.cache import FileCache
+from depypi.outdated import (build_report, latest_versions, OutdatedReport,
+                             OUTDATED, UNPINNED, UP_TO_DATE, UNKNOWN)
+
+
+class TestOutdated(TestCase):
+
+    def setUp(self):
+        super(TestOutdated, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index()
+        for name, versions in (('requests', ('2.7.0', '2.9.1', '3.0a1')),
+                               ('click', ('6.2',)),
+                               ('six', ('1.10.0',))):
+            for version in versions:
+                self.index.add_release(name, version, {
+                    '{0}-{1}.tar.gz'.format(name, version): b'x'})
+
+    def test_latest_versions(self):
+        self.assertEqual({'requests': '2.9.1', 'click': '6.2',
+                          'missing': None},
+                         latest_versions(['requests', 'Click', 'click',
+                                          'missing'], self.index.url))
+        self.assertEqual(3, self.index.counts['simple'])
+
+    def test_latest_versions_are_cached(self):
+        self.set_env('DEPYPI_NO_CACHE', None)
+        self.patch(outdated, '_latest_cache', FileCache('latest'))
+        outdated._latest_cache.directory = self.make_dir()
+        latest_versions(['requests'], self.index.url)
+        latest_versions(['click'], self.index.url, ttl=-1)
+        self.reset_indexes()
+        self.assertEqual({'requests': '2.9.1', 'click': '6.2'},
+                         latest_versions(['requests', 'click'],
+                                         self.index.url))
+        # only the expired entry is looked up again
+        self.assertEqual(3, self.index.counts['simple'])
+
+    def test_failed_lookups_are_unknown(self):
+        self.index.error_rate = 1
+        self.assertEqual({'requests': None},
+                         latest_versions(['requests'], self.index.url))
+
+    def test_build_report(self):
+        report = build_report({
+            'cli': ['requests==2.7.0', 'click>=4.0', 'six==1.10.0'],
+            'client': ['requests==2.9.1', 'missing==1.0', 'not valid!',
+                       'url @ http://x/u.zip'],
+        }, index_url=self.index.url)
+        self.assertEqual([
+            ('cli', 'requests', '2.7.0', '2.9.1', OUTDATED),
+            ('cli', 'click', None, '6.2', UNPINNED),
+            ('cli', 'six', '1.10.0', '1.10.0', UP_TO_DATE),
+            ('client', 'requests', '2.9.1', '2.9.1', UP_TO_DATE),
+            ('client', 'missing', '1.0', None, UNKNOWN),
+            ('client', 'url', None, None, UNKNOWN),
+        ], [(e['package'], e['name'], e['pinned'], e['latest'], e['status'])
+            for e in report.entries])
+        self.assertEqual({OUTDATED: 1, UNPINNED: 1, UP_TO_DATE: 2,
+                          UNKNOWN: 2}, report.counts())
+
+
+class TestOutdatedReport(TestCase):
+
+    def setUp(self):
+        super(TestOutdatedReport, self).setUp()
+        self.report = OutdatedReport([
+            {'package': 'cli', 'name': 'requests',
+             'requirement': 'requests==2.7.0', 'pinned': '2.7.0',
+             'latest': '2.9.1', 'status': OUTDATED},
+            {'package': 'cli', 'name': 'click', 'requirement': 'click',
+             'pinned': None, 'latest': '6.2', 'status': UNPINNED},
+        ])
+
+    def test_table(self):
+        self.assertEqual(
+            'PACKAGE  NAME      REQUIREMENT      PINNED  LATEST  STATUS\n'
+            'cli      requests  requests==2.7.0  2.7.0   2.9.1   outdated\n'
+            'cli      click     click            -       6.2     unpinned\n'
+            '\n'
+            '1 outdated, 0 unknown, 1 unpinned, 0 up-to-date',
+            self.report.format('table'))
+
+    def test_json(self):
+        report = json.loads(self.report.format('json'))
+        self.assertEqual(self.report.entries, report['dependencies'])
+        self.assertEqual(1, report['counts'][OUTDATED])
@@ -0,0 +1,88 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+
+from depypi.tests import TestCase
+from depypi import poller
+from depypi.poller import Poller
+
+
+class _Check():
+    """Passes on its nth call
+    """
+    def __init__(self, passes_on):
+        self.passes_on = passes_on
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.calls >= self.passes_on
+
+
+class TestPoller(TestCase):
+
+    def setUp(self):
+        super(TestPoller, self).setUp()
+        self.waits = []
+        self.patch(poller.time, 'sleep', self.waits.append)
+
+    def test_visible_at_once(self):
+        result = Poller().poll(_Check(1), 'check')
+        self.assertEqual('check', result.name)
+        self.assertTrue(result.visible)
+        self.assertEqual(1, result.attempts)
+        self.assertIsNotNone(result.time_to_visible)
+        self.assertEqual([], self.waits)
+
+    def test_backs_off_exponentially(self):
+        result = Poller(initial_delay=1, max_delay=5, factor=2,
+                        jitter=0).poll(_Check(6))
+        self.assertTrue(result.visible)
+        self.assertEqual(6, result.attempts)
+        self.assertEqual([1, 2, 4, 5, 5], self.waits)
+
+    def test_jitter(self):
+        Poller(initial_delay=1, jitter=0.5).poll(_Check(2))
+        self.assertEqual(1, len(self.waits))
+        self.assertTrue(0.5 <= self.waits[0] <= 1)
+
+    def test_deadline(self):
+        self.patch(poller.time, 'sleep', time.sleep)
+        start = time.time()
+        result = Poller(deadline=0.3, initial_delay=0.1,
+                        max_delay=0.1).poll(lambda: False, 'never')
+        self.assertFalse(result.visible)
+        self.assertIsNone(result.time_to_visible)
+        self.assertGreater(result.attempts, 1)
+        self.assertLess(time.time() - start, 1)
+
+    def test_zero_deadline_checks_once(self):
+        check = _Check(2)
+        result = Poller(deadline=0).poll(check)
+        self.assertFalse(result.visible)
+        self.assertEqual(1, check.calls)
+
+    def test_poll_all(self):
+        def broken():
+            raise ValueError('broken')
+
+        results = Poller(deadline=0).poll_all({
+            'visible': _Check(1), 'invisible': _Check(2), 'broken': broken})
+        self.assertEqual({'visible': True, 'invisible': False,
+                          'broken': False},
+                         dict((name, result.visible)
+                              for name, result in results.items()))
+        self.assertEqual(0, results['broken'].attempts)
@@ -0,0 +1,248 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import io
+import time
+
+from depypi.tests import (TestCase, CREDENTIALS, make_sdist, make_wheel)
+from depypi import batch
+from depypi import pypi_handler
+from depypi.cache import FileCache
+from depypi.poller import Poller
+from depypi.pypi_handler import PypiHandler, is_public_repository
+from depypi.uploader import UploadError
+
+
+class TestPypiHandler(TestCase):
+
+    def setUp(self):
+        super(TestPypiHandler, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.index = self.start_index(credentials=CREDENTIALS)
+        self.dist_dir = self.make_dir()
+
+    def handler(self, path='', **kwargs):
+        kwargs.setdefault('verify_timeout', 5)
+        handler = PypiHandler(path, CREDENTIALS, target='fake',
+                              repository_url=self.index.url, **kwargs)
+        handler.poller = Poller(deadline=handler.poller.deadline,
+                                initial_delay=0.1, max_delay=0.5)
+        return handler
+
+    def upload(self, handler, distributions):
+        return handler.upload_distributions(handler._get_uploader(),
+                                            distributions)
+
+    def statuses(self, handler):
+        return dict((r['filename'], r['status'])
+                    for r in handler.upload_results)
+
+    def test_upload_and_verify(self):
+        distributions = [make_sdist(self.dist_dir),
+                         make_wheel(self.dist_dir)]
+        handler = self.handler()
+        self.assertTrue(self.upload(handler, distributions))
+        self.assertEqual({'fake-pkg-1.0.tar.gz': 'uploaded',
+                          'fake_pkg-1.0-py2.py3-none-any.whl': 'uploaded'},
+                         self.statuses(handler))
+        self.assertEqual(2, self.index.counts['upload'])
+        self.assertIsNotNone(handler.time_to_visible)
+        self.assertTrue(
+            handler.is_package_of_specific_version_available_on_pypi(
+                'fake-pkg', '1.0', filename='fake-pkg-1.0.tar.gz'))
+
+    def test_upload_reads_name_and_version_from_the_files(self):
+        distributions = [make_sdist(self.dist_dir, version='1.0'),
+                         make_sdist(self.dist_dir, version='2.0')]
+        self.assertTrue(self.upload(self.handler(), distributions))
+        self.assertEqual(['1.0', '2.0'], sorted(
+            self.index.project_json('fake-pkg')['releases']))
+
+    def test_retry_skips_files_with_the_same_sha256(self):
+        sdist = make_sdist(self.dist_dir)
+        self.assertTrue(self.upload(self.handler(), [sdist]))
+        wheel = make_wheel(self.dist_dir)
+        handler = self.handler()
+        self.assertTrue(self.upload(handler, [sdist, wheel]))
+        self.assertEqual({'fake-pkg-1.0.tar.gz': 'skipped',
+                          'fake_pkg-1.0-py2.py3-none-any.whl': 'uploaded'},
+                         self.statuses(handler))
+        self.assertEqual(2, self.index.counts['upload'])
+
+    def test_file_with_a_different_sha256_is_not_skipped(self):
+        sdist = make_sdist(self.dist_dir)
+        self.assertTrue(self.upload(self.handler(), [sdist]))
+        make_sdist(self.dist_dir, requires_dist=['six'])
+        handler = self.handler()
+        # the index refuses to overwrite a file
+        self.assertRaises(UploadError, self.upload, handler, [sdist])
+        self.assertEqual({'fake-pkg-1.0.tar.gz': 'failed'},
+                         self.statuses(handler))
+
+    def test_failed_upload(self):
+        sdist = make_sdist(self.dist_dir)
+        wheel = make_wheel(self.dist_dir)
+        handler = PypiHandler('', ('user', 'wrong'), target='fake',
+                              repository_url=self.index.url)
+        error = self.assertRaises(UploadError, self.upload, handler,
+                                  [sdist, wheel])
+        self.assertIn('2 of 2 files failed to upload to fake', str(error))
+        self.assertEqual({'fake-pkg-1.0.tar.gz': 'failed',
+                          'fake_pkg-1.0-py2.py3-none-any.whl': 'failed'},
+                         self.statuses(handler))
+        self.assertIn('403', handler.upload_results[0]['error'])
+        self.assertIsNone(self.index.project_json('fake-pkg'))
+
+    def test_upload_exits_on_failure(self):
+        handler = PypiHandler('', ('user', 'wrong'), target='fake',
+                              repository_url=self.index.url)
+        error = self.assertRaises(SystemExit, handler.upload,
+                                  [make_sdist(self.dist_dir)])
+        self.assertEqual(1, error.code)
+
+    def test_unreadable_file_fails_before_uploading(self):
+        broken = self.write_file(os.path.join(
+            self.dist_dir, 'fake-pkg-1.0.tar.gz'), 'not an archive')
+        self.assertRaises(UploadError, self.upload, self.handler(),
+                          [broken])
+        self.assertNotIn('upload', self.index.counts)
+
+    def test_injected_server_errors_fail_the_upload(self):
+        self.index.error_rate = 1
+        handler = self.handler()
+        error = self.assertRaises(UploadError, self.upload, handler,
+                                  [make_sdist(self.dist_dir)])
+        self.assertIn('1 of 1 files', str(error))
+        self.assertIn('503', handler.upload_results[0]['error'])
+        self.assertEqual(2, self.index.counts['error'])
+
+    def test_injected_server_errors_are_not_cached_answers(self):
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        handler = self.handler()
+        self.index.error_rate = 1
+        self.assertIsNone(
+            handler.is_package_of_specific_version_available_on_pypi(
+                'fake-pkg', '1.0'))
+        self.index.error_rate = 0
+        self.assertTrue(
+            handler.is_package_of_specific_version_available_on_pypi(
+                'fake-pkg', '1.0', refresh=True))
+
+    def test_verification_waits_for_propagation(self):
+        self.index.propagation_delay = 1
+        handler = self.handler()
+        start = time.time()
+        self.assertTrue(self.upload(handler, [make_sdist(self.dist_dir)]))
+        self.assertGreaterEqual(time.time() - start, 1)
+        self.assertGreaterEqual(handler.time_to_visible, 0.5)
+        self.assertGreater(self.index.counts['project'], 2)
+
+    def test_verification_gives_up_after_the_timeout(self):
+        self.index.propagation_delay = 30
+        handler = self.handler(verify_timeout=0.5)
+        self.assertFalse(self.upload(handler, [make_sdist(self.dist_dir)]))
+        self.assertIsNone(handler.time_to_visible)
+        self.assertEqual({'fake-pkg-1.0.tar.gz': 'uploaded'},
+                         self.statuses(handler))
+
+    def test_register(self):
+        handler = self.handler(self.make_package())
+        handler.register()
+        self.assertEqual(1, self.index.counts['register'])
+        self.assertTrue(
+            handler.is_package_of_specific_version_registered_on_pypi(
+                'fake-pkg', '1.0'))
+        self.assertFalse(
+            handler.is_package_of_specific_version_available_on_pypi(
+                'fake-pkg', '1.0'))
+        info = self.index.release_json('fake-pkg', '1.0')['info']
+        self.assertEqual('depypi test package', info['summary'])
+
+    def test_register_exits_on_failure(self):
+        handler = PypiHandler(self.make_package(), ('user', 'wrong'),
+                              target='fake', repository_url=self.index.url)
+        error = self.assertRaises(SystemExit, handler.register)
+        self.assertEqual(1, error.code)
+        self.assertNotIn('register', self.index.counts)
+
+    def test_build(self):
+        path = self.make_package('fakepkg')
+        # files of earlier builds are never uploaded again
+        self.write_file(os.path.join(path, 'dist', 'fakepkg-0.9.tar.gz'))
+        handler = self.handler(path)
+        distributions = handler.build(use_cache=False)
+        self.assertEqual([os.path.join(path, 'dist', 'fakepkg-1.0.tar.gz')],
+                         distributions)
+        self.assertTrue(self.upload(handler, distributions))
+
+    def test_batch_isonpypi(self):
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        self.index.add_release('fake-pkg', '2.0')
+        self.index.add_release('other', '0.1', {'other-0.1.zip': b'zip'})
+        pairs = batch.read_pairs(io.StringIO(
+            u'# releases\nfake-pkg==1.0\nfake-pkg==2.0\n\nother==0.1\n'
+            u'missing==1.0\nbroken line\n'))
+        results = list(batch.check_pairs(self.handler(), pairs, workers=2))
+        self.assertEqual(
+            [('fake-pkg', '1.0', True), ('fake-pkg', '2.0', False),
+             ('missing', '1.0', False), ('other', '0.1', True)],
+            sorted((r['name'], r['version'], r['available'])
+                   for r in results))
+        self.assertTrue(all(r['error'] is None and r['target'] == 'fake'
+                            for r in results))
+        registered = batch.check_pairs(
+            self.handler(), [('fake-pkg', '2.0'), ('missing', '1.0')],
+            registered=True)
+        self.assertEqual([('fake-pkg', True), ('missing', False)], sorted(
+            (r['name'], r['registered']) for r in registered))
+
+    def test_batch_isonpypi_with_server_errors(self):
+        self.index.error_rate = 1
+        results = list(batch.check_pairs(self.handler(),
+                                         [('fake-pkg', '1.0')]))
+        self.assertEqual(1, len(results))
+        self.assertIsNone(results[0]['available'])
+
+    def test_checks_are_cached(self):
+        self.set_env('DEPYPI_NO_CACHE', None)
+        self.patch(pypi_handler, 'availability_cache',
+                   FileCache('availability'))
+        pypi_handler.availability_cache.directory = self.make_dir()
+        self.index.add_release('fake-pkg', '1.0',
+                               {'fake-pkg-1.0.tar.gz': b'sdist'})
+        handler = self.handler()
+        for _ in range(3):
+            self.assertTrue(
+                handler.is_package_of_specific_version_available_on_pypi(
+                    'fake-pkg', '1.0'))
+            self.assertFalse(
+                handler.is_package_of_specific_version_available_on_pypi(
+                    'fake-pkg', '2.0'))
+        self.assertEqual(1, self.index.counts['project'])
+        self.assertEqual(4, pypi_handler.availability_cache.hits)
+
+    def test_private_index_is_read_with_the_credentials(self):
+        self.index.private = True
+        handler = self.handler()
+        self.assertTrue(self.upload(handler, [make_sdist(self.dist_dir)]))
+        self.assertEqual(CREDENTIALS, handler.auth)
+
+    def test_is_public_repository(self):
+        self.assertTrue(is_public_repository('https://pypi.python.org/pypi/'))
+        self.assertFalse(is_public_repository(self.index.url))
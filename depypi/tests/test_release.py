@@ -0,0 +1,97 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from depypi.tests import TestCase, CREDENTIALS, make_sdist, make_wheel
+from depypi.pypi_handler import REPOSITORIES
+from depypi.release import release, resolve_targets, ReleaseError, Target
+from depypi.uploader import UploadError
+
+PYPIRC = '''[distutils]
+index-servers =
+    internal
+
+[internal]
+repository = https://pypi.example.com/pypi
+username = internal-user
+password = internal-password
+'''
+
+
+class TestResolveTargets(TestCase):
+
+    def setUp(self):
+        super(TestResolveTargets, self).setUp()
+        home = self.make_dir()
+        self.write_file(os.path.join(home, '.pypirc'), PYPIRC)
+        self.set_env('HOME', home)
+        for name in ('PYPIUSER', 'PYPIPWD'):
+            self.set_env(name, None)
+
+    def test_targets(self):
+        self.assertEqual([
+            Target('internal', 'https://pypi.example.com/pypi',
+                   'internal-user', 'internal-password'),
+            Target('pypitest', REPOSITORIES['pypitest'], 'user', 'password'),
+            Target('fake', 'http://127.0.0.1:1/', 'user', 'password'),
+        ], resolve_targets(['internal']) + resolve_targets(
+            ['pypitest', 'fake=http://127.0.0.1:1/'],
+            credentials=CREDENTIALS))
+
+    def test_missing_credentials(self):
+        e = self.assertRaises(ReleaseError, resolve_targets,
+                              ['fake=http://127.0.0.1:1/'])
+        self.assertIn('fake', str(e))
+
+    def test_unknown_repository(self):
+        e = self.assertRaises(ReleaseError, resolve_targets, ['unknown'],
+                              credentials=CREDENTIALS)
+        self.assertIn('No repository URL known for unknown', str(e))
+
+
+class TestRelease(TestCase):
+
+    def setUp(self):
+        super(TestRelease, self).setUp()
+        self.disable_cache()
+        self.reset_indexes()
+        self.first = self.start_index(credentials=CREDENTIALS)
+        self.second = self.start_index(credentials=CREDENTIALS)
+        dist_dir = self.make_dir()
+        self.distributions = [make_sdist(dist_dir), make_wheel(dist_dir)]
+
+    def release(self, targets):
+        return release('', targets, distributions=self.distributions,
+                       verify_timeout=5)
+
+    def test_release_to_several_indexes(self):
+        self.assertEqual({'first': True, 'second': True}, self.release([
+            Target('first', self.first.url, *CREDENTIALS),
+            Target('second', self.second.url, *CREDENTIALS)]))
+        for index in (self.first, self.second):
+            self.assertEqual(2, index.counts['upload'])
+            self.assertEqual(['1.0'], list(
+                index.project_json('fake-pkg')['releases']))
+
+    def test_a_failing_target_does_not_stop_the_others(self):
+        results = self.release([
+            Target('first', self.first.url, 'user', 'wrong'),
+            Target('second', self.second.url, *CREDENTIALS)])
+        self.assertIs(True, results['second'])
+        self.assertIsInstance(results['first'], UploadError)
+        self.assertIn('2 of 2 files failed to upload to first',
+                      str(results['first']))
+        self.assertIsNone(self.first.project_json('fake-pkg'))
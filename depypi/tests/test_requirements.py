@@ -0,0 +1,167 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from depypi.tests import TestCase
+from depypi.requirements import (is_locked, parse_requirement,
+                                 read_requirements, requirement_name,
+                                 RequirementsError)
+
+ENVIRONMENT = {'python_version': '2.7', 'sys_platform': 'linux2'}
+
+
+class TestParseRequirement(TestCase):
+
+    def test_parse_requirement(self):
+        requirement = parse_requirement(
+            'requests[security, socks] >=2.7,<3 ; python_version < "3"')
+        self.assertEqual('requests', requirement.name)
+        self.assertEqual(('security', 'socks'), requirement.extras)
+        self.assertTrue(requirement.specifier.contains('2.9.1'))
+        self.assertFalse(requirement.specifier.contains('3.0'))
+        self.assertIsNone(requirement.url)
+        self.assertEqual('python_version < "3"', requirement.marker)
+
+    def test_parse_plain_and_url_requirements(self):
+        requirement = parse_requirement(b'six')
+        self.assertEqual(('six', (), None, None),
+                         (requirement.name, requirement.extras,
+                          requirement.url, requirement.marker))
+        requirement = parse_requirement('pkg (==1.0)')
+        self.assertTrue(requirement.specifier.is_pinned)
+        requirement = parse_requirement('pkg @ https://host/pkg-1.0.zip')
+        self.assertEqual('https://host/pkg-1.0.zip', requirement.url)
+
+    def test_invalid_requirements(self):
+        for text in ('', '-e .', 'pkg >> 1.0', 'pkg ==1.0 extra'):
+            self.assertRaises(RequirementsError, parse_requirement, text)
+
+    def test_requirement_name(self):
+        self.assertEqual('requests',
+                         requirement_name('requests[security]>=2.7'))
+        self.assertEqual('zope.interface',
+                         requirement_name('zope.interface==4.1'))
+        self.assertIsNone(requirement_name('-e .'))
+
+    def test_is_locked(self):
+        for requirement in ('six==1.10.0', 'six===1.10.0',
+                            'six==1.10.0; python_version < "3"',
+                            'six @ https://host/six-1.10.0.zip'):
+            self.assertTrue(is_locked(requirement), requirement)
+        for requirement in ('six', 'six>=1.9', 'six==1.*', 'six~=1.9',
+                            'six>=1.9,<1.10', 'not valid!'):
+            self.assertFalse(is_locked(requirement), requirement)
+
+
+class TestReadRequirements(TestCase):
+
+    def setUp(self):
+        super(TestReadRequirements, self).setUp()
+        self.path = self.make_dir()
+
+    def write(self, name, content):
+        return self.write_file(os.path.join(self.path, name), content)
+
+    def read(self, *names):
+        return [(line.name, line.requirement, line.marker,
+                 os.path.basename(line.path), line.lineno, line.constraint)
+                for line in read_requirements(
+                    [os.path.join(self.path, n) for n in names],
+                    environment=ENVIRONMENT)]
+
+    def test_lines(self):
+        self.write('requirements.txt',
+                   '# comment\n'
+                   '\n'
+                   'six==1.10.0  # pinned\n'
+                   'requests[security]>=2.7,\\\n'
+                   '    <3\n'
+                   '--index-url https://host/simple\n'
+                   'click==6.2 --hash=sha256:abc \\\n'
+                   '    --hash=sha256:def\n')
+        self.assertEqual([
+            ('six', 'six==1.10.0', None, 'requirements.txt', 3, False),
+            ('requests', 'requests[security]>=2.7,    <3', None,
+             'requirements.txt', 4, False),
+            ('click', 'click==6.2', None, 'requirements.txt', 7, False),
+        ], self.read('requirements.txt'))
+
+    def test_markers(self):
+        self.write('requirements.txt',
+                   'futures; python_version < "3"\n'
+                   'asyncio; python_version >= "3.4"\n')
+        self.assertEqual([('futures', 'futures', 'python_version < "3"',
+                           'requirements.txt', 1, False)],
+                         self.read('requirements.txt'))
+
+    def test_invalid_marker(self):
+        self.write('requirements.txt', 'six\nfutures; python_ver < "3"\n')
+        e = self.assertRaises(RequirementsError, self.read,
+                              'requirements.txt')
+        self.assertIn('requirements.txt:2', str(e))
+
+    def test_environment_variables(self):
+        self.set_env('SIX_VERSION', '1.10.0')
+        self.set_env('UNSET_VERSION', None)
+        self.write('requirements.txt', 'six==${SIX_VERSION}\n'
+                                       'click==${UNSET_VERSION}\n')
+        self.assertEqual(['six==1.10.0', 'click==${UNSET_VERSION}'],
+                         [line[1] for line in self.read('requirements.txt')])
+
+    def test_includes(self):
+        self.write('requirements.txt', 'six\n'
+                                       '-r base.txt\n'
+                                       '-c constraints.txt\n'
+                                       'click\n')
+        self.write('base.txt', '--requirement=nested/extra.txt\nrequests\n')
+        self.write('nested/extra.txt', '-rmore.txt\n')
+        self.write('nested/more.txt', 'jinja2\n')
+        self.write('constraints.txt', '-r base.txt\nsix==1.10.0\n')
+        self.write('dev.txt', '-r requirements.txt\n'
+                              '-r https://host/requirements.txt\n'
+                              'nose\n')
+        self.assertEqual([
+            ('six', False), ('jinja2', False), ('requests', False),
+            ('jinja2', True), ('requests', True), ('six', True),
+            ('click', False), ('nose', False),
+        ], [(line[0], line[5]) for line in self.read('dev.txt')])
+
+    def test_files_are_read_once(self):
+        self.write('requirements.txt', '-r base.txt\n-r base.txt\n')
+        self.write('base.txt', 'six\n')
+        self.assertEqual(['six'], [line[0] for line in self.read(
+            'requirements.txt', 'base.txt')])
+
+    def test_changed_files_are_read_again(self):
+        path = self.write('requirements.txt', 'six\n')
+        self.assertEqual(['six'], [line[0] for line in self.read(
+            'requirements.txt')])
+        self.write('requirements.txt', 'click\nrequests\n')
+        os.utime(path, (0, 0))
+        self.assertEqual(['click', 'requests'], [line[0] for line in self.read(
+            'requirements.txt')])
+
+    def test_circular_include(self):
+        self.write('a.txt', '-r b.txt\n')
+        self.write('b.txt', '-c a.txt\n')
+        e = self.assertRaises(RequirementsError, self.read, 'a.txt')
+        self.assertIn('circular include', str(e))
+
+    def test_missing_file(self):
+        self.write('requirements.txt', '-r missing.txt\n')
+        e = self.assertRaises(RequirementsError, self.read,
+                              'requirements.txt')
+        self.assertIn('missing.txt', str(e))
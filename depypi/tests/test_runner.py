@@ -0,0 +1,69 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from depypi.tests import TestCase
+from depypi.runner import run, run_python, CommandError
+
+
+class TestRun(TestCase):
+
+    def test_output(self):
+        self.assertEqual('out\nput', run_python([
+            '-c', 'import sys\n'
+                  'sys.stdout.write("out\\nput\\n")\n'
+                  'sys.stderr.write("err\\n")']))
+
+    def test_cwd(self):
+        path = self.make_dir()
+        self.assertEqual(os.path.realpath(path), os.path.realpath(run_python(
+            ['-c', 'import os; print(os.getcwd())'], cwd=path)))
+
+    def test_env(self):
+        env = dict(os.environ, DEPYPI_TEST_VALUE='value')
+        self.assertEqual('value', run_python(
+            ['-c', 'import os; print(os.environ["DEPYPI_TEST_VALUE"])'],
+            env=env))
+
+    def test_failure(self):
+        e = self.assertRaises(CommandError, run_python,
+                              ['-c', 'import sys; sys.exit(3)'],
+                              name='exiting')
+        self.assertEqual(3, e.returncode)
+        self.assertEqual('exiting failed with exit code 3', str(e))
+
+    def test_timeout(self):
+        start = time.time()
+        e = self.assertRaises(CommandError, run_python,
+                              ['-c', 'import time; time.sleep(30)'],
+                              timeout=0.5, name='sleeping')
+        self.assertLess(time.time() - start, 10)
+        self.assertEqual('sleeping timed out after 0.5s', str(e))
+
+    def test_timeout_kills_the_children_of_the_command(self):
+        if os.name != 'posix':
+            self.skipTest('process groups are POSIX only')
+        start = time.time()
+        self.assertRaises(CommandError, run,
+                          ['sh', '-c', 'sleep 30 & sleep 30'], timeout=0.5)
+        self.assertLess(time.time() - start, 10)
+
+    def test_missing_command(self):
+        e = self.assertRaises(CommandError, run,
+                              ['depypi-no-such-command'])
+        self.assertIsNone(e.returncode)
+        self.assertIn('Failed to run depypi-no-such-command', str(e))
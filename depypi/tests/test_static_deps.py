@@ -0,0 +1,163 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from depypi.tests import TestCase
+from depypi import static_deps
+from depypi.static_deps import get_static_dependencies
+
+
+class TestStaticDependencies(TestCase):
+
+    def setUp(self):
+        super(TestStaticDependencies, self).setUp()
+        self.path = self.make_dir()
+
+    def write(self, name, content):
+        return self.write_file(os.path.join(self.path, name), content)
+
+    def dependencies(self):
+        return get_static_dependencies(self.path)
+
+    def test_setup_py_literals(self):
+        self.write('setup.py',
+                   'from setuptools import setup\n'
+                   'setup(\n'
+                   '    name="fake-pkg",\n'
+                   '    install_requires=["six>=1.9", "click==6.2"],\n'
+                   '    extras_require={"test": ("nose",)},\n'
+                   '    setup_requires="pbr\\n# comment\\nwheel  # build",\n'
+                   ')\n')
+        self.assertEqual({'install_requires': ['six>=1.9', 'click==6.2'],
+                          'extras_require': {'test': ['nose']},
+                          'setup_requires': ['pbr', 'wheel'],
+                          'build_requires': []},
+                         self.dependencies())
+
+    def test_setup_py_variables(self):
+        self.write('setup.py',
+                   'import setuptools\n'
+                   'BASE = ["six"]\n'
+                   'REQUIRES = BASE + ["click"]\n'
+                   'TEST = "nose"\n'
+                   'setuptools.setup(install_requires=REQUIRES,\n'
+                   '                 extras_require={"test": [TEST]})\n')
+        self.assertEqual({'install_requires': ['six', 'click'],
+                          'extras_require': {'test': ['nose']},
+                          'setup_requires': [], 'build_requires': []},
+                         self.dependencies())
+
+    def test_setup_py_without_dependencies(self):
+        self.write('setup.py', 'setup(name="fake-pkg")\n')
+        self.assertEqual({'install_requires': [], 'extras_require': {},
+                          'setup_requires': [], 'build_requires': []},
+                         self.dependencies())
+
+    def test_missing_setup_py(self):
+        self.write('setup.cfg', '[options]\ninstall_requires = six\n')
+        self.assertIsNone(self.dependencies())
+        self.assertIsNone(get_static_dependencies(
+            os.path.join(self.path, 'missing')))
+
+    def test_dynamic_setup_py(self):
+        for source in (
+                'setup(**kwargs)\n',
+                'import sys\n'
+                'setup(install_requires=sys.argv)\n',
+                'REQUIRES = ["six"]\n'
+                'REQUIRES.append("click")\n'
+                'setup(install_requires=REQUIRES)\n',
+                'REQUIRES = ["six"]\n'
+                'REQUIRES += ["click"]\n'
+                'setup(install_requires=REQUIRES)\n',
+                'REQUIRES = ["six"]\n'
+                'if True:\n'
+                '    REQUIRES = ["click"]\n'
+                'setup(install_requires=REQUIRES)\n',
+                'EXTRAS = {"a": ["six"]}\n'
+                'setup(extras_require=dict(EXTRAS))\n',
+                'setup(extras_require={**EXTRAS})\n',
+                'setup(install_requires=[1])\n',
+                'print("no setup")\n',
+                'setup(\n'):
+            self.write('setup.py', source)
+            self.assertIsNone(self.dependencies(), source)
+
+    def test_setup_cfg(self):
+        self.write('setup.cfg',
+                   '[options]\n'
+                   'install_requires =\n'
+                   '    six>=1.9\n'
+                   '    click\n'
+                   'setup_requires = file: build.txt, more.txt\n'
+                   '[options.extras_require]\n'
+                   'test = nose\n')
+        self.write('build.txt', '# build\npbr\n')
+        self.write('more.txt', 'wheel\n')
+        self.write('setup.py', 'import setuptools\nsetuptools.setup()\n')
+        self.assertEqual({'install_requires': ['six>=1.9', 'click'],
+                          'extras_require': {'test': ['nose']},
+                          'setup_requires': ['pbr', 'wheel'],
+                          'build_requires': []},
+                         self.dependencies())
+
+    def test_setup_py_overrides_setup_cfg(self):
+        self.write('setup.cfg', '[options]\ninstall_requires = six\n')
+        self.write('setup.py', 'setup(install_requires=["click"])\n')
+        self.assertEqual(['click'],
+                         self.dependencies()['install_requires'])
+
+    def test_missing_setup_cfg_file(self):
+        self.write('setup.cfg',
+                   '[options]\ninstall_requires = file: missing.txt\n')
+        self.write('setup.py', 'setup()\n')
+        self.assertIsNone(self.dependencies())
+
+    def test_pyproject(self):
+        if static_deps.toml is None:
+            self.skipTest('no TOML parser')
+        self.write('pyproject.toml',
+                   '[build-system]\n'
+                   'requires = ["setuptools", "wheel"]\n'
+                   '[project]\n'
+                   'name = "fake-pkg"\n'
+                   'dependencies = ["six>=1.9"]\n'
+                   '[project.optional-dependencies]\n'
+                   'test = ["nose"]\n')
+        self.write('setup.py', 'setup(setup_requires=["pbr", "wheel"])\n')
+        self.assertEqual({'install_requires': ['six>=1.9'],
+                          'extras_require': {'test': ['nose']},
+                          'setup_requires': ['pbr', 'wheel'],
+                          'build_requires': ['setuptools', 'wheel']},
+                         self.dependencies())
+
+    def test_dynamic_pyproject_dependencies_come_from_setup_py(self):
+        if static_deps.toml is None:
+            self.skipTest('no TOML parser')
+        self.write('pyproject.toml',
+                   '[project]\n'
+                   'name = "fake-pkg"\n'
+                   'dynamic = ["dependencies"]\n'
+                   'dependencies = ["ignored"]\n')
+        self.write('setup.py', 'setup(install_requires=["six"])\n')
+        self.assertEqual(['six'], self.dependencies()['install_requires'])
+
+    def test_invalid_pyproject(self):
+        if static_deps.toml is None:
+            self.skipTest('no TOML parser')
+        self.write('pyproject.toml', '[project\n')
+        self.write('setup.py', 'setup(install_requires=["six"])\n')
+        self.assertIsNone(self.dependencies())
@@ -0,0 +1,193 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import sys
+import json
+import threading
+
+from depypi.tests import TestCase
+from depypi import timing
+from depypi.timing import Recorder, REDACTED, TimingError
+
+
+class TestRecorder(TestCase):
+
+    def test_nested_spans(self):
+        recorder = Recorder('upload')
+        with recorder.span('build', dist_type='sdist'):
+            with recorder.span('setup.py') as attributes:
+                attributes['outcome'] = 'built'
+        with recorder.span('upload'):
+            pass
+        spans = dict((s['name'], s) for s in recorder.spans)
+        self.assertIsNone(spans['build']['parent'])
+        self.assertEqual(spans['build']['id'], spans['setup.py']['parent'])
+        self.assertIsNone(spans['upload']['parent'])
+        self.assertEqual({'dist_type': 'sdist'},
+                         spans['build']['attributes'])
+        self.assertEqual({'outcome': 'built'},
+                         spans['setup.py']['attributes'])
+        self.assertGreaterEqual(spans['build']['duration'],
+                                spans['setup.py']['duration'])
+
+    def test_spans_of_other_threads_are_not_children(self):
+        recorder = Recorder()
+        with recorder.span('main'):
+            thread = threading.Thread(target=self._span, args=(recorder,))
+            thread.start()
+            thread.join()
+        spans = dict((s['name'], s) for s in recorder.spans)
+        self.assertIsNone(spans['worker']['parent'])
+        self.assertNotEqual(spans['main']['thread_id'],
+                            spans['worker']['thread_id'])
+
+    @staticmethod
+    def _span(recorder):
+        with recorder.span('worker'):
+            pass
+
+    def test_errors(self):
+        recorder = Recorder()
+        with recorder.span('fine'):
+            try:
+                with recorder.span('exit'):
+                    sys.exit(2)
+            except SystemExit:
+                pass
+            try:
+                with recorder.span('success'):
+                    sys.exit(0)
+            except SystemExit:
+                pass
+        self.assertRaises(ValueError, self._fail, recorder)
+        errors = dict((s['name'], s['error']) for s in recorder.spans)
+        self.assertEqual({'fine': None, 'exit': 'exit status 2',
+                          'success': None, 'failure': 'ValueError: bad'},
+                         errors)
+
+    @staticmethod
+    def _fail(recorder):
+        with recorder.span('failure'):
+            raise ValueError('bad')
+
+    def test_summary(self):
+        recorder = Recorder()
+        for _ in range(3):
+            with recorder.span('check'):
+                pass
+        summary = recorder.summary()['check']
+        self.assertEqual(3, summary['count'])
+        self.assertGreaterEqual(summary['total'], summary['max'])
+
+    def test_json(self):
+        recorder = Recorder('upload', {'credentials': ('user', 'password'),
+                                       'path': '.'})
+        with recorder.span('build'):
+            pass
+        recorder.finish(3)
+        report = json.loads(recorder.format('json'))
+        self.assertEqual('upload', report['command'])
+        self.assertEqual({'credentials': REDACTED, 'path': '.'},
+                         report['options'])
+        self.assertEqual(3, report['exit_status'])
+        self.assertEqual(['build'], [s['name'] for s in report['spans']])
+        self.assertEqual(1, report['summary']['build']['count'])
+
+    def test_chrome(self):
+        recorder = Recorder('upload')
+        self.assertRaises(ValueError, self._fail, recorder)
+        recorder.finish(1)
+        report = json.loads(recorder.format('chrome'))
+        span, thread = report['traceEvents']
+        self.assertEqual(('failure', 'X', 'upload', {'error': 'ValueError: '
+                                                              'bad'}),
+                         (span['name'], span['ph'], span['cat'],
+                          span['args']))
+        self.assertEqual(('thread_name', 'M', span['tid']),
+                         (thread['name'], thread['ph'], thread['tid']))
+        self.assertEqual(1, report['otherData']['exit_status'])
+
+    def test_unwritable_report(self):
+        recorder = Recorder()
+        self.assertRaises(TimingError, recorder.write,
+                          os.path.join(self.make_dir(), 'missing', 'r.json'))
+
+    def test_redact_options(self):
+        self.assertEqual({'credentials': None, 'quiet': True},
+                         timing.redact_options({'credentials': None,
+                                                'quiet': True}))
+
+
+class TestRecording(TestCase):
+
+    def setUp(self):
+        super(TestRecording, self).setUp()
+        self.path = os.path.join(self.make_dir(), 'report.json')
+
+    def record(self, code=None):
+        with timing.recording(self.path, command='upload',
+                              options={'credentials': 'user:password'}):
+            with timing.span('build'):
+                pass
+            if code is not None:
+                sys.exit(code)
+
+    def report(self):
+        with open(self.path) as f:
+            return json.load(f)
+
+    def test_span_without_a_recording(self):
+        with timing.span('build', target='pypi') as attributes:
+            self.assertEqual({'target': 'pypi'}, attributes)
+
+    def test_recording(self):
+        self.record()
+        report = self.report()
+        self.assertEqual(0, report['exit_status'])
+        self.assertEqual({'credentials': REDACTED}, report['options'])
+        spans = dict((s['name'], s) for s in report['spans'])
+        self.assertEqual(spans['upload']['id'], spans['build']['parent'])
+        self.assertIsNone(timing.stop())
+
+    def test_exit_status(self):
+        for code, exit_status in ((0, 0), (3, 3), ('failed', 1)):
+            self.assertRaises(SystemExit, self.record, code)
+            self.assertEqual(exit_status, self.report()['exit_status'],
+                             code)
+        try:
+            with timing.recording(self.path):
+                sys.exit()
+        except SystemExit:
+            pass
+        self.assertEqual(0, self.report()['exit_status'])
+
+    def test_failure(self):
+        def fail():
+            with timing.recording(self.path):
+                raise ValueError('bad')
+        self.assertRaises(ValueError, fail)
+        self.assertEqual(1, self.report()['exit_status'])
+
+    def test_one_recording_at_a_time(self):
+        with timing.recording(self.path):
+            self.assertRaises(TimingError, timing.start)
+
+    def test_no_path(self):
+        with timing.recording('') as recorder:
+            self.assertIsNone(recorder)
+            with timing.span('build'):
+                pass
+        self.assertFalse(os.path.exists(self.path))
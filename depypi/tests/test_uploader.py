@@ -0,0 +1,162 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import hashlib
+
+from depypi.tests import TestCase, CREDENTIALS, make_sdist, make_wheel
+from depypi import uploader
+from depypi.uploader import UploadError
+
+
+class TestDistributionFiles(TestCase):
+
+    def test_is_distribution_of(self):
+        for filename, expected in (
+                ('fake-pkg-1.0.tar.gz', True),
+                ('Fake_Pkg-1.0.zip', True),
+                ('fake_pkg-1.0-py2.py3-none-any.whl', True),
+                ('fake_pkg-1.0-py2.7.egg', True),
+                ('fake-pkg-1.0.1.tar.gz', False),
+                ('fake-pkg-extra-1.0.tar.gz', False),
+                ('fake_pkg-1.01-py2.py3-none-any.whl', False),
+                ('fake-pkg-1.0.txt', False)):
+            self.assertEqual(expected, uploader.is_distribution_of(
+                filename, 'fake-pkg', '1.0'), filename)
+
+    def test_find_distributions(self):
+        dist_dir = self.make_dir()
+        sdist = make_sdist(dist_dir)
+        wheel = make_wheel(dist_dir)
+        make_sdist(dist_dir, version='0.9')
+        os.mkdir(os.path.join(dist_dir, 'fake-pkg-1.0.zip'))
+        self.assertEqual(sorted([sdist, wheel]), uploader.find_distributions(
+            dist_dir, 'fake-pkg', '1.0'))
+        self.assertEqual([], uploader.find_distributions(
+            os.path.join(dist_dir, 'missing'), 'fake-pkg', '1.0'))
+
+    def test_filetype_and_pyversion(self):
+        self.assertEqual(('sdist', 'source'), (
+            uploader.filetype('a-1.0.tar.gz'),
+            uploader.pyversion('a-1.0.tar.gz')))
+        self.assertEqual(('bdist_wheel', 'py2.py3'), (
+            uploader.filetype('a-1.0-py2.py3-none-any.whl'),
+            uploader.pyversion('a-1.0-py2.py3-none-any.whl')))
+        self.assertEqual(('bdist_egg', '2.7'), (
+            uploader.filetype('a-1.0-py2.7.egg'),
+            uploader.pyversion('a-1.0-py2.7.egg')))
+
+    def test_file_digests(self):
+        path = self.write_file(os.path.join(self.make_dir(), 'f'), 'x' * 10)
+        self.assertEqual((hashlib.md5(b'x' * 10).hexdigest(),
+                          hashlib.sha256(b'x' * 10).hexdigest()),
+                         uploader.file_digests(path))
+
+
+class TestMetadata(TestCase):
+
+    def test_read_metadata(self):
+        for make in (make_sdist, make_wheel):
+            fields = uploader.read_metadata(make(
+                self.make_dir(), requires_dist=['six', 'click']))
+            self.assertIn(('name', 'fake-pkg'), fields)
+            self.assertIn(('version', '1.0'), fields)
+            self.assertEqual(['six', 'click'], [
+                value for field, value in fields if field == 'requires_dist'])
+
+    def test_read_release(self):
+        self.assertEqual(('fake-pkg', '2.0'), uploader.read_release(
+            make_sdist(self.make_dir(), version='2.0')))
+
+    def test_read_release_of_a_broken_file(self):
+        path = self.write_file(
+            os.path.join(self.make_dir(), 'fake-pkg-1.0.tar.gz'), 'broken')
+        self.assertRaises(UploadError, uploader.read_release, path)
+        self.assertRaises(UploadError, uploader.read_release,
+                          path + '.missing')
+
+    def test_metadata_from_pkg_info(self):
+        fields = uploader.metadata_from_pkg_info(
+            'Metadata-Version: 1.1\nName: a\nVersion: 1.0\n'
+            'License: UNKNOWN\nClassifier: A\nClassifier: B\n\nlong text\n')
+        self.assertEqual(sorted([
+            ('metadata_version', '1.1'), ('name', 'a'), ('version', '1.0'),
+            ('classifiers', 'A'), ('classifiers', 'B'),
+            ('description', 'long text\n')]), sorted(fields))
+
+    def test_metadata_from_setup(self):
+        fields = uploader.metadata_from_setup({
+            'name': 'a', 'version': '1.0', 'description': 'summary',
+            'keywords': ['x', 'y'], 'classifiers': ['A', 'B'],
+            'install_requires': ['six']})
+        self.assertEqual(sorted([
+            ('metadata_version', '1.0'), ('name', 'a'), ('version', '1.0'),
+            ('summary', 'summary'), ('keywords', 'x y'),
+            ('classifiers', 'A'), ('classifiers', 'B')]), sorted(fields))
+
+
+class TestMultipartBody(TestCase):
+
+    def test_streams_fields_and_files(self):
+        path = self.write_file(os.path.join(self.make_dir(), 'f.txt'),
+                               'content' * 1000)
+        progress = []
+        body = uploader.MultipartBody([('name', 'a')], [('content', path)],
+                                      progress.append)
+        chunks = []
+        while True:
+            chunk = body.read(1000)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        data = b''.join(chunks)
+        self.assertEqual(len(body), len(data))
+        self.assertIn(b'filename="f.txt"', data)
+        self.assertIn(b'content' * 1000, data)
+        self.assertTrue(data.endswith(
+            '--{0}--\r\n'.format(body.boundary).encode('ascii')))
+        self.assertEqual(len(data), progress[-1])
+        self.assertGreater(len(progress), 5)
+
+
+class TestUploader(TestCase):
+
+    def setUp(self):
+        super(TestUploader, self).setUp()
+        self.index = self.start_index(credentials=CREDENTIALS)
+
+    def test_upload(self):
+        wheel = make_wheel(self.make_dir())
+        result = uploader.Uploader(self.index.url, *CREDENTIALS).upload(wheel)
+        self.assertEqual(os.path.basename(wheel), result.filename)
+        self.assertEqual(os.path.getsize(wheel), result.size)
+        files = self.index.release_json('fake-pkg', '1.0')['urls']
+        self.assertEqual('bdist_wheel', files[0]['packagetype'])
+        self.assertEqual(uploader.file_digests(wheel)[1],
+                         files[0]['digests']['sha256'])
+
+    def test_upload_with_wrong_digests(self):
+        sdist = make_sdist(self.make_dir())
+        error = self.assertRaises(
+            UploadError, uploader.Uploader(self.index.url, *CREDENTIALS)
+            .upload, sdist, digests=('0' * 32, '0' * 64))
+        self.assertIn('400', str(error))
+
+    def test_unreachable_index(self):
+        url = self.index.url
+        self.index.stop()
+        self.assertRaises(
+            UploadError, uploader.Uploader(url, *CREDENTIALS).register,
+            [('name', 'a'), ('version', '1.0')])
@@ -0,0 +1,104 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import testtools
+
+from depypi import versions
+
+# the examples of PEP 440, in ascending order
+ORDERED = [
+    '1.dev0', '1.0.dev456', '1.0a1', '1.0a2.dev456', '1.0a12.dev456',
+    '1.0a12', '1.0b1.dev456', '1.0b2', '1.0b2.post345.dev456',
+    '1.0b2.post345', '1.0rc1.dev456', '1.0rc1', '1.0', '1.0+abc.5',
+    '1.0+abc.7', '1.0+5', '1.0.post456.dev34', '1.0.post456', '1.0.15',
+    '1.1.dev1', '1!0.1',
+]
+
+# specifier, version, prereleases, contained. checked against PEP 440 and
+# packaging
+CONTAINS = [
+    # exclusive ordered comparisons
+    ('>1.7', '1.7.1', False, True),
+    ('>1.7', '1.7.0.post1', False, False),
+    ('>1.7', '1.7+local', False, False),
+    ('>1.7.post2', '1.7.1', False, True),
+    ('>1.7.post2', '1.7.0.post3', False, True),
+    ('>1.0a1', '1.0a1.post1', True, False),
+    ('>1.0a1', '1.0a1.post1.dev2', True, False),
+    ('>1.0a1', '1.0a2', True, True),
+    ('>1.0a1', '1.0.post1', True, True),
+    ('>1.0a1', '1.0+local', True, True),
+    ('>1.0a1', '1.0a1+local', True, False),
+    ('>1.dev1', '1.post1', True, True),
+    ('>1.dev1', '1.post1.dev1', True, True),
+    ('<2.0', '1.9', False, True),
+    ('<2.0', '2.0rc1', True, False),
+    ('<2.0', '2.0.dev1', True, False),
+    ('<2.0rc1', '2.0b1', True, True),
+    ('<2.0.post1', '2.0', False, True),
+    ('<2.0.post1', '2.0.post1.dev1', True, False),
+    ('<2.0.post1', '2.0rc1.post1', True, True),
+    ('<2.0.post1', '2.0a1', True, True),
+    # inclusive ordered comparisons
+    ('>=1.0', '1.0', False, True),
+    ('>=1.0', '1.0.post1', False, True),
+    ('>=1.0', '1.0rc1', True, False),
+    ('<=1.0', '1.0+local', False, True),
+    ('<=1.0', '1.0.post1', False, False),
+    # version matching
+    ('==1.1', '1.1.0', False, True),
+    ('==1.1', '1.1.post1', False, False),
+    ('==1.1.*', '1.1.post1', False, True),
+    ('==1.1.*', '1.1a1', True, True),
+    ('==1.1.*', '1.10', False, False),
+    ('==1.0', '1.0+local', False, True),
+    ('==1.0+local', '1.0', False, False),
+    ('!=1.1.*', '1.2', False, True),
+    ('!=1.1.*', '1.1.3', False, False),
+    # compatible release
+    ('~=2.2', '2.3', False, True),
+    ('~=2.2', '3.0', False, False),
+    ('~=2.2.0', '2.2.5', False, True),
+    ('~=2.2.0', '2.3', False, False),
+    ('~=1.4.5a4', '1.4.5', False, True),
+    ('~=1.4.5a4', '1.4.5a3', True, False),
+    ('~=2.2.post3', '2.2.post4', False, True),
+    ('~=2.2.post3', '2.2', False, False),
+    # prereleases are only allowed when asked for
+    ('>=1.0', '2.0a1', False, False),
+    ('>=1.0', '2.0a1', True, True),
+]
+
+
+class TestVersions(testtools.TestCase):
+
+    def test_order(self):
+        for lower, higher in zip(ORDERED, ORDERED[1:]):
+            self.assertLess(versions.version_key(lower),
+                            versions.version_key(higher),
+                            '{0} < {1}'.format(lower, higher))
+
+    def test_sort_versions(self):
+        self.assertEqual(ORDERED,
+                         versions.sort_versions(reversed(ORDERED)))
+
+    def test_contains(self):
+        for specifier, version, prereleases, contained in CONTAINS:
+            self.assertEqual(
+                contained,
+                versions.SpecifierSet(specifier).contains(
+                    version, prereleases=prereleases),
+                '{0} in {1} (prereleases={2})'.format(
+                    version, specifier, prereleases))
@@ -0,0 +1,268 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from . import logger
+
+lgr = logger.init()
+
+# code marks its phases with span(), which does nothing unless a run is being
+# recorded with recording(). the chrome format loads in chrome://tracing and
+# Perfetto
+RUN_REPORT_FORMATS = ('json', 'chrome')
+
+# reports end up on CI dashboards, so the values of these options are never
+# written to them
+SECRET_OPTIONS = ('credentials',)
+REDACTED = '<redacted>'
+
+_recorder = None
+_recorder_lock = threading.Lock()
+
+
+class TimingError(Exception):
+    pass
+
+
+class Recorder():
+    def __init__(self, command=None, options=None):
+        """Collects the spans of one run. Spans may be recorded from any
+        thread.
+        :param command: name of the command being run
+        :param options: dict of option name to value the command was run
+        with. values of SECRET_OPTIONS are redacted
+        :return: None
+        """
+        self.command = command
+        self.options = redact_options(options or {})
+        self.spans = []
+        self.started = time.time()
+        self.duration = None
+        self.exit_status = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._next_id = 0
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Times the block it wraps. Spans opened inside it on the same
+        thread are recorded as its children.
+        :param name: phase name, e.g. build
+        :param attributes: JSON serializable details of the span
+        """
+        stack = self._stack()
+        with self._lock:
+            self._next_id += 1
+            span_id = self._next_id
+        parent = stack[-1] if stack else None
+        stack.append(span_id)
+        start = time.time()
+        error = None
+        try:
+            yield attributes
+        except SystemExit as e:
+            if e.code:
+                error = 'exit status {0}'.format(e.code)
+            raise
+        except Exception as e:
+            error = '{0}: {1}'.format(type(e).__name__, e)
+            raise
+        finally:
+            end = time.time()
+            stack.pop()
+            thread = threading.current_thread()
+            with self._lock:
+                self.spans.append({
+                    'id': span_id,
+                    'parent': parent,
+                    'name': name,
+                    'start': start - self.started,
+                    'duration': end - start,
+                    'thread': thread.name,
+                    'thread_id': thread.ident,
+                    'attributes': attributes,
+                    'error': error,
+                })
+
+    def finish(self, exit_status=0):
+        self.duration = time.time() - self.started
+        self.exit_status = exit_status
+
+    def summary(self):
+        """Totals of the spans per name
+        :return: dict of span name to a dict of count, total and max seconds
+        """
+        summary = {}
+        for span in self.spans:
+            totals = summary.setdefault(
+                span['name'], {'count': 0, 'total': 0.0, 'max': 0.0})
+            totals['count'] += 1
+            totals['total'] += span['duration']
+            totals['max'] = max(totals['max'], span['duration'])
+        return summary
+
+    def to_json(self):
+        return json.dumps({
+            'command': self.command,
+            'options': self.options,
+            'started': time.strftime('%Y-%m-%dT%H:%M:%SZ',
+                                     time.gmtime(self.started)),
+            'duration': self.duration,
+            'exit_status': self.exit_status,
+            'summary': self.summary(),
+            'spans': sorted(self.spans, key=lambda s: s['start']),
+        }, indent=4, sort_keys=True, default=str)
+
+    def to_chrome(self):
+        """Formats the spans as Chrome trace events. Every span is a
+        complete ('X') event in microseconds, on the lane of its thread.
+        """
+        pid = os.getpid()
+        events = []
+        threads = {}
+        for span in sorted(self.spans, key=lambda s: s['start']):
+            threads.setdefault(span['thread_id'], span['thread'])
+            args = dict(span['attributes'])
+            if span['error']:
+                args['error'] = span['error']
+            events.append({
+                'name': span['name'],
+                'cat': self.command or 'depypi',
+                'ph': 'X',
+                'ts': int(span['start'] * 1e6),
+                'dur': int(span['duration'] * 1e6),
+                'pid': pid,
+                'tid': span['thread_id'],
+                'args': args,
+            })
+        for thread_id, thread_name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                           'tid': thread_id, 'args': {'name': thread_name}})
+        return json.dumps({'traceEvents': events,
+                           'displayTimeUnit': 'ms',
+                           'otherData': {'command': self.command,
+                                         'exit_status': self.exit_status}},
+                          indent=4, sort_keys=True, default=str)
+
+    def format(self, report_format):
+        if report_format == 'chrome':
+            return self.to_chrome()
+        return self.to_json()
+
+    def write(self, path, report_format='json'):
+        """Writes the report to path
+        :raises: TimingError if the file can not be written
+        """
+        try:
+            with open(path, 'w') as f:
+                f.write(self.format(report_format))
+        except (IOError, OSError) as e:
+            raise TimingError('Unable to write the run report to {0}: '
+                              '{1}'.format(path, e))
+
+
+def redact_options(options):
+    """Hides the values of SECRET_OPTIONS
+    :param options: dict of option name to value
+    :return: copy of options
+    """
+    return dict((name, REDACTED if name in SECRET_OPTIONS and value
+                 else value) for name, value in options.items())
+
+
+def start(command=None, options=None):
+    """Starts recording the spans of this process
+    :return: Recorder
+    """
+    global _recorder
+    with _recorder_lock:
+        if _recorder is not None:
+            raise TimingError('A run is already being recorded')
+        _recorder = Recorder(command, options)
+        return _recorder
+
+
+def stop():
+    """Stops recording
+    :return: the Recorder which was recording, or None
+    """
+    global _recorder
+    with _recorder_lock:
+        recorder, _recorder = _recorder, None
+        return recorder
+
+
+@contextmanager
+def span(name, **attributes):
+    """Times a phase of the run being recorded, if any (see Recorder.span)
+    :return: the dict of attributes of the span, which may be updated
+    inside the block, e.g. with its outcome
+    """
+    recorder = _recorder
+    if recorder is None:
+        yield attributes
+        return
+    with recorder.span(name, **attributes) as attributes:
+        yield attributes
+
+
+@contextmanager
+def recording(path, report_format='json', command=None, options=None):
+    """Records the spans of the wrapped run and writes its report to path
+    when it ends, including when it fails or exits.
+    :param path: file to write the report to. nothing is recorded if empty
+    :param report_format: one of RUN_REPORT_FORMATS
+    :param command: name of the command being run, the root span
+    :param options: dict of option name to value the command was run with
+    """
+    if not path:
+        yield None
+        return
+    recorder = start(command, options)
+    exit_status = 0
+    try:
+        with recorder.span(command or 'run'):
+            yield recorder
+    except SystemExit as e:
+        # sys.exit() and sys.exit(None) are successful exits, a message is
+        # a failure
+        if e.code is None:
+            exit_status = 0
+        elif isinstance(e.code, int):
+            exit_status = e.code
+        else:
+            exit_status = 1
+        raise
+    except Exception:
+        exit_status = 1
+        raise
+    finally:
+        stop()
+        recorder.finish(exit_status)
+        try:
+            recorder.write(path, report_format)
+            lgr.debug('wrote the run report to {0}'.format(path))
+        except TimingError as e:
+            lgr.error(e)
@@ -0,0 +1,388 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import re
+import time
+import uuid
+import hashlib
+import tarfile
+import zipfile
+from email.parser import Parser
+from collections import namedtuple
+
+import requests
+
+from . import logger
+from .client import get_session, DEFAULT_CONNECT_TIMEOUT
+
+lgr = logger.init()
+
+CHUNK_SIZE = 64 * 1024
+# uploads can take a long time for the index to acknowledge
+DEFAULT_UPLOAD_READ_TIMEOUT = 300
+
+SDIST_EXTENSIONS = ('.tar.gz', '.tar.bz2', '.tgz', '.zip')
+BINARY_EXTENSIONS = ('.whl', '.egg')
+
+# PKG-INFO headers and the upload form fields they map to
+HEADER_FIELDS = {
+    'Metadata-Version': 'metadata_version',
+    'Name': 'name',
+    'Version': 'version',
+    'Summary': 'summary',
+    'Home-page': 'home_page',
+    'Download-URL': 'download_url',
+    'Author': 'author',
+    'Author-email': 'author_email',
+    'Maintainer': 'maintainer',
+    'Maintainer-email': 'maintainer_email',
+    'License': 'license',
+    'Keywords': 'keywords',
+    'Requires-Python': 'requires_python',
+    'Description': 'description',
+}
+MULTIPLE_HEADER_FIELDS = {
+    'Platform': 'platform',
+    'Classifier': 'classifiers',
+    'Requires-Dist': 'requires_dist',
+    'Provides-Extra': 'provides_extra',
+}
+
+# setup() keyword arguments and the register form fields they map to
+SETUP_FIELDS = {
+    'name': 'name',
+    'version': 'version',
+    'description': 'summary',
+    'long_description': 'description',
+    'url': 'home_page',
+    'download_url': 'download_url',
+    'author': 'author',
+    'author_email': 'author_email',
+    'maintainer': 'maintainer',
+    'maintainer_email': 'maintainer_email',
+    'license': 'license',
+    'keywords': 'keywords',
+    'platforms': 'platform',
+    'classifiers': 'classifiers',
+    'python_requires': 'requires_python',
+}
+
+UploadResult = namedtuple('UploadResult',
+                          ['filename', 'size', 'elapsed', 'rate'])
+
+
+class UploadError(Exception):
+    pass
+
+
+def _normalize(name):
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def is_distribution_of(filename, name, version):
+    """Is filename a distribution file of name==version?
+    """
+    for extension in SDIST_EXTENSIONS:
+        if filename.endswith(extension):
+            base = filename[:-len(extension)]
+            suffix = '-' + version
+            return base.endswith(suffix) and \
+                _normalize(base[:-len(suffix)]) == _normalize(name)
+    for extension in BINARY_EXTENSIONS:
+        if filename.endswith(extension):
+            parts = filename[:-len(extension)].split('-')
+            return len(parts) > 2 and \
+                _normalize(parts[0]) == _normalize(name) and \
+                parts[1] == version.replace('-', '_')
+    return False
+
+
+def find_distributions(dist_dir, name, version):
+    """Finds the built distribution files of a release
+    :param dist_dir: directory setup.py wrote the distributions to
+    :param name: name of the package
+    :param version: version of the package
+    :return: sorted list of paths
+    """
+    if not os.path.isdir(dist_dir):
+        return []
+    return sorted(
+        os.path.join(dist_dir, f) for f in os.listdir(dist_dir)
+        if is_distribution_of(f, name, version) and
+        os.path.isfile(os.path.join(dist_dir, f)))
+
+
+def filetype(path):
+    """Gets the upload filetype of a distribution file
+    """
+    if path.endswith('.whl'):
+        return 'bdist_wheel'
+    if path.endswith('.egg'):
+        return 'bdist_egg'
+    return 'sdist'
+
+
+def pyversion(path):
+    """Gets the python version tag the index expects for a distribution
+    """
+    if path.endswith('.whl'):
+        return os.path.basename(path).split('-')[-3]
+    if path.endswith('.egg'):
+        return os.path.basename(path)[:-len('.egg')].split('-')[2][2:]
+    return 'source'
+
+
+def read_metadata(path):
+    """Reads the PKG-INFO/METADATA of a built distribution
+    :param path: path to an sdist, wheel or egg
+    :return: list of (field, value) upload form fields
+    """
+    if path.endswith('.whl') or path.endswith('.egg') or \
+            path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            names = [n for n in archive.namelist()
+                     if n.endswith('.dist-info/METADATA') or
+                     n.endswith('EGG-INFO/PKG-INFO') or
+                     n.count('/') == 1 and n.endswith('/PKG-INFO')]
+            if not names:
+                raise UploadError('no metadata found in {0}'.format(path))
+            content = archive.read(sorted(names, key=len)[0])
+    else:
+        with tarfile.open(path) as archive:
+            members = [m for m in archive.getmembers()
+                       if m.name.count('/') == 1 and
+                       m.name.endswith('/PKG-INFO')]
+            if not members:
+                raise UploadError('no PKG-INFO found in {0}'.format(path))
+            content = archive.extractfile(members[0]).read()
+    return metadata_from_pkg_info(content.decode('utf-8'))
+
+
+def read_release(path):
+    """Gets the project and version a built distribution belongs to
+    :param path: path to an sdist, wheel or egg
+    :return: tuple of name and version, as in its metadata
+    :raises: UploadError if the file has no readable name and version
+    """
+    try:
+        fields = dict(read_metadata(path))
+    except (IOError, OSError, tarfile.TarError, zipfile.BadZipfile) as e:
+        raise UploadError('unable to read the metadata of {0}: {1}'.format(
+            path, e))
+    if not fields.get('name') or not fields.get('version'):
+        raise UploadError('{0} has no name or version in its '
+                          'metadata'.format(path))
+    return fields['name'], fields['version']
+
+
+def metadata_from_pkg_info(content):
+    message = Parser().parsestr(content)
+    fields = []
+    for header, field in HEADER_FIELDS.items():
+        if message.get(header) not in (None, 'UNKNOWN'):
+            fields.append((field, message.get(header)))
+    for header, field in MULTIPLE_HEADER_FIELDS.items():
+        for value in message.get_all(header) or []:
+            fields.append((field, value))
+    body = message.get_payload()
+    if body and body.strip() and 'Description' not in message:
+        fields.append(('description', body))
+    return fields
+
+
+def metadata_from_setup(attrs):
+    """Converts probed setup() arguments to register form fields
+    :param attrs: dict as returned by metadata.get_metadata
+    :return: list of (field, value) tuples
+    """
+    fields = [('metadata_version', '1.0')]
+    for key, field in SETUP_FIELDS.items():
+        value = attrs.get(key)
+        if value is None:
+            continue
+        if isinstance(value, list):
+            if key == 'keywords':
+                fields.append((field, ' '.join(value)))
+            else:
+                fields.extend((field, v) for v in value)
+        else:
+            fields.append((field, value))
+    return fields
+
+
+def file_digests(path):
+    """Hashes a file in chunks
+    :return: (md5, sha256) hex digests
+    """
+    md5 = hashlib.md5()
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return md5.hexdigest(), sha256.hexdigest()
+
+
+class MultipartBody():
+    def __init__(self, fields, files=(), callback=None):
+        """A multipart/form-data body that is read from disk as it is sent.
+        Its length is known up front, so it is sent with a Content-Length
+        and never held in memory as a whole.
+        :param fields: list of (name, value) text fields
+        :param files: list of (name, path) file fields
+        :param callback: called with the number of bytes read so far
+        :return: None
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = 'multipart/form-data; boundary={0}'.format(
+            self.boundary)
+        self.callback = callback
+        self.bytes_read = 0
+        self._parts = []
+        for name, value in fields:
+            if not isinstance(value, bytes):
+                value = value.encode('utf-8')
+            self._parts.append(self._header(name) + value + b'\r\n')
+        for name, path in files:
+            self._parts.append(self._header(name, os.path.basename(path)))
+            self._parts.append(_FilePart(path))
+            self._parts.append(b'\r\n')
+        self._parts.append('--{0}--\r\n'.format(self.boundary).encode())
+        # file parts are told apart by type, as paths are bytes on Python 2
+        self.length = sum(
+            p.size if isinstance(p, _FilePart) else len(p)
+            for p in self._parts)
+        self._current = None
+
+    def _header(self, name, filename=None):
+        disposition = 'form-data; name="{0}"'.format(name)
+        if filename:
+            disposition += '; filename="{0}"'.format(filename)
+        header = '--{0}\r\nContent-Disposition: {1}\r\n'.format(
+            self.boundary, disposition)
+        if filename:
+            header += 'Content-Type: application/octet-stream\r\n'
+        return (header + '\r\n').encode('utf-8')
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.length
+        chunks = []
+        remaining = size
+        while remaining > 0 and (self._current or self._parts):
+            if self._current is None:
+                part = self._parts.pop(0)
+                self._current = part.open() if isinstance(
+                    part, _FilePart) else _BytesReader(part)
+            chunk = self._current.read(remaining)
+            if not chunk:
+                self._current.close()
+                self._current = None
+                continue
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        data = b''.join(chunks)
+        self.bytes_read += len(data)
+        if self.callback and data:
+            self.callback(self.bytes_read)
+        return data
+
+
+class _FilePart():
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+
+    def open(self):
+        return open(self.path, 'rb')
+
+
+class _BytesReader():
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+
+    def read(self, size):
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+    def close(self):
+        pass
+
+
+class Uploader():
+    def __init__(self, repository_url, username, password, session=None,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout=DEFAULT_UPLOAD_READ_TIMEOUT):
+        """Uploads and registers distributions using the index's upload API
+        :param repository_url: upload URL, e.g. https://pypi.python.org/pypi
+        :param username: index username
+        :param password: index password
+        :param session: requests session. default is the shared one
+        :return: None
+        """
+        self.repository_url = repository_url
+        self.auth = (username, password)
+        self.session = session or get_session()
+        self.timeout = (connect_timeout, read_timeout)
+
+    def _post(self, body):
+        try:
+            r = self.session.post(
+                self.repository_url, data=body, auth=self.auth,
+                headers={'Content-Type': body.content_type},
+                timeout=self.timeout)
+        except requests.exceptions.RequestException as e:
+            raise UploadError(str(e))
+        if not 200 <= r.status_code < 300:
+            raise UploadError('{0} responded with {1} {2}'.format(
+                self.repository_url, r.status_code, r.reason))
+        return r
+
+    def upload(self, path, callback=None, digests=None):
+        """Uploads a built distribution file
+        :param path: path to the distribution
+        :param callback: called with the number of bytes sent so far
+        :param digests: (md5, sha256) of the file if already computed
+        :return: UploadResult
+        """
+        md5_digest, sha256_digest = digests or file_digests(path)
+        fields = [
+            (':action', 'file_upload'),
+            ('protocol_version', '1'),
+            ('filetype', filetype(path)),
+            ('pyversion', pyversion(path)),
+            ('md5_digest', md5_digest),
+            ('sha256_digest', sha256_digest),
+        ] + read_metadata(path)
+        body = MultipartBody(fields, [('content', path)], callback)
+        start = time.time()
+        self._post(body)
+        elapsed = time.time() - start
+        size = os.path.getsize(path)
+        return UploadResult(os.path.basename(path), size, elapsed,
+                            size / elapsed if elapsed else float(size))
+
+    def register(self, fields):
+        """Registers a release
+        :param fields: metadata form fields, e.g. from metadata_from_setup
+        :return: None
+        """
+        self._post(MultipartBody([(':action', 'submit')] + list(fields)))
@@ -16,11 +16,15 @@
 import os
 import sys
 
-import re
-import sh
-from yolk.pypi import CheeseShop
-
 from . import logger
+from . import timing
+from .runner import run, CommandError, PYTHON
+from .static_deps import get_static_dependencies
+from .depgraph import GraphBuilder
+from .index import IndexClient
+from .markers import evaluate_marker, MarkerError
+from .requirements import (read_requirements, parse_requirement,
+                           RequirementsError)
 
 lgr = logger.init()
 
@@ -29,65 +33,121 @@ FILES_TO_CHECK = 'setup.py'
 
 class VersionChecker():
     def __init__(self, path='', extra_files=None):
+        """Finds the dependencies of a package.
+        :param path: location of setup.py
+        :param extra_files: requirements file, or list of them, to check
+        besides setup.py. relative to path
+        :return: None
+        """
         self.path = path
-        if extra_files is None:
-            self.files_to_check = [FILES_TO_CHECK]
-        else:
-            self.files_to_check.append(FILES_TO_CHECK)
+        self.files_to_check = [FILES_TO_CHECK]
+        if isinstance(extra_files, (list, tuple)):
+            self.files_to_check.extend(extra_files)
+        elif extra_files:
+            self.files_to_check.append(extra_files)
         logger.configure()
 
     def _command(self, args, cmd):
         """Runs python commands from command line
         :param args: arguments to run command with.
-        :return: returns the text output of the command.
+        :return: returns the lines of text output of the command.
         """
-        current_dir = os.getcwd()
         try:
-            if self.path:
-                os.chdir(self.path)
-            cmd = sh.Command(cmd)
-            p = cmd(*args)
-            p.wait()
-        except (sh.ErrorReturnCode, ValueError, OSError) as e:
+            return run([cmd] + list(args), cwd=self.path).splitlines()
+        except CommandError as e:
             lgr.error(e)
             sys.exit(1)
-        finally:
-            os.chdir(current_dir)
-        return p
 
     def _get_file_dependencies(self, path_to_file):
+        with timing.span('setup_py', path=path_to_file) as attributes:
+            dependencies = self._get_setup_dependencies(path_to_file,
+                                                        attributes)
+            attributes['dependencies'] = len(dependencies)
+            return dependencies
+
+    def _get_setup_dependencies(self, path_to_file, attributes):
+        attributes['static'] = False
+        if not os.path.isfile(path_to_file):
+            lgr.error("{0} not found".format(path_to_file))
+            sys.exit(1)
+        if os.path.basename(path_to_file) == FILES_TO_CHECK:
+            static = get_static_dependencies(os.path.dirname(path_to_file))
+            if static is not None:
+                attributes['static'] = True
+                setup_requires = static['setup_requires']
+                return setup_requires + [r for r in static['install_requires']
+                                         if r not in setup_requires]
         args = ["setup.py", "install", "-v", "-n"]
-        output = self._command(args, 'python')
+        output = self._command(args, PYTHON)
         dependencies = []
         for line in output:
             if line.startswith("Searching for"):
                 dependencies.append(
-                        line.replace("Searching for ", "").strip().encode(
-                                'ascii', 'ignore'))
+                        line.replace("Searching for ", "").strip())
         return dependencies
 
     def get_all_dependencies(self):
+        """Gets the dependencies in setup.py and every extra file together.
+        Constraint files included with -c only pin versions, so their
+        entries are not dependencies.
+        :return: list of requirement strings
+        """
+        dependencies = []
+        requirement_files = []
         for f in self.files_to_check:
             full_path_to_file = os.path.join(self.path or '', f)
-            return self._get_file_dependencies(full_path_to_file)
+            if f == FILES_TO_CHECK:
+                dependencies.extend(
+                    self._get_file_dependencies(full_path_to_file))
+            else:
+                requirement_files.append(full_path_to_file)
+        if requirement_files:
+            try:
+                with timing.span('requirements',
+                                 files=requirement_files) as attributes:
+                    lines = read_requirements(requirement_files)
+                    attributes['lines'] = len(lines)
+            except RequirementsError as e:
+                lgr.error(e)
+                sys.exit(1)
+            dependencies.extend(line.requirement for line in lines
+                                if not line.constraint and line.name)
+        return [d for i, d in enumerate(dependencies)
+                if d not in dependencies[:i]]
 
     def get_dependency_for_this_package(self, package_name):
-        args = ["install", package_name, "-v", "-n"]
-        output = self._command(args, 'pip')
+        """Gets the dependencies of the latest release of a package on the
+        index which apply to this interpreter
+        :return: list of requirement strings
+        """
+        client = IndexClient()
+        version = client.latest(package_name)
+        release = version and client.release(package_name, version)
+        if not release:
+            lgr.error("Unable to find package {0} on {1}".format(
+                package_name, client.index_url))
+            sys.exit(1)
         dependencies = []
-        for line in output:
-            if line.startswith("Searching for"):
-                dependencies.append(
-                        line.replace("Searching for ", "").strip().encode(
-                                'ascii', 'ignore'))
+        for text in release['requires_dist'] or []:
+            try:
+                requirement = parse_requirement(text)
+                if requirement.marker and \
+                        not evaluate_marker(requirement.marker):
+                    continue
+            except (RequirementsError, MarkerError) as e:
+                lgr.debug('ignoring requirement of {0}: {1}'.format(
+                    package_name, e))
+                continue
+            dependencies.append(text.split(';', 1)[0].strip())
         return dependencies
 
     def _get_package_name_from_condition(self, condition):
-        return re.search('(.+)[=<>][0-9,.]*', condition)
+        return parse_requirement(condition).name
 
-    # def _get_subdependencies_for_package(self):
-    #     pass
-    #
-    # def get_all_sub_dependencies(self):
-    #     for dep in self.get_all_dependencies():
-    #         name = self._get_package_name_from_condition(dep)
+    def get_all_sub_dependencies(self, **builder_kwargs):
+        """Resolves the dependencies of the package recursively
+        :param builder_kwargs: arguments for the GraphBuilder
+        :return: DependencyGraph
+        """
+        return GraphBuilder(**builder_kwargs).build(
+            self.get_all_dependencies())
@@ -0,0 +1,351 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import re
+from collections import namedtuple
+
+_VERSION = re.compile(r'''
+    ^\s*v?
+    (?:(?P<epoch>[0-9]+)!)?
+    (?P<release>[0-9]+(?:\.[0-9]+)*)
+    (?P<pre>[-_.]?(?P<pre_l>a|b|c|rc|alpha|beta|pre|preview)
+        [-_.]?(?P<pre_n>[0-9]+)?)?
+    (?P<post>(?:-(?P<post_n1>[0-9]+))|
+        (?:[-_.]?(?P<post_l>post|rev|r)[-_.]?(?P<post_n2>[0-9]+)?))?
+    (?P<dev>[-_.]?dev[-_.]?(?P<dev_n>[0-9]+)?)?
+    (?:\+(?P<local>[a-z0-9]+(?:[-_.][a-z0-9]+)*))?
+    \s*$''', re.VERBOSE | re.IGNORECASE)
+
+_SPECIFIER = re.compile(
+    r'^\s*(===|==|!=|~=|<=|>=|<|>)\s*([^\s,;]+)\s*$')
+
+_PRE_RANKS = {'a': 0, 'alpha': 0, 'b': 1, 'beta': 1, 'c': 2, 'rc': 2,
+              'pre': 2, 'preview': 2}
+
+# sort keys of versions, shared by every caller
+MAX_CACHED_KEYS = 200000
+_parsed = {}
+
+Parsed = namedtuple('Parsed',
+                    ['epoch', 'release', 'pre', 'post', 'dev', 'local', 'key'])
+
+
+class InvalidVersion(ValueError):
+    pass
+
+
+class InvalidSpecifier(ValueError):
+    pass
+
+
+def _strip_zeros(release):
+    release = list(release)
+    while release and release[-1] == 0:
+        release.pop()
+    return tuple(release)
+
+
+def _local_key(local):
+    # numeric segments sort after alphanumeric ones (PEP 440)
+    return tuple((1, int(part), '') if part.isdigit() else (0, 0, part)
+                 for part in re.split(r'[-_.]', local.lower()))
+
+
+def parse(version):
+    """Parses a PEP 440 version. Results are memoized, so every distinct
+    version string is only parsed once per process.
+    :param version: version string, e.g. 1.0.post1
+    :return: Parsed, whose key compares like the version
+    :raises: InvalidVersion
+    """
+    parsed = _parsed.get(version)
+    if parsed is not None:
+        return parsed
+    match = _VERSION.match(version)
+    if not match:
+        raise InvalidVersion('Invalid version: {0!r}'.format(version))
+    epoch = int(match.group('epoch') or 0)
+    release = tuple(int(p) for p in match.group('release').split('.'))
+    pre = None
+    if match.group('pre'):
+        pre = (_PRE_RANKS[match.group('pre_l').lower()],
+               int(match.group('pre_n') or 0))
+    post = None
+    if match.group('post'):
+        post = int(match.group('post_n1') or match.group('post_n2') or 0)
+    dev = None
+    if match.group('dev'):
+        dev = int(match.group('dev_n') or 0)
+    local = match.group('local')
+    key = (
+        epoch,
+        _strip_zeros(release),
+        # a dev release without a pre-release sorts before any pre-release
+        pre if pre is not None else
+        ((-1, 0) if dev is not None and post is None else (3, 0)),
+        -1 if post is None else post,
+        (1, 0) if dev is None else (0, dev),
+        (0, ()) if local is None else (1, _local_key(local)),
+    )
+    parsed = Parsed(epoch, release, pre, post, dev,
+                    local.lower() if local else None, key)
+    if len(_parsed) >= MAX_CACHED_KEYS:
+        _parsed.clear()
+    _parsed[version] = parsed
+    return parsed
+
+
+def is_valid(version):
+    try:
+        parse(version)
+    except InvalidVersion:
+        return False
+    return True
+
+
+def version_key(version):
+    """Gets the sort key of a version
+    """
+    return parse(version).key
+
+
+def is_prerelease(version):
+    parsed = parse(version)
+    return parsed.pre is not None or parsed.dev is not None
+
+
+def sort_versions(versions, reverse=False):
+    """Sorts versions, dropping those which are not valid PEP 440 versions
+    """
+    keyed = []
+    for version in versions:
+        try:
+            keyed.append((parse(version).key, version))
+        except InvalidVersion:
+            continue
+    keyed.sort(key=lambda pair: pair[0], reverse=reverse)
+    return [version for _, version in keyed]
+
+
+def latest(versions, prereleases=False):
+    """Gets the highest version
+    :param prereleases: consider pre-releases. when False they are still
+    returned if there is nothing else
+    :return: the version or None if there are no valid versions
+    """
+    best = best_pre = None
+    for version in versions:
+        try:
+            parsed = parse(version)
+        except InvalidVersion:
+            continue
+        if parsed.pre is None and parsed.dev is None or prereleases:
+            if best is None or parsed.key > best[0]:
+                best = (parsed.key, version)
+        elif best_pre is None or parsed.key > best_pre[0]:
+            best_pre = (parsed.key, version)
+    best = best or best_pre
+    return best[1] if best else None
+
+
+def _public(key):
+    return key[:5] + ((0, ()),)
+
+
+def _padded(release, length):
+    return tuple(release[:length]) + (0,) * (length - len(release))
+
+
+def _same_release(parsed, spec):
+    """Do two versions share epoch and release, e.g. 1.0rc1 and 1.0.post1?
+    """
+    return parsed.epoch == spec.epoch and \
+        _strip_zeros(parsed.release) == _strip_zeros(spec.release)
+
+
+class _Specifier():
+    def __init__(self, text):
+        match = _SPECIFIER.match(text)
+        if not match:
+            raise InvalidSpecifier('Invalid specifier: {0!r}'.format(text))
+        self.text = text.strip()
+        self.op, self.version = match.groups()
+        self.prefix = None
+        self.parsed = None
+        if self.op == '===':
+            return
+        if self.version.endswith('.*'):
+            if self.op not in ('==', '!='):
+                raise InvalidSpecifier(
+                    'Wildcards are only allowed with == and !=: {0!r}'.format(
+                        text))
+            prefix = parse(self.version[:-2])
+            self.prefix = (prefix.epoch, prefix.release)
+            return
+        try:
+            self.parsed = parse(self.version)
+        except InvalidVersion as e:
+            raise InvalidSpecifier(str(e))
+        if self.op == '~=' and len(self.parsed.release) < 2:
+            raise InvalidSpecifier(
+                '~= needs at least two release segments: {0!r}'.format(text))
+
+    @property
+    def is_prerelease(self):
+        """Does the specifier name a pre-release, allowing pre-releases?
+        """
+        return self.parsed is not None and self.op not in ('!=',) and (
+            self.parsed.pre is not None or self.parsed.dev is not None)
+
+    def contains(self, version, parsed):
+        op = self.op
+        if op == '===':
+            return version.lower() == self.version.lower()
+        if self.prefix is not None:
+            epoch, release = self.prefix
+            matches = parsed.epoch == epoch and \
+                _padded(parsed.release, len(release)) == release
+            return matches if op == '==' else not matches
+        spec = self.parsed
+        key = parsed.key
+        if spec.local is None:
+            key = _public(key)
+        if op == '==':
+            return key == spec.key
+        if op == '!=':
+            return key != spec.key
+        if op == '<=':
+            return key <= spec.key
+        if op == '>=':
+            return key >= spec.key
+        if op == '<':
+            if not key < spec.key:
+                return False
+            # <1.0 excludes 1.0rc1 and <1.0.post1 excludes 1.0.post1.dev1,
+            # unless the specifier is a pre-release
+            return not (spec.pre is None and spec.dev is None and
+                        (parsed.pre is not None or parsed.dev is not None) and
+                        (spec.post is None or
+                         (parsed.pre is None and parsed.post == spec.post)) and
+                        _same_release(parsed, spec))
+        if op == '>':
+            if not _public(parsed.key) > spec.key:
+                return False
+            # >1.0 excludes 1.0.post1 and >1.0a1 excludes 1.0a1.post1,
+            # unless the specifier is a post-release or a dev release
+            return not (spec.post is None and spec.dev is None and
+                        parsed.post is not None and
+                        parsed.pre == spec.pre and
+                        _same_release(parsed, spec))
+        # ~=
+        if key < spec.key:
+            return False
+        prefix = spec.release[:-1]
+        return parsed.epoch == spec.epoch and \
+            _padded(parsed.release, len(prefix)) == prefix
+
+
+class SpecifierSet():
+    def __init__(self, text=''):
+        """A comma separated set of version specifiers, e.g. >=1.0,!=1.3.*
+        Every specifier is compiled once, and versions are compared by
+        their memoized keys.
+        :param text: the specifiers. empty matches every version
+        :raises: InvalidSpecifier
+        """
+        self.text = text.strip()
+        self.specifiers = [_Specifier(s) for s in self.text.split(',')
+                           if s.strip()]
+
+    def __str__(self):
+        return ','.join(s.text for s in self.specifiers)
+
+    def __repr__(self):
+        return '<SpecifierSet({0!r})>'.format(str(self))
+
+    def __contains__(self, version):
+        return self.contains(version)
+
+    @property
+    def is_pinned(self):
+        """Does the set allow a single release only (==X or ===X)?
+        """
+        return self.pinned_version is not None
+
+    @property
+    def pinned_version(self):
+        """The version of the first ==X or ===X specifier, if any
+        """
+        for s in self.specifiers:
+            if s.op == '===' or s.op == '==' and s.prefix is None:
+                return s.version
+        return None
+
+    @property
+    def allows_prereleases(self):
+        return any(s.is_prerelease for s in self.specifiers)
+
+    def contains(self, version, prereleases=None):
+        """Does a version satisfy every specifier?
+        :param prereleases: allow pre-releases. default is to allow them
+        only if a specifier names one
+        """
+        try:
+            parsed = parse(version)
+        except InvalidVersion:
+            return any(s.op == '===' for s in self.specifiers) and all(
+                s.op == '===' and s.contains(version, None)
+                for s in self.specifiers)
+        if prereleases is None:
+            prereleases = self.allows_prereleases
+        if not prereleases and (parsed.pre is not None or
+                                parsed.dev is not None):
+            return False
+        return all(s.contains(version, parsed) for s in self.specifiers)
+
+    def filter(self, versions, prereleases=None):
+        """Gets the versions satisfying the set in one pass.
+        Pre-releases are excluded unless allowed, except when nothing else
+        matches and prereleases is None.
+        :param versions: iterable of version strings
+        :return: list of matching versions, in the order given
+        """
+        if prereleases is None:
+            prereleases = self.allows_prereleases or None
+        matches = []
+        fallback = []
+        for version in versions:
+            try:
+                parsed = parse(version)
+            except InvalidVersion:
+                continue
+            if not all(s.contains(version, parsed) for s in self.specifiers):
+                continue
+            if parsed.pre is not None or parsed.dev is not None:
+                if prereleases:
+                    matches.append(version)
+                elif prereleases is None:
+                    fallback.append(version)
+            else:
+                matches.append(version)
+        return matches or fallback
+
+    def best_match(self, versions, prereleases=None):
+        """Gets the highest version satisfying the set, or None
+        """
+        matches = self.filter(versions, prereleases)
+        if not matches:
+            return None
+        return max(matches, key=version_key)
@@ -44,7 +44,6 @@ setup(
     },
     install_requires=[
         "requests>=2.7.0",
-        "sh>=1.11",
         "click==4.0",
     ]
 )